@@ -1,10 +1,23 @@
-import asyncio
-from fastapi import APIRouter, File, UploadFile, Form, Depends
-from typing import Optional
+from fastapi import APIRouter, File, UploadFile, Form, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from pydantic import BaseModel
-from app.services.fact_check_service import FactCheckService
-from app.services.professional_fact_check_service import ProfessionalFactCheckService
+from app.services.fact_check_service import FactCheckService, quick_check_flights
+from app.services.professional_fact_check_service import ProfessionalFactCheckService, speculation_stats, claim_flights, cache_tier_stats, stale_refreshes
 from app.middleware.auth_middleware import get_current_user_id
+from app.core.metrics import track_request
+from app.core.deadline import deadline_scope, resolve_request_timeout
+from app.core.scheduler import pipeline_scheduler, user_scope
+from app.core.admission import admission_controller
+from app.core.adaptive_limiter import limiter_snapshot
+from app.core.gemini_gateway import gemini_gateway
+from app.core.response_cache import response_cache
+from app.core.negative_cache import research_failures
+from app.core.config import (
+    DEADLINE_TEXT_SECONDS, DEADLINE_MULTIMODAL_SECONDS, DEADLINE_URL_SECONDS,
+    DEADLINE_MIN_SECONDS, DEADLINE_MAX_SECONDS, BATCH_MAX_CLAIMS
+)
+import json
 
 router = APIRouter()
 service = FactCheckService()
@@ -13,22 +26,105 @@ professional_service = ProfessionalFactCheckService()
 class ClaimInput(BaseModel):
     claim_text: str
 
+class BatchClaimInput(BaseModel):
+    claims: List[str]
+
 class URLInput(BaseModel):
     url: str
 
+def request_budget(default_seconds: float):
+    """
+    Dependency factory resolving the request's latency budget: the endpoint
+    default, or the client's X-Request-Timeout header within allowed limits.
+    """
+    def dependency(x_request_timeout: Optional[str] = Header(None)) -> float:
+        return resolve_request_timeout(default_seconds, x_request_timeout, DEADLINE_MIN_SECONDS, DEADLINE_MAX_SECONDS)
+    return dependency
+
 @router.post("/")
-async def check_claim(data: ClaimInput, user_id: str = Depends(get_current_user_id)):
-    # Run blocking check_fact in threadpool to prevent blocking event loop
-    # Using professional service with full pipeline
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(None, professional_service.check_fact, data.claim_text)
+async def check_claim(
+    data: ClaimInput,
+    user_id: str = Depends(get_current_user_id),
+    budget_seconds: float = Depends(request_budget(DEADLINE_TEXT_SECONDS))
+):
+    # Using professional service with full pipeline (async end to end, no executor hop)
+    with deadline_scope(budget_seconds), user_scope(user_id):
+        async with track_request("text"):
+            result = await professional_service.check_fact_async(data.claim_text)
     return result
 
+@router.post("/stream")
+async def check_claim_stream(
+    data: ClaimInput,
+    user_id: str = Depends(get_current_user_id),
+    budget_seconds: float = Depends(request_budget(DEADLINE_TEXT_SECONDS))
+):
+    """
+    Same pipeline as POST /, streamed as Server-Sent Events.
+    Emits cache, structured_claim, search_query, research and verdict_token
+    events as each stage completes, then the final result.
+    """
+    async def event_stream():
+        with deadline_scope(budget_seconds), user_scope(user_id):
+            async with track_request("text"):
+                async for event, payload in professional_service.check_fact_stream(data.claim_text):
+                    yield _format_sse(event, payload)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _format_sse(event: str, payload) -> str:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+
+@router.post("/batch")
+async def check_claim_batch(
+    data: BatchClaimInput,
+    user_id: str = Depends(get_current_user_id),
+    budget_seconds: float = Depends(request_budget(DEADLINE_TEXT_SECONDS))
+):
+    """
+    Fact-check a list of claims, streamed back as NDJSON in completion order.
+    Each line covers one distinct claim (duplicates are checked once and list
+    every input position in "indices"); the last line is a summary.
+    The latency budget applies to each claim, not to the whole batch.
+    """
+    if not data.claims:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No claims provided")
+    if len(data.claims) > BATCH_MAX_CLAIMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many claims: {len(data.claims)} (maximum {BATCH_MAX_CLAIMS})"
+        )
+
+    async def result_stream():
+        counts = {"cached": 0, "checked": 0, "partial": 0, "rejected": 0, "error": 0}
+        with user_scope(user_id):
+            async with track_request("batch"):
+                async for item in professional_service.check_batch(data.claims, item_budget=budget_seconds):
+                    counts[item["status"]] += 1
+                    yield _format_ndjson(item)
+        yield _format_ndjson({"done": True, "total": len(data.claims), "items": sum(counts.values()), **counts})
+
+    return StreamingResponse(
+        result_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _format_ndjson(payload) -> str:
+    """Encode one NDJSON line."""
+    return json.dumps(payload, ensure_ascii=False, default=str) + "\n"
+
 @router.post("/multimodal")
 async def check_multimodal_claim(
     claim_text: Optional[str] = Form(None),
     file: Optional[UploadFile] = File(None),
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    budget_seconds: float = Depends(request_budget(DEADLINE_MULTIMODAL_SECONDS))
 ):
     """
     Handle multimodal fact checking: text, images, videos, and audio files
@@ -36,31 +132,98 @@ async def check_multimodal_claim(
     if not claim_text and not file:
         return {"error": "Either claim_text or file must be provided"}
 
-    loop = asyncio.get_event_loop()
-
-    if file:
-        # Read file content
-        file_content = await file.read()
-        result = await loop.run_in_executor(
-            None,
-            service.check_multimodal_fact,
-            claim_text or "",
-            file_content,
-            file.content_type,
-            file.filename
-        )
-    else:
-        # Text only
-        result = await loop.run_in_executor(None, service.check_fact, claim_text)
+    with deadline_scope(budget_seconds), user_scope(user_id):
+        async with track_request("multimodal"):
+            if file:
+                # Read file content
+                file_content = await file.read()
+                result = await service.check_multimodal_fact_async(
+                    claim_text or "",
+                    file_content,
+                    file.content_type,
+                    file.filename
+                )
+            else:
+                # Text only
+                result = await service.check_fact_async(claim_text)
 
     return result
 
 @router.post("/url")
-async def check_url_claim(data: URLInput, user_id: str = Depends(get_current_user_id)):
+async def check_url_claim(
+    data: URLInput,
+    user_id: str = Depends(get_current_user_id),
+    budget_seconds: float = Depends(request_budget(DEADLINE_URL_SECONDS))
+):
     """
     Handle fact checking from a URL/link.
     Extracts article content and fact-checks the main claims.
     """
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(None, service.check_url_fact, data.url)
+    with deadline_scope(budget_seconds), user_scope(user_id):
+        async with track_request("url"):
+            result = await service.check_url_fact_async(data.url)
     return result
+
+
+@router.get("/speculation/stats")
+async def get_speculation_stats(user_id: str = Depends(get_current_user_id)):
+    """
+    Report how often speculative research was kept and the latency it saved.
+    """
+    return speculation_stats.snapshot()
+
+
+@router.get("/coalescing/stats")
+async def get_coalescing_stats(user_id: str = Depends(get_current_user_id)):
+    """
+    Report how many duplicate in-flight claims were served by a shared pipeline
+    run, and how many quick checks by a shared Gemini call.
+    """
+    return {**claim_flights.snapshot(), "quick_check": quick_check_flights.snapshot()}
+
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats(user_id: str = Depends(get_current_user_id)):
+    """
+    Report pipeline slots in use and queued runs per scheduler lane.
+    """
+    return pipeline_scheduler.snapshot()
+
+
+@router.get("/admission/stats")
+async def get_admission_stats(user_id: str = Depends(get_current_user_id)):
+    """
+    Report the overload signals admission control watches and whether requests are being shed.
+    """
+    return admission_controller.snapshot()
+
+
+@router.get("/limiter/stats")
+async def get_limiter_stats(user_id: str = Depends(get_current_user_id)):
+    """
+    Report the adaptive concurrency limit, calls in flight and latency averages per upstream model.
+    """
+    return limiter_snapshot()
+
+
+@router.get("/gemini/stats")
+async def get_gemini_stats(user_id: str = Depends(get_current_user_id)):
+    """
+    Report Gemini calls and token spend per call site.
+    """
+    return gemini_gateway.snapshot()
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(user_id: str = Depends(get_current_user_id)):
+    """
+    Report hits per cache tier (memory, database, near-duplicate, canonical),
+    background refreshes of stale verdicts, the size and evictions of the
+    in-process response cache, and recent research failures by class.
+    """
+    return {
+        "tiers": cache_tier_stats.snapshot(),
+        "stale_refreshes": stale_refreshes.snapshot(),
+        "response_cache": response_cache.snapshot(),
+        "negative_cache": research_failures.snapshot()
+    }
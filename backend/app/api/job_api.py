@@ -0,0 +1,110 @@
+from fastapi import APIRouter, File, UploadFile, Form, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.api.claim_api import ClaimInput, URLInput, _format_sse
+from app.services.job_service import JobService, QueueFull
+from app.middleware.auth_middleware import get_current_user_id
+
+router = APIRouter()
+job_service = JobService()
+
+
+def _accepted(job: dict) -> dict:
+    """Response for a newly queued job, with where to follow it."""
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['job_id']}",
+        "events_url": f"/api/jobs/{job['job_id']}/events"
+    }
+
+
+def _queue_full(error: QueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+@router.post("/claims", status_code=status.HTTP_202_ACCEPTED)
+async def submit_claim_job(data: ClaimInput, user_id: str = Depends(get_current_user_id)):
+    """Queue a text claim check; returns a job ID immediately."""
+    try:
+        return _accepted(await job_service.submit_claim(data.claim_text, user_id))
+    except QueueFull as e:
+        raise _queue_full(e)
+
+
+@router.post("/multimodal", status_code=status.HTTP_202_ACCEPTED)
+async def submit_multimodal_job(
+    claim_text: Optional[str] = Form(None),
+    file: Optional[UploadFile] = File(None),
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Queue a multimodal check (text, image, video, or audio); returns a job ID
+    immediately instead of holding the connection through media processing.
+    """
+    if not claim_text and not file:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Either claim_text or file must be provided")
+
+    file_content = await file.read() if file else None
+    try:
+        job = await job_service.submit_multimodal(
+            claim_text or "",
+            file_content,
+            file.content_type if file else None,
+            file.filename if file else None,
+            user_id
+        )
+    except QueueFull as e:
+        raise _queue_full(e)
+    return _accepted(job)
+
+
+@router.post("/url", status_code=status.HTTP_202_ACCEPTED)
+async def submit_url_job(data: URLInput, user_id: str = Depends(get_current_user_id)):
+    """Queue a URL check; returns a job ID immediately."""
+    try:
+        return _accepted(await job_service.submit_url(data.url, user_id))
+    except QueueFull as e:
+        raise _queue_full(e)
+
+
+@router.get("/capacity")
+async def get_job_capacity(user_id: str = Depends(get_current_user_id)):
+    """
+    Live job workers and queue backlog. New jobs are refused with 503 while
+    "accepting" is false.
+    """
+    return await job_service.capacity()
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, user_id: str = Depends(get_current_user_id)):
+    """Current state of a job, including its result once it has succeeded."""
+    job = await job_service.get_job(job_id, user_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, user_id: str = Depends(get_current_user_id)):
+    """
+    Follow a job as Server-Sent Events: a "job" event each time its status
+    changes, ending with the succeeded or dead_letter state.
+    """
+    if await job_service.get_job(job_id, user_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    async def event_stream():
+        async for job in job_service.watch(job_id, user_id):
+            yield _format_sse("job", job)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
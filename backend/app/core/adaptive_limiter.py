@@ -0,0 +1,197 @@
+from app.core.config import (
+    ADAPTIVE_CONCURRENCY, LIMITER_INITIAL_CONCURRENCY, LIMITER_MIN_CONCURRENCY, LIMITER_MAX_CONCURRENCY,
+    LIMITER_LATENCY_TOLERANCE, LIMITER_BACKOFF_RATIO
+)
+from app.core.deadline import DeadlineExceeded, budget
+from app.core.upstream_errors import classify_error, OVERLOAD_KINDS
+from collections import deque
+import asyncio
+import threading
+import time
+
+# Upstreams whose quota is shared per model; MongoDB has its own connection pool
+LIMITED_UPSTREAMS = ("gemini", "perplexity")
+
+# Outcomes of one call, as reported to AdaptiveLimiter.release
+SUCCESS = "success"
+OVERLOAD = "overload"
+TIMEOUT = "timeout"
+IGNORE = "ignore"
+
+# Latency samples needed before the latency gradient is trusted
+WARMUP_SAMPLES = 10
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop, future):
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for one upstream model.
+
+    Each successful call whose latency stays within `latency_tolerance` of
+    the long-run average raises the limit by 1/limit (about +1 per window of
+    calls), but only while the limit is actually being used. Overload errors
+    (429/503) cut the limit by `backoff_ratio`; a short-run latency more than
+    `latency_tolerance` times the long-run average cuts it more gently. Cuts
+    happen at most once per observed round trip, so one burst of failures
+    doesn't collapse the limit.
+
+    One limiter is shared by uvicorn's loop and the sync bridge loop (see
+    run_sync): its state is guarded by a thread lock, and each waiter is
+    woken on its own loop through call_soon_threadsafe.
+    """
+
+    def __init__(self, name: str, initial: int = LIMITER_INITIAL_CONCURRENCY,
+                 min_limit: int = LIMITER_MIN_CONCURRENCY, max_limit: int = LIMITER_MAX_CONCURRENCY,
+                 latency_tolerance: float = LIMITER_LATENCY_TOLERANCE,
+                 backoff_ratio: float = LIMITER_BACKOFF_RATIO):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self.short_latency = None
+        self.long_latency = None
+        self.samples = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        """
+        Wait for a permit to call the upstream.
+
+        Raises:
+            DeadlineExceeded: If the request's budget runs out while waiting
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_flight < int(self.limit) and not self._waiters:
+                self.in_flight += 1
+                return
+            waiter = _Waiter(loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=budget())
+        except BaseException as e:
+            with self._lock:
+                if waiter.granted:
+                    # Granted just as we gave up: hand the permit back
+                    self.in_flight -= 1
+                    self._dispatch()
+                else:
+                    self._waiters.remove(waiter)
+            waiter.future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                raise DeadlineExceeded(f"No {self.name} concurrency permit became free within the request budget")
+            raise
+
+    def release(self, latency: float, outcome: str):
+        """
+        Return a permit and adjust the limit from the call's outcome.
+
+        Args:
+            latency (float): Seconds the call took
+            outcome (str): SUCCESS, OVERLOAD, TIMEOUT (stage cap hit) or IGNORE
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if outcome == OVERLOAD:
+                self._decrease(self.backoff_ratio, "overload errors")
+            elif outcome == SUCCESS or (outcome == TIMEOUT and self.long_latency is not None and latency > self.long_latency):
+                # A call cut off by its timeout only counts if it was already slower than usual
+                self._on_latency(latency, outcome == SUCCESS)
+            self._dispatch()
+
+    def _on_latency(self, latency: float, succeeded: bool):
+        self.samples += 1
+        if self.long_latency is None:
+            self.short_latency = self.long_latency = latency
+            return
+        self.short_latency += 0.2 * (latency - self.short_latency)
+        self.long_latency += 0.02 * (latency - self.long_latency)
+
+        if self.samples >= WARMUP_SAMPLES and self.short_latency > self.long_latency * self.latency_tolerance:
+            self._decrease(max(self.backoff_ratio, 0.9), "rising latency")
+        elif succeeded and self.in_flight + 1 >= self.limit / 2:
+            # Only probe upwards when the current limit is in use
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _decrease(self, ratio: float, reason: str):
+        now = time.monotonic()
+        if now - self._last_decrease < max(1.0, self.short_latency or 0.0):
+            return
+        self._last_decrease = now
+        old_limit = self.limit
+        self.limit = max(self.min_limit, self.limit * ratio)
+        self.decreases += 1
+        if int(self.limit) != int(old_limit):
+            print(f"[LIMITER] {self.name} concurrency {int(old_limit)} -> {int(self.limit)} ({reason})")
+
+    def _dispatch(self):
+        """Grant free permits to waiters, in order. Called with the lock held."""
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            try:
+                waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+            except RuntimeError:
+                # The waiter's loop has closed
+                continue
+            waiter.granted = True
+            self.in_flight += 1
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def snapshot(self) -> dict:
+        """Summary suitable for a stats endpoint."""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "short_latency_seconds": round(self.short_latency or 0.0, 3),
+            "long_latency_seconds": round(self.long_latency or 0.0, 3),
+            "decreases": self.decreases
+        }
+
+
+# One limiter per (upstream, model), shared by every service instance in the process
+adaptive_limiters = {}
+
+
+def get_limiter(upstream: str, model: str = None):
+    """The limiter for an upstream model, or None if the upstream isn't limited."""
+    if not ADAPTIVE_CONCURRENCY or upstream not in LIMITED_UPSTREAMS:
+        return None
+    key = (upstream, model or "default")
+    limiter = adaptive_limiters.get(key)
+    if limiter is None:
+        limiter = adaptive_limiters[key] = AdaptiveLimiter(f"{upstream}/{key[1]}")
+    return limiter
+
+
+def is_overload(error: Exception) -> bool:
+    """Whether an error means the upstream is over quota or overloaded."""
+    return classify_error(error) in OVERLOAD_KINDS
+
+
+def limiter_snapshot() -> dict:
+    """All limiters, keyed "upstream/model"."""
+    return {limiter.name: limiter.snapshot() for limiter in adaptive_limiters.values()}
@@ -0,0 +1,112 @@
+from app.core.config import (
+    ADMISSION_CONTROL, ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUE_WAIT_SECONDS,
+    ADMISSION_MAX_ERROR_RATE, ADMISSION_MIN_UPSTREAM_CALLS, ADMISSION_RETRY_AFTER_SECONDS
+)
+from app.core.metrics import OVERLOADED, SHED_REQUESTS, upstream_health
+from app.core.scheduler import pipeline_scheduler
+from app.core.tracing import set_span_attributes
+from contextvars import ContextVar
+
+# Set once a request has been admitted, so nested checks (e.g. the text
+# pipeline run by a URL check) don't evaluate it a second time
+_admitted = ContextVar("admitted", default=False)
+
+# Upstreams whose error rate counts towards overload
+WATCHED_UPSTREAMS = ("gemini", "perplexity")
+
+
+class Overloaded(Exception):
+    """Raised when a non-cached request is shed; the API answers 503 + Retry-After."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Sheds new non-cached requests while the pipeline is saturated.
+
+    Three signals are checked on every admission: pipeline runs in flight
+    (running + queued in the scheduler), how long the oldest queued run has
+    been waiting, and the recent error rate of the LLM/research upstreams.
+    Cache hits never reach this check.
+    """
+
+    def __init__(self, scheduler, health, enabled: bool = ADMISSION_CONTROL):
+        self.scheduler = scheduler
+        self.health = health
+        self.enabled = enabled
+        self.max_in_flight = ADMISSION_MAX_IN_FLIGHT
+        self.max_queue_wait = ADMISSION_MAX_QUEUE_WAIT_SECONDS
+        self.max_error_rate = ADMISSION_MAX_ERROR_RATE
+        self.min_upstream_calls = ADMISSION_MIN_UPSTREAM_CALLS
+        self.retry_after = ADMISSION_RETRY_AFTER_SECONDS
+        self.overloaded = False
+        self.shed = 0
+
+    def admit(self):
+        """
+        Let a non-cached request into the pipeline.
+
+        Raises:
+            Overloaded: If any overload signal is past its limit
+        """
+        if not self.enabled or _admitted.get():
+            return
+
+        overload = self._overload_reason()
+        self._set_state(overload)
+        if overload is not None:
+            reason, detail = overload
+            self.shed += 1
+            SHED_REQUESTS.labels(reason).inc()
+            set_span_attributes(shed=True, shed_reason=reason)
+            raise Overloaded(f"Server overloaded ({detail}), retry later", self.retry_after)
+        _admitted.set(True)
+
+    def _overload_reason(self):
+        """Returns (reason, detail) for the first signal past its limit, or None."""
+        in_flight = self.scheduler.running + self.scheduler.waiting
+        if in_flight >= self.max_in_flight:
+            return "in_flight", f"{in_flight} pipeline runs in flight"
+
+        queue_wait = self.scheduler.oldest_wait()
+        if queue_wait >= self.max_queue_wait:
+            return "queue_wait", f"oldest queued run waiting {queue_wait:.1f}s"
+
+        for upstream in WATCHED_UPSTREAMS:
+            error_rate, calls = self.health.error_rate(upstream)
+            if calls >= self.min_upstream_calls and error_rate >= self.max_error_rate:
+                return "upstream_errors", f"{upstream} error rate {error_rate:.0%} over {calls} calls"
+        return None
+
+    def _set_state(self, overload):
+        overloaded = overload is not None
+        if overloaded == self.overloaded:
+            return
+        self.overloaded = overloaded
+        OVERLOADED.set(1 if overloaded else 0)
+        if overloaded:
+            print(f"[OVERLOAD] Shedding non-cached requests: {overload[1]}")
+        else:
+            print("[OVERLOAD] Recovered, admitting non-cached requests again")
+
+    def snapshot(self) -> dict:
+        """Summary suitable for a stats endpoint."""
+        return {
+            "enabled": self.enabled,
+            "overloaded": self.overloaded,
+            "shed": self.shed,
+            "in_flight": self.scheduler.running + self.scheduler.waiting,
+            "max_in_flight": self.max_in_flight,
+            "oldest_queue_wait_seconds": round(self.scheduler.oldest_wait(), 3),
+            "max_queue_wait_seconds": self.max_queue_wait,
+            "upstream_error_rates": {
+                upstream: round(self.health.error_rate(upstream)[0], 3) for upstream in WATCHED_UPSTREAMS
+            },
+            "max_error_rate": self.max_error_rate
+        }
+
+
+admission_controller = AdmissionController(pipeline_scheduler, upstream_health)
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import weakref
+
+# Dedicated event loop used by the synchronous wrappers (scripts, CLI tools).
+# The API itself runs on uvicorn's loop and calls the *_async methods directly.
+_sync_loop = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """Start (once) a background thread that runs an event loop forever."""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_sync_loop.run_forever, name="sync-bridge-loop", daemon=True)
+            thread.start()
+        return _sync_loop
+
+
+def run_sync(coro):
+    """
+    Run a coroutine to completion from synchronous code.
+
+    The coroutine is scheduled on a long-lived background loop so that
+    loop-bound resources (Mongo, HTTP clients) are reused across calls.
+
+    Args:
+        coro: Coroutine to execute
+
+    Returns:
+        The coroutine's result
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _get_sync_loop())
+    return future.result()
+
+
+class LoopLocal:
+    """
+    Lazily create one instance of an async resource per running event loop.
+
+    Async clients (AsyncMongoClient, httpx.AsyncClient, genai aio) bind their
+    connections to the loop they were first used on, so sharing one instance
+    between uvicorn's loop and the sync bridge loop is not safe.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instances = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            instance = self._instances.get(loop)
+            if instance is None:
+                instance = self._factory()
+                self._instances[loop] = instance
+            return instance
+
+    def pop(self):
+        """Remove and return the running loop's instance, or None if it was never created."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            return self._instances.pop(loop, None)
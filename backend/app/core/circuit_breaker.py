@@ -0,0 +1,145 @@
+from app.core.config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT_SECONDS, CIRCUIT_HALF_OPEN_MAX_CALLS
+from app.core.upstream_errors import classify_error, CLIENT
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+    def __init__(self, upstream: str, retry_in: float):
+        super().__init__(f"{upstream} circuit is open (next probe in {retry_in:.0f}s)")
+        self.upstream = upstream
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker.
+
+    closed: calls go through; after `failure_threshold` consecutive failures
+    the circuit opens.
+    open: calls fail fast with CircuitOpen for `reset_timeout` seconds.
+    half_open: up to `half_open_max_calls` probe calls go through; a
+    successful probe closes the circuit, a failed one opens it again.
+
+    One breaker is shared by uvicorn's loop and the sync bridge loop (see
+    run_sync), so its state changes are guarded by a thread lock.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT_SECONDS,
+                 half_open_max_calls: int = CIRCUIT_HALF_OPEN_MAX_CALLS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probes_in_flight = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    def on_state_change(self, listener):
+        """Register listener(breaker, old_state, new_state)."""
+        self._listeners.append(listener)
+
+    def before_call(self):
+        """
+        Ask to make a call.
+
+        Returns:
+            bool: True if the call is a half-open probe
+
+        Raises:
+            CircuitOpen: If the circuit is open, or half-open with all probe slots taken
+        """
+        with self._lock:
+            if self.state == OPEN:
+                retry_in = self.opened_at + self.reset_timeout - time.monotonic()
+                if retry_in > 0:
+                    self.rejected += 1
+                    raise CircuitOpen(self.name, retry_in)
+                self._transition(HALF_OPEN)
+
+            if self.state == HALF_OPEN:
+                if self.probes_in_flight >= self.half_open_max_calls:
+                    self.rejected += 1
+                    raise CircuitOpen(self.name, 0)
+                self.probes_in_flight += 1
+                return True
+            return False
+
+    def record_success(self, probe: bool = False):
+        with self._lock:
+            if probe:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self._transition(CLOSED)
+
+    def record_failure(self, probe: bool = False):
+        with self._lock:
+            if probe:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self._transition(OPEN)
+
+    def record_neutral(self, probe: bool = False):
+        """A call that ended without telling us anything (cancelled, out of request budget)."""
+        with self._lock:
+            if probe:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+
+    def _transition(self, state: str):
+        old_state, self.state = self.state, state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            print(f"[CIRCUIT] {self.name} circuit opened after {self.consecutive_failures} consecutive failures")
+        elif state == HALF_OPEN:
+            self.probes_in_flight = 0
+            print(f"[CIRCUIT] {self.name} circuit half-open, probing")
+        else:
+            self.consecutive_failures = 0
+            print(f"[CIRCUIT] {self.name} circuit closed, upstream recovered")
+        for listener in self._listeners:
+            listener(self, old_state, state)
+
+    def snapshot(self) -> dict:
+        """Summary suitable for a health endpoint."""
+        snapshot = {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected
+        }
+        if self.state == OPEN:
+            snapshot["next_probe_in_seconds"] = round(max(0.0, self.opened_at + self.reset_timeout - time.monotonic()), 1)
+        return snapshot
+
+
+# One breaker per upstream, shared by every service instance in the process
+circuit_breakers = {name: CircuitBreaker(name) for name in ("gemini", "perplexity", "mongodb")}
+
+
+def get_circuit_breaker(upstream: str):
+    """The breaker guarding an upstream, or None if it has none."""
+    return circuit_breakers.get(upstream)
+
+
+def counts_as_failure(error: Exception) -> bool:
+    """
+    Whether an error says the upstream is unhealthy. Client errors (bad
+    request, not found, a MongoDB duplicate key) are the caller's fault and
+    don't trip the breaker; rate limiting does.
+    """
+    return classify_error(error) != CLIENT
@@ -0,0 +1,173 @@
+"""
+Near-duplicate claim detection with MinHash and locality-sensitive hashing.
+
+A claim is reduced to its normalized content words, in order ("Mt.
+Everest is the world's tallest mountain" -> mount, everest, world,
+tallest, mountain), and those to word bigrams with start and end markers
+("^ mount", "mount everest", ..., "mountain $"). The MinHash signature of
+the bigrams is cut into LSH bands; claims sharing any band hash are
+candidates. A candidate matches when the Jaccard similarity of the word
+sets reaches the threshold and the words both claims use appear in the
+same order. Numbers and negations must match exactly, so "Everest is not
+the tallest" never matches "Everest is the tallest", and swapping roles
+("France is larger than Germany" / "Germany is larger than France")
+never matches however many words are shared.
+
+Everything is computed locally; hashes are seeded so every process
+produces the same band hashes for the same claim.
+"""
+from app.core.config import SIMILARITY_THRESHOLD
+import hashlib
+import random
+import re
+
+# 21 bands of 3 rows (63 of the 64 permutations): claims whose bigram sets
+# have Jaccard similarity 0.5 share a band about 94% of the time, at 0.1
+# about 3%. Rewording one word of a short claim changes two bigrams, so
+# bigram similarity runs well below word similarity.
+NUM_PERMUTATIONS = 64
+BANDS = 21
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+# Claims with fewer content words than this are too short to match safely
+# (n words make n + 1 bigrams)
+MIN_SHINGLES = 4
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+_STOPWORDS = frozenset(
+    "a an the is are was were be been being am do does did has have had of in on at to for from "
+    "that this these those it its and or but by with as than then so such there their they he she "
+    "his her we our you your i me my".split()
+)
+_NEGATIONS = frozenset("not no never none nobody nothing neither nor without".split())
+_ABBREVIATIONS = {"mt": "mount", "mtn": "mountain", "govt": "government", "approx": "approximately", "intl": "international"}
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    """Drop a plural 's' so "mountains" and "mountain" are the same word."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss") and not token.isdigit():
+        return token[:-1]
+    return token
+
+
+def tokens(claim_text: str) -> list:
+    """
+    Normalized content words of a claim, in order.
+
+    Args:
+        claim_text (str): Claim as submitted
+
+    Returns:
+        list: Words with stopwords removed, plurals folded and abbreviations expanded
+    """
+    text = claim_text.lower().replace("’", "'")
+    text = text.replace("n't", " not").replace("cannot", "can not").replace("'s", "")
+    words = []
+    for token in _TOKEN.findall(text):
+        token = _ABBREVIATIONS.get(token, token)
+        if token not in _STOPWORDS:
+            words.append(_stem(token))
+    return words
+
+
+def shingles(words: list) -> list:
+    """
+    Word bigrams of a claim with start and end markers, sorted.
+
+    Args:
+        words (list): tokens() of the claim
+
+    Returns:
+        list: Distinct bigrams, e.g. ["^ mount", "everest tallest", "mount everest", ...]
+    """
+    marked = ["^"] + list(words) + ["$"]
+    return sorted({f"{first} {second}" for first, second in zip(marked, marked[1:])})
+
+
+def _guard_words(words) -> frozenset:
+    """Words that must match exactly for two claims to be the same claim."""
+    return frozenset(word for word in words if word in _NEGATIONS or word.isdigit())
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+
+
+def lsh_bands(claim_shingles: list) -> list:
+    """
+    LSH band hashes of a claim's MinHash signature.
+
+    Args:
+        claim_shingles (list): shingles() of the claim
+
+    Returns:
+        list: BANDS strings "band:hash", or [] if the claim is too short to match
+    """
+    if len(claim_shingles) < MIN_SHINGLES:
+        return []
+    hashes = [_token_hash(shingle) for shingle in claim_shingles]
+    signature = [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+    bands = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(repr(rows).encode(), digest_size=8).hexdigest()
+        bands.append(f"{band}:{digest}")
+    return bands
+
+
+def _shared_in_order(words: list, shared: set) -> list:
+    """The shared content words of a claim in the order they first appear, guard words aside."""
+    ordered = []
+    for word in words:
+        if word in shared and word not in ordered and word not in _NEGATIONS and not word.isdigit():
+            ordered.append(word)
+    return ordered
+
+
+def similarity(words: list, other_words: list) -> float:
+    """
+    Jaccard similarity of two claims' word sets, or 0.0 if their numbers
+    or negations differ or their shared words appear in a different order.
+
+    Args:
+        words (list): tokens() of one claim
+        other_words (list): tokens() of the other
+    """
+    word_set, other_set = set(words), set(other_words)
+    if not word_set or not other_set or _guard_words(word_set) != _guard_words(other_set):
+        return 0.0
+    shared = word_set & other_set
+    if _shared_in_order(words, shared) != _shared_in_order(other_words, shared):
+        return 0.0
+    return len(shared) / len(word_set | other_set)
+
+
+def best_match(words: list, candidates: list, threshold: float = None):
+    """
+    The most similar candidate document at or above `threshold`.
+
+    Args:
+        words (list): tokens() of the claim being looked up
+        candidates (list): Claim documents with a "tokens" field
+        threshold (float): Minimum similarity (defaults to SIMILARITY_THRESHOLD)
+
+    Returns:
+        tuple: (document, similarity), or (None, best similarity seen)
+    """
+    if threshold is None:
+        threshold = SIMILARITY_THRESHOLD
+    best, best_score = None, 0.0
+    for candidate in candidates:
+        score = similarity(words, candidate.get("tokens") or [])
+        if score > best_score:
+            best, best_score = candidate, score
+    if best_score >= threshold:
+        return best, best_score
+    return None, best_score
@@ -0,0 +1,112 @@
+"""
+Process-wide upstream clients.
+
+Every service shares one Gemini client and one Perplexity HTTP session
+(per event loop, see LoopLocal), so connections and TLS sessions are
+pooled across services instead of each service opening its own.
+"""
+from app.core.config import (
+    GEMINI_API_KEY, GEMINI_MODEL, GEMINI_MAX_CONNECTIONS, GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+    PERPLEXITY_API_KEY, PERPLEXITY_MAX_CONNECTIONS, PERPLEXITY_MAX_KEEPALIVE_CONNECTIONS, PERPLEXITY_HTTP2,
+    UPSTREAM_KEEPALIVE_EXPIRY_SECONDS, PREWARM_CONNECTIONS
+)
+from app.core.async_utils import LoopLocal
+from google import genai
+from google.genai import types
+import asyncio
+import httpx
+import time
+
+try:
+    import h2  # noqa: F401  (optional: enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+PERPLEXITY_ORIGIN = "https://api.perplexity.ai"
+
+# Default request timeout for the Perplexity session; calls shorten it to their budget
+PERPLEXITY_TIMEOUT_SECONDS = 30
+
+# Cap on each pre-warm request, so a slow upstream can't hold up startup
+PREWARM_TIMEOUT_SECONDS = 5
+
+
+def _create_gemini_client():
+    limits = httpx.Limits(
+        max_connections=GEMINI_MAX_CONNECTIONS,
+        max_keepalive_connections=GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY_SECONDS
+    )
+    return genai.Client(
+        api_key=GEMINI_API_KEY,
+        http_options=types.HttpOptions(async_client_args={"limits": limits})
+    ).aio
+
+
+def _create_perplexity_client():
+    limits = httpx.Limits(
+        max_connections=PERPLEXITY_MAX_CONNECTIONS,
+        max_keepalive_connections=PERPLEXITY_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY_SECONDS
+    )
+    return httpx.AsyncClient(
+        base_url=PERPLEXITY_ORIGIN,
+        timeout=PERPLEXITY_TIMEOUT_SECONDS,
+        limits=limits,
+        http2=PERPLEXITY_HTTP2 and HTTP2_AVAILABLE
+    )
+
+
+_gemini_clients = LoopLocal(_create_gemini_client)
+_perplexity_clients = LoopLocal(_create_perplexity_client)
+
+
+def gemini_client():
+    """Async Gemini client shared by all services on the running event loop."""
+    return _gemini_clients.get()
+
+
+def perplexity_client() -> httpx.AsyncClient:
+    """Pooled Perplexity HTTP session shared by all services on the running event loop."""
+    return _perplexity_clients.get()
+
+
+async def warm_up():
+    """
+    Open PREWARM_CONNECTIONS connections to each configured upstream, so
+    the TLS handshakes happen at startup. Failures are logged and ignored;
+    the pools fill lazily instead.
+    """
+    if PREWARM_CONNECTIONS <= 0:
+        return
+
+    async def warm(name: str, request):
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *[asyncio.wait_for(request(), PREWARM_TIMEOUT_SECONDS) for _ in range(PREWARM_CONNECTIONS)],
+            return_exceptions=True
+        )
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures:
+            print(f"[CLIENTS] Could not pre-warm {name}: {failures[0]!r}")
+        else:
+            print(f"[CLIENTS] Pre-warmed {PREWARM_CONNECTIONS} {name} connections in {time.perf_counter() - started:.2f}s")
+
+    tasks = []
+    if GEMINI_API_KEY:
+        tasks.append(warm("Gemini", lambda: gemini_client().models.get(model=GEMINI_MODEL)))
+    if PERPLEXITY_API_KEY:
+        # Any response will do: the point is the connection, not the answer
+        tasks.append(warm("Perplexity", lambda: perplexity_client().head("/")))
+    await asyncio.gather(*tasks)
+
+
+async def close_clients():
+    """Close the running loop's pooled connections."""
+    perplexity = _perplexity_clients.pop()
+    if perplexity is not None:
+        await perplexity.aclose()
+    gemini = _gemini_clients.pop()
+    if gemini is not None:
+        await gemini.aclose()
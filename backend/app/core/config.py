@@ -17,6 +17,174 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # Perplexity API Configuration
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
 
+# Speculative research: start Perplexity on a locally built query while
+# the claim is being structured, and keep it if the structured query is close enough
+SPECULATIVE_RESEARCH = os.getenv("SPECULATIVE_RESEARCH", "false").lower() == "true"
+SPECULATION_DIVERGENCE_THRESHOLD = float(os.getenv("SPECULATION_DIVERGENCE_THRESHOLD", "0.5"))
+
+# Identical claims submitted concurrently share one pipeline run; followers
+# stop waiting on the leader after this many seconds and run it themselves
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "120"))
+
+# Request tracing: "none", "json" (append traces to TRACE_FILE_PATH) or
+# "otlp" (POST OTLP/JSON to OTLP_TRACES_ENDPOINT)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "traces.jsonl")
+OTLP_TRACES_ENDPOINT = os.getenv("OTLP_TRACES_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "fact-checker-api")
+
+# Per-request latency budgets (seconds). Clients may ask for a different
+# budget with the X-Request-Timeout header, clamped to [MIN, MAX].
+DEADLINE_TEXT_SECONDS = float(os.getenv("DEADLINE_TEXT_SECONDS", "60"))
+DEADLINE_MULTIMODAL_SECONDS = float(os.getenv("DEADLINE_MULTIMODAL_SECONDS", "180"))
+DEADLINE_URL_SECONDS = float(os.getenv("DEADLINE_URL_SECONDS", "90"))
+DEADLINE_MIN_SECONDS = float(os.getenv("DEADLINE_MIN_SECONDS", "5"))
+DEADLINE_MAX_SECONDS = float(os.getenv("DEADLINE_MAX_SECONDS", "300"))
+
+# Upper bound for a single Gemini call, before the request budget is applied
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+
+# Fair scheduling of pipeline runs: SCHEDULER_CONCURRENCY slots per process,
+# served by priority lane (text, then URL, then multimodal) and round robin
+# between users within a lane. URL and multimodal runs may hold at most
+# their own number of slots, which keeps headroom for text checks.
+SCHEDULER_CONCURRENCY = int(os.getenv("SCHEDULER_CONCURRENCY", "32"))
+SCHEDULER_URL_SLOTS = int(os.getenv("SCHEDULER_URL_SLOTS", "16"))
+SCHEDULER_MULTIMODAL_SLOTS = int(os.getenv("SCHEDULER_MULTIMODAL_SLOTS", "8"))
+SCHEDULER_LANE_LIMITS = [
+    ("text", SCHEDULER_CONCURRENCY),
+    ("url", SCHEDULER_URL_SLOTS),
+    ("multimodal", SCHEDULER_MULTIMODAL_SLOTS)
+]
+# A heavy lane whose oldest queued run has waited this long is served ahead
+# of higher-priority heavy lanes, so steady URL traffic can't starve
+# multimodal checks. Queued text checks always go first.
+SCHEDULER_LANE_MAX_WAIT_SECONDS = float(os.getenv("SCHEDULER_LANE_MAX_WAIT_SECONDS", "5"))
+
+# Admission control: once pipeline runs in flight (running + queued), the
+# oldest queued run's wait, or the Gemini/Perplexity error rate over the last
+# ADMISSION_ERROR_WINDOW_SECONDS pass these limits, new non-cached requests
+# get 503 with Retry-After (cache hits are still served)
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "96"))
+ADMISSION_MAX_QUEUE_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_QUEUE_WAIT_SECONDS", "10"))
+ADMISSION_MAX_ERROR_RATE = float(os.getenv("ADMISSION_MAX_ERROR_RATE", "0.5"))
+ADMISSION_MIN_UPSTREAM_CALLS = int(os.getenv("ADMISSION_MIN_UPSTREAM_CALLS", "10"))
+ADMISSION_ERROR_WINDOW_SECONDS = float(os.getenv("ADMISSION_ERROR_WINDOW_SECONDS", "30"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "5"))
+
+# Circuit breakers (Gemini, Perplexity, MongoDB): open after this many
+# consecutive failures, fail fast to the fallbacks for the reset timeout,
+# then let a limited number of probe calls through
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT_SECONDS = float(os.getenv("CIRCUIT_RESET_TIMEOUT_SECONDS", "30"))
+CIRCUIT_HALF_OPEN_MAX_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", "1"))
+
+# Adaptive concurrency (AIMD) per Gemini/Perplexity model: the limit grows
+# while latency stays flat and is cut on 429/503 responses or rising latency
+ADAPTIVE_CONCURRENCY = os.getenv("ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+LIMITER_INITIAL_CONCURRENCY = int(os.getenv("LIMITER_INITIAL_CONCURRENCY", "8"))
+LIMITER_MIN_CONCURRENCY = int(os.getenv("LIMITER_MIN_CONCURRENCY", "1"))
+LIMITER_MAX_CONCURRENCY = int(os.getenv("LIMITER_MAX_CONCURRENCY", "64"))
+LIMITER_LATENCY_TOLERANCE = float(os.getenv("LIMITER_LATENCY_TOLERANCE", "2.0"))
+LIMITER_BACKOFF_RATIO = float(os.getenv("LIMITER_BACKOFF_RATIO", "0.7"))
+
+# Upstream retries: attempts per call, decorrelated-jitter backoff bounds,
+# and a retry budget capping retries at a fraction of calls per upstream
+# over a sliding window so retries can't amplify an outage
+UPSTREAM_MAX_ATTEMPTS = int(os.getenv("UPSTREAM_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.5"))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "8"))
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+RETRY_BUDGET_MIN_RETRIES = int(os.getenv("RETRY_BUDGET_MIN_RETRIES", "3"))
+RETRY_BUDGET_WINDOW_SECONDS = float(os.getenv("RETRY_BUDGET_WINDOW_SECONDS", "10"))
+
+# Shared upstream clients: connection pool sizes for the process-wide Gemini
+# client and Perplexity session, and connections opened at startup so the
+# first requests don't pay for TLS handshakes (0 disables pre-warming)
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "64"))
+GEMINI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GEMINI_MAX_KEEPALIVE_CONNECTIONS", "32"))
+PERPLEXITY_MAX_CONNECTIONS = int(os.getenv("PERPLEXITY_MAX_CONNECTIONS", "32"))
+PERPLEXITY_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("PERPLEXITY_MAX_KEEPALIVE_CONNECTIONS", "16"))
+# Use HTTP/2 for Perplexity when the optional h2 package is installed
+PERPLEXITY_HTTP2 = os.getenv("PERPLEXITY_HTTP2", "true").lower() == "true"
+UPSTREAM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY_SECONDS", "60"))
+PREWARM_CONNECTIONS = int(os.getenv("PREWARM_CONNECTIONS", "2"))
+
+# Perplexity streaming: read research as server-sent events, parsing the
+# SUMMARY/FINDINGS/SOURCES sections as they arrive. With early return the
+# stream is closed once the findings are complete and citations are known,
+# so the verdict can start while Perplexity would still be listing sources
+PERPLEXITY_STREAMING = os.getenv("PERPLEXITY_STREAMING", "true").lower() == "true"
+PERPLEXITY_EARLY_RETURN = os.getenv("PERPLEXITY_EARLY_RETURN", "true").lower() == "true"
+
+# In-process response cache in front of MongoDB claim lookups: entry and
+# memory caps (least recently used entries are evicted first) and how long
+# an entry is served before it is read from the database again (0 disables)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600"))
+
+# Near-duplicate claim cache: a claim whose content words overlap a stored
+# claim's by at least SIMILARITY_THRESHOLD (Jaccard similarity, with
+# numbers and negations matching exactly) gets that claim's verdict
+SIMILARITY_CACHE = os.getenv("SIMILARITY_CACHE", "true").lower() == "true"
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.8"))
+
+# Canonical claim cache: after structuring, look for a stored claim that
+# structured to the same claim, entities and time period before paying for
+# research and the verdict
+CANONICAL_CACHE = os.getenv("CANONICAL_CACHE", "true").lower() == "true"
+
+# Freshness of cached verdicts: TTL per claim category (see
+# app/core/freshness.py). A verdict past its TTL is served flagged "stale"
+# while a background refresh re-checks it; past CACHE_MAX_STALE_FACTOR times
+# its TTL it is not served at all
+CACHE_TTL_VOLATILE_SECONDS = float(os.getenv("CACHE_TTL_VOLATILE_SECONDS", str(24 * 3600)))
+CACHE_TTL_RECENT_SECONDS = float(os.getenv("CACHE_TTL_RECENT_SECONDS", str(7 * 24 * 3600)))
+CACHE_TTL_GENERAL_SECONDS = float(os.getenv("CACHE_TTL_GENERAL_SECONDS", str(90 * 24 * 3600)))
+CACHE_TTL_HISTORICAL_SECONDS = float(os.getenv("CACHE_TTL_HISTORICAL_SECONDS", str(365 * 24 * 3600)))
+CACHE_MAX_STALE_FACTOR = float(os.getenv("CACHE_MAX_STALE_FACTOR", "4"))
+
+# Negative cache of failed research (see app/core/negative_cache.py): a
+# search query or claim whose research just failed is answered degraded for
+# NEGATIVE_CACHE_TTL_SECONDS, +/- NEGATIVE_CACHE_JITTER of it, instead of
+# calling Perplexity again (0 disables)
+NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("NEGATIVE_CACHE_TTL_SECONDS", "30"))
+NEGATIVE_CACHE_JITTER = float(os.getenv("NEGATIVE_CACHE_JITTER", "0.2"))
+NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "10000"))
+
+# Create missing MongoDB indexes and apply pending data migrations (see
+# app/schema.py) in the background when the API starts
+SCHEMA_MIGRATE_ON_STARTUP = os.getenv("SCHEMA_MIGRATE_ON_STARTUP", "true").lower() == "true"
+
+# Batch claim checks: largest accepted batch, and how many claims that
+# missed the cache run through the pipeline at the same time
+BATCH_MAX_CLAIMS = int(os.getenv("BATCH_MAX_CLAIMS", "200"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "5"))
+
+# Background jobs (POST /api/jobs/*). Jobs live in MongoDB, so any worker
+# can run them and they survive restarts. A worker holds a job for
+# JOB_VISIBILITY_TIMEOUT_SECONDS at a time (renewed while it runs); failed
+# attempts are retried with exponential backoff up to JOB_MAX_ATTEMPTS
+# times, then dead-lettered.
+JOB_WORKERS_IN_API = os.getenv("JOB_WORKERS_IN_API", "true").lower() == "true"
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_VISIBILITY_TIMEOUT_SECONDS = float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "120"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+JOB_DEADLINE_SECONDS = float(os.getenv("JOB_DEADLINE_SECONDS", "600"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+
+# Job workers (in the API or `python -m app.worker`) publish a heartbeat with
+# their capacity; a worker silent for WORKER_HEARTBEAT_TTL_SECONDS is considered
+# gone. Job submissions are refused once more than JOB_BACKLOG_PER_SLOT jobs
+# per live worker slot are waiting.
+WORKER_HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("WORKER_HEARTBEAT_INTERVAL_SECONDS", "5"))
+WORKER_HEARTBEAT_TTL_SECONDS = float(os.getenv("WORKER_HEARTBEAT_TTL_SECONDS", "20"))
+JOB_BACKLOG_PER_SLOT = int(os.getenv("JOB_BACKLOG_PER_SLOT", "10"))
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
 # Server Configuration
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 BACKEND_PORT = int(os.getenv("BACKEND_PORT", "8000"))
@@ -1,6 +1,8 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, AsyncMongoClient
+from gridfs import AsyncGridFSBucket
 from pymongo.errors import ConnectionFailure
 from dotenv import load_dotenv
+from app.core.async_utils import LoopLocal
 import os
 
 # Load environment variables from .env file
@@ -8,10 +10,11 @@ load_dotenv()
 
 # Get MongoDB URI from environment variables
 MONGO_URI = os.getenv("MONGO_URI")
+DATABASE_NAME = "factchecker_db"
 
 # Connect to MongoDB client
 client = MongoClient(MONGO_URI)
-db = client["factchecker_db"]  # Specify database name for MongoDB Atlas
+db = client[DATABASE_NAME]  # Specify database name for MongoDB Atlas
 
 # Check MongoDB connection
 try:
@@ -23,3 +26,31 @@ except ConnectionFailure:
 # Collections
 claims_collection = db["claims"]
 users_collection = db["users"]
+
+# Async client for the fact-check pipeline (one per event loop)
+_async_clients = LoopLocal(lambda: AsyncMongoClient(MONGO_URI))
+
+
+def get_async_db():
+    """Get the async database handle bound to the running event loop."""
+    return _async_clients.get()[DATABASE_NAME]
+
+
+def get_async_claims_collection():
+    """Get the async claims collection bound to the running event loop."""
+    return get_async_db()["claims"]
+
+
+def get_async_jobs_collection():
+    """Get the async background jobs collection bound to the running event loop."""
+    return get_async_db()["jobs"]
+
+
+def get_async_workers_collection():
+    """Get the async collection where job workers publish heartbeats."""
+    return get_async_db()["workers"]
+
+
+def get_async_media_bucket():
+    """Get the GridFS bucket holding media files uploaded for background jobs."""
+    return AsyncGridFSBucket(get_async_db(), bucket_name="job_media")
@@ -0,0 +1,115 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import time
+
+# Absolute deadline (time.monotonic() value) of the request being served.
+# None means no deadline, e.g. when called from scripts via the sync wrappers.
+_current_deadline = ContextVar("current_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage cannot finish within the request's remaining budget."""
+
+
+class StageTimeout(TimeoutError):
+    """
+    Raised when an operation outlives its own timeout cap while the request
+    still has budget left: the upstream hung, which is its fault, so it is
+    classified as a timeout, retried and counted against its circuit.
+    """
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Give everything inside the block (including spawned tasks) a deadline."""
+    token = _current_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+def remaining():
+    """Seconds left before the deadline, or None if there is no deadline."""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def budget(cap: float = None):
+    """
+    Timeout to use for the next operation: the stage's own cap, shortened to
+    whatever is left of the request budget.
+
+    Args:
+        cap (float): The stage's own timeout, or None for no cap
+
+    Returns:
+        float or None: Seconds, or None if neither a cap nor a deadline applies
+    """
+    left = remaining()
+    if left is None:
+        return cap
+    if cap is None:
+        return left
+    return min(cap, left)
+
+
+def allows(seconds: float) -> bool:
+    """Whether at least `seconds` of budget remain (always True without a deadline)."""
+    left = remaining()
+    return left is None or left > seconds
+
+
+async def run_within_deadline(awaitable, cap: float = None):
+    """
+    Await an operation, cancelling it if it outlives its budget.
+
+    Args:
+        awaitable: Coroutine to run
+        cap (float): The stage's own timeout, if any
+
+    Returns:
+        The operation's result
+
+    Raises:
+        DeadlineExceeded: If the request budget is already spent or runs out
+        StageTimeout: If the cap runs out first
+    """
+    left = remaining()
+    timeout = budget(cap)
+    if timeout is not None and timeout <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("No time budget left for this stage")
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError:
+        if left is not None and (cap is None or left <= cap):
+            raise DeadlineExceeded(f"Stage did not finish within its {timeout:.1f}s budget")
+        raise StageTimeout(f"Stage did not finish within its {timeout:.1f}s timeout")
+
+
+def resolve_request_timeout(default_seconds: float, requested, min_seconds: float, max_seconds: float) -> float:
+    """
+    Pick the request budget: the endpoint default, or the client's requested
+    timeout clamped to the allowed range.
+
+    Args:
+        default_seconds (float): Endpoint default
+        requested: Value of the client's X-Request-Timeout header (may be None or invalid)
+        min_seconds (float): Smallest budget a client may ask for
+        max_seconds (float): Largest budget a client may ask for
+
+    Returns:
+        float: Budget in seconds
+    """
+    if requested is None:
+        return default_seconds
+    try:
+        seconds = float(requested)
+    except (TypeError, ValueError):
+        return default_seconds
+    return max(min_seconds, min(max_seconds, seconds))
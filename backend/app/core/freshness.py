@@ -0,0 +1,135 @@
+"""
+How long a cached verdict stays trustworthy.
+
+Each stored claim gets a category from its text and structured time
+period, and each category a TTL. Within the TTL a verdict is fresh. Up to
+CACHE_MAX_STALE_FACTOR times the TTL it is stale: still served, flagged
+`stale`, while a background refresh re-checks it. Beyond that it is
+expired and the claim is checked again before answering.
+"""
+from app.core.config import (
+    CACHE_TTL_VOLATILE_SECONDS, CACHE_TTL_RECENT_SECONDS, CACHE_TTL_GENERAL_SECONDS,
+    CACHE_TTL_HISTORICAL_SECONDS, CACHE_MAX_STALE_FACTOR
+)
+from datetime import datetime
+import re
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+# Claim categories, most to least time-sensitive
+VOLATILE = "volatile"      # "current inflation", prices, polls, who holds an office now
+RECENT = "recent"          # about this year or last year, or a prediction
+GENERAL = "general"        # no time reference: science, geography, definitions
+HISTORICAL = "historical"  # about a year that is over
+
+CATEGORY_TTLS = {
+    VOLATILE: CACHE_TTL_VOLATILE_SECONDS,
+    RECENT: CACHE_TTL_RECENT_SECONDS,
+    GENERAL: CACHE_TTL_GENERAL_SECONDS,
+    HISTORICAL: CACHE_TTL_HISTORICAL_SECONDS
+}
+
+# Phrases that tie a claim to the present. Bare words like "live", "now"
+# or "current" are not enough: "Humans live on Earth".
+_PRESENT_PATTERN = re.compile(
+    r"\b(currently|right now|as of (now|today|this week)|at the moment|at present|this week|"
+    r"current (president|prime minister|chancellor|leader|ceo|champion|record holder|price|rate|rankings?|polls?)|"
+    r"live (scores?|results?|coverage)|breaking news)\b"
+)
+# Topics whose figures move all the time, unless the claim is about a year that is over
+_VOLATILE_TOPIC_PATTERN = re.compile(
+    r"\b((share|stock|gas|fuel|oil|gold|bitcoin|house|housing) prices?|"
+    r"(interest|exchange|inflation|unemployment|mortgage) rates?|"
+    r"(opinion|latest|new) polls?|polling (lead|average|numbers)|approval ratings?|weather forecast)\b"
+)
+# Words for such topics, only volatile when the claim also quotes a figure or "now"
+_VOLATILE_WORD_PATTERN = re.compile(
+    r"\b(prices?|stocks?|inflation|unemployment|polls?|polling|rankings?|ranked|scores?|weather|forecast)\b"
+)
+_CURRENT_FIGURE_PATTERN = re.compile(
+    r"[$€£¥%]|\b\d+(\.\d+)?\s*(percent|per cent|points?|dollars?|euros?)\b|\b(now|latest|ongoing|so far)\b"
+)
+# time_period values the structuring step uses for "the present"
+_PRESENT_PERIODS = ("now", "current", "present", "today")
+_RECENT_PATTERN = re.compile(
+    r"\b(this year|last year|this month|last month|next year|next month|upcoming|recently|soon|will|"
+    r"plans? to|expected to)\b"
+)
+_YEAR_PATTERN = re.compile(r"\b(1[5-9][0-9]{2}|20[0-9]{2})\b")
+
+
+def classify_claim(claim_text: str, structured_data: dict = None, now: datetime = None) -> str:
+    """
+    Category of a claim for its cache TTL.
+
+    Args:
+        claim_text (str): Claim as submitted
+        structured_data (dict): Structured claim, for its claim text and time_period
+
+    Returns:
+        str: VOLATILE, RECENT, GENERAL or HISTORICAL
+    """
+    structured_data = structured_data or {}
+    time_period = str(structured_data.get("time_period") or "").lower()
+    text = f"{claim_text} {structured_data.get('claim') or ''} {time_period}".lower()
+
+    if time_period.strip() in _PRESENT_PERIODS or _PRESENT_PATTERN.search(text):
+        return VOLATILE
+    years = [int(year) for year in _YEAR_PATTERN.findall(f"{time_period} {text}")]
+    current_year = (now or datetime.utcnow()).year
+    if years and max(years) < current_year - 1:
+        # "Stock prices fell 50% in 2008" doesn't change any more
+        return HISTORICAL
+    if _VOLATILE_TOPIC_PATTERN.search(text) or (
+            _VOLATILE_WORD_PATTERN.search(text) and _CURRENT_FIGURE_PATTERN.search(text)):
+        return VOLATILE
+    if years:
+        return RECENT
+    if _RECENT_PATTERN.search(text):
+        return RECENT
+    return GENERAL
+
+
+class Freshness:
+    __slots__ = ("state", "category", "ttl_seconds", "age_seconds")
+
+    def __init__(self, state: str, category: str, ttl_seconds: float, age_seconds: float):
+        self.state = state
+        self.category = category
+        self.ttl_seconds = ttl_seconds
+        self.age_seconds = age_seconds
+
+    @property
+    def fresh_for(self) -> float:
+        """Seconds until the verdict goes stale."""
+        return max(0.0, self.ttl_seconds - self.age_seconds)
+
+
+def freshness(claim_doc: dict, now: datetime = None) -> Freshness:
+    """
+    Whether a stored claim's verdict is fresh, stale or expired.
+
+    Args:
+        claim_doc (dict): Claim document from the claims collection
+
+    Returns:
+        Freshness: State, category, TTL and age of the verdict
+    """
+    now = now or datetime.utcnow()
+    category = classify_claim(claim_doc.get("prompt") or "", claim_doc.get("structured_data"), now)
+    ttl = CATEGORY_TTLS[category]
+    checked_at = claim_doc.get("updated_at") or claim_doc.get("created_at")
+    if checked_at is None:
+        # Unknown age: serve it, but re-check it
+        return Freshness(STALE, category, ttl, ttl)
+
+    age = (now - checked_at.replace(tzinfo=None)).total_seconds()
+    if age < ttl:
+        state = FRESH
+    elif age < ttl * CACHE_MAX_STALE_FACTOR:
+        state = STALE
+    else:
+        state = EXPIRED
+    return Freshness(state, category, ttl, age)
@@ -0,0 +1,183 @@
+"""
+Single-shot Gemini calls.
+
+Every LLM call site goes through GeminiGateway instead of opening a chat
+session for one message. Each call site has its own generation config
+(output token cap, temperature, response schema), and every call records
+its request size and token usage per call site.
+"""
+from app.core.config import GEMINI_MODEL, GEMINI_TIMEOUT_SECONDS, UPSTREAM_MAX_ATTEMPTS
+from app.core.clients import gemini_client
+from app.core.metrics import GEMINI_REQUEST_CHARS, GEMINI_TOKENS, GEMINI_CALL_TOKENS
+from app.core.tracing import set_span_attributes
+from app.core.upstream_client import call_upstream
+from google.genai import types
+
+STRUCTURED_CLAIM_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "task": {"type": "STRING"},
+        "claim": {"type": "STRING"},
+        "context": {"type": "STRING"},
+        "entities": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "time_period": {"type": "STRING"},
+        "output_format": {"type": "STRING"}
+    },
+    "required": ["claim"]
+}
+
+# Generation config per call site. Output caps sit well above what each
+# prompt's answer format needs; they only stop runaway generations.
+GENERATION_CONFIGS = {
+    "structure_claim": {
+        "max_output_tokens": 1024, "temperature": 0.0,
+        "response_mime_type": "application/json", "response_schema": STRUCTURED_CLAIM_SCHEMA
+    },
+    "generate_verdict": {"max_output_tokens": 2048, "temperature": 0.2},
+    "quick_check": {"max_output_tokens": 1024, "temperature": 0.2},
+    "extract_main_claim": {"max_output_tokens": 512, "temperature": 0.0},
+    "extract_image": {"max_output_tokens": 2048, "temperature": 0.0},
+    "extract_video": {"max_output_tokens": 4096, "temperature": 0.0},
+    "extract_audio": {"max_output_tokens": 8192, "temperature": 0.0},
+    "moderate_input": {"max_output_tokens": 32, "temperature": 0.0}
+}
+
+
+def _request_chars(contents) -> int:
+    """Characters of text in the request; media parts are counted by their tokens instead."""
+    if isinstance(contents, str):
+        return len(contents)
+    return sum(len(part) for part in contents if isinstance(part, str))
+
+
+class _CallSiteStats:
+    __slots__ = ("calls", "request_chars", "prompt_tokens", "output_tokens")
+
+    def __init__(self):
+        self.calls = 0
+        self.request_chars = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+
+class GeminiGateway:
+    """Stateless generate / generate_stream over the shared Gemini client."""
+
+    def __init__(self, default_model: str = GEMINI_MODEL):
+        self.default_model = default_model
+        self._stats = {}
+
+    async def generate(self, call_site: str, contents, model: str = None,
+                       max_attempts: int = UPSTREAM_MAX_ATTEMPTS, min_budget: float = 0.0) -> str:
+        """
+        Generate a complete response.
+
+        Args:
+            call_site (str): Key into GENERATION_CONFIGS; also the metrics/span operation
+            contents: Prompt string, or a list of prompt parts (text, images, uploaded files)
+            model (str): Model to use (defaults to GEMINI_MODEL)
+            max_attempts (int): Attempts when Gemini is overloaded or unreachable
+            min_budget (float): Request budget an attempt needs to be worth starting
+
+        Returns:
+            str: Response text ("" if the model returned none)
+        """
+        model = model or self.default_model
+
+        async def send():
+            response = await gemini_client().models.generate_content(
+                model=model, contents=contents, config=self._config(call_site)
+            )
+            text = response.text or ""
+            self._record(call_site, contents, getattr(response, "usage_metadata", None), len(text))
+            return text
+
+        return await call_upstream(
+            "gemini", call_site, send, model=model, timeout=GEMINI_TIMEOUT_SECONDS,
+            max_attempts=max_attempts, min_budget=min_budget
+        )
+
+    async def generate_stream(self, call_site: str, contents, on_text, on_reset=None, model: str = None,
+                              max_attempts: int = UPSTREAM_MAX_ATTEMPTS, min_budget: float = 0.0) -> str:
+        """
+        Generate a response, passing each chunk to `on_text` as it arrives.
+
+        Args:
+            call_site (str): Key into GENERATION_CONFIGS
+            contents: Prompt string or list of prompt parts
+            on_text: Async callback(text) for each chunk
+            on_reset: Async callback() run before a retry if chunks were already delivered
+            model (str): Model to use (defaults to GEMINI_MODEL)
+            max_attempts (int): Attempts when Gemini is overloaded or unreachable
+            min_budget (float): Request budget an attempt needs to be worth starting
+
+        Returns:
+            str: Full response text
+        """
+        model = model or self.default_model
+
+        async def send():
+            text = ""
+            usage = None
+            try:
+                stream = await gemini_client().models.generate_content_stream(
+                    model=model, contents=contents, config=self._config(call_site)
+                )
+                async for chunk in stream:
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    if chunk.text:
+                        text += chunk.text
+                        await on_text(chunk.text)
+            except Exception:
+                if text and on_reset is not None:
+                    await on_reset()
+                raise
+            self._record(call_site, contents, usage, len(text))
+            return text
+
+        return await call_upstream(
+            "gemini", call_site, send, model=model, timeout=GEMINI_TIMEOUT_SECONDS,
+            max_attempts=max_attempts, min_budget=min_budget
+        )
+
+    def _config(self, call_site: str) -> types.GenerateContentConfig:
+        return types.GenerateContentConfig(**GENERATION_CONFIGS.get(call_site, {}))
+
+    def _record(self, call_site: str, contents, usage, response_chars: int):
+        request_chars = _request_chars(contents)
+        prompt_tokens = (getattr(usage, "prompt_token_count", None) or 0) if usage else 0
+        output_tokens = (getattr(usage, "candidates_token_count", None) or 0) if usage else 0
+
+        GEMINI_REQUEST_CHARS.labels(call_site).observe(request_chars)
+        GEMINI_TOKENS.labels(call_site, "prompt").inc(prompt_tokens)
+        GEMINI_TOKENS.labels(call_site, "output").inc(output_tokens)
+        GEMINI_CALL_TOKENS.labels(call_site).observe(prompt_tokens + output_tokens)
+        set_span_attributes(
+            prompt_chars=request_chars, response_chars=response_chars,
+            prompt_tokens=prompt_tokens, output_tokens=output_tokens
+        )
+
+        stats = self._stats.get(call_site)
+        if stats is None:
+            stats = self._stats[call_site] = _CallSiteStats()
+        stats.calls += 1
+        stats.request_chars += request_chars
+        stats.prompt_tokens += prompt_tokens
+        stats.output_tokens += output_tokens
+
+    def snapshot(self) -> dict:
+        """Token spend per call site, for a stats endpoint."""
+        return {
+            call_site: {
+                "calls": stats.calls,
+                "prompt_tokens": stats.prompt_tokens,
+                "output_tokens": stats.output_tokens,
+                "avg_request_chars": round(stats.request_chars / stats.calls),
+                "avg_prompt_tokens": round(stats.prompt_tokens / stats.calls),
+                "avg_output_tokens": round(stats.output_tokens / stats.calls)
+            }
+            for call_site, stats in self._stats.items()
+        }
+
+
+gemini_gateway = GeminiGateway()
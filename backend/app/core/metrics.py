@@ -0,0 +1,388 @@
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from app.core.tracing import span, current_span, set_span_attributes
+from app.core.upstream_health import UpstreamHealth
+from app.core.circuit_breaker import get_circuit_breaker, circuit_breakers, counts_as_failure, CLOSED, HALF_OPEN, OPEN
+from app.core.adaptive_limiter import get_limiter, is_overload, SUCCESS, OVERLOAD, TIMEOUT, IGNORE
+from app.core.upstream_errors import classify_error, TIMEOUT as TIMED_OUT
+from app.core.deadline import DeadlineExceeded
+from app.core.config import ADMISSION_ERROR_WINDOW_SECONDS
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+import time
+
+# Entry point of the request being served ("text", "batch", "multimodal", "url").
+# Context variables follow the request into tasks it spawns, so stage and
+# upstream metrics recorded deep in the services are labeled correctly.
+current_entry_point = ContextVar("current_entry_point", default="text")
+
+# Service that owns each pipeline stage, recorded on the stage's trace span
+STAGE_SERVICES = {
+    "cache_lookup": "ProfessionalFactCheckService",
+    "generate_verdict": "ProfessionalFactCheckService",
+    "save": "ProfessionalFactCheckService",
+    "structure_claim": "ClaimStructuringService",
+    "deep_research": "PerplexityService",
+    "media_extraction": "TextExtractionService",
+    "media_upload_polling": "TextExtractionService",
+    "url_extraction": "URLExtractionService",
+    "url_fetch": "URLExtractionService"
+}
+
+# Buckets sized for LLM/research calls that take from ~100ms up to a minute or more
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, 300)
+
+REQUEST_LATENCY = Histogram(
+    "factcheck_request_duration_seconds",
+    "End-to-end fact-check latency",
+    ["entry_point"],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "factcheck_requests_in_flight",
+    "Fact-check requests currently being processed",
+    ["entry_point"]
+)
+STAGE_LATENCY = Histogram(
+    "factcheck_stage_duration_seconds",
+    "Latency of each pipeline stage",
+    ["stage", "entry_point"],
+    buckets=LATENCY_BUCKETS
+)
+STAGES_IN_FLIGHT = Gauge(
+    "factcheck_stages_in_flight",
+    "Pipeline stages currently running",
+    ["stage", "entry_point"]
+)
+UPSTREAM_LATENCY = Histogram(
+    "factcheck_upstream_duration_seconds",
+    "Latency of calls to upstream services",
+    ["upstream", "operation", "entry_point"],
+    buckets=LATENCY_BUCKETS
+)
+UPSTREAM_ERRORS = Counter(
+    "factcheck_upstream_errors_total",
+    "Failed calls to upstream services",
+    ["upstream", "operation", "entry_point"]
+)
+UPSTREAM_RETRIES = Counter(
+    "factcheck_upstream_retries_total",
+    "Retries issued by backoff loops",
+    ["upstream", "operation", "entry_point"]
+)
+RETRIES_DENIED = Counter(
+    "factcheck_upstream_retries_denied_total",
+    "Retries skipped because the process-wide retry budget was used up",
+    ["upstream"]
+)
+GEMINI_REQUEST_CHARS = Histogram(
+    "factcheck_gemini_request_chars",
+    "Characters of prompt text sent to Gemini per call",
+    ["call_site"],
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+)
+GEMINI_TOKENS = Counter(
+    "factcheck_gemini_tokens_total",
+    "Gemini tokens spent, by call site and kind (prompt / output)",
+    ["call_site", "kind"]
+)
+GEMINI_CALL_TOKENS = Histogram(
+    "factcheck_gemini_call_tokens",
+    "Prompt plus output tokens per Gemini call",
+    ["call_site"],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+)
+CACHE_LOOKUPS = Counter(
+    "factcheck_cache_lookups_total",
+    "Claim cache lookups by result and the tier that answered (memory / database / similar)",
+    ["result", "tier", "entry_point"]
+)
+CANONICAL_LOOKUPS = Counter(
+    "factcheck_canonical_lookups_total",
+    "Post-structuring canonical claim lookups, made after a cache miss, by result",
+    ["result", "entry_point"]
+)
+SIMILARITY_SCORES = Histogram(
+    "factcheck_similarity_score",
+    "Similarity of the closest stored claim on near-duplicate lookups",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0)
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "factcheck_response_cache_lookups_total",
+    "In-process response cache lookups by result",
+    ["result"]
+)
+RESPONSE_CACHE_REMOVALS = Counter(
+    "factcheck_response_cache_removals_total",
+    "Entries removed from the in-process response cache, by reason (expired / capacity / invalidated)",
+    ["reason"]
+)
+NEGATIVE_CACHE_LOOKUPS = Counter(
+    "factcheck_negative_cache_lookups_total",
+    "Lookups in the negative cache of failed research, by result (hit / miss) and failure class",
+    ["result", "error_class"]
+)
+NEGATIVE_CACHE_CLEARS = Counter(
+    "factcheck_negative_cache_clears_total",
+    "Times the negative cache was emptied because the upstream recovered, by signal",
+    ["reason"]
+)
+RESPONSE_CACHE_BYTES = Gauge(
+    "factcheck_response_cache_bytes",
+    "Estimated memory held by the in-process response cache"
+)
+CACHE_FRESHNESS = Counter(
+    "factcheck_cache_freshness_total",
+    "Stored verdicts read from the cache, by freshness state and claim category",
+    ["state", "category"]
+)
+STALE_REFRESHES = Counter(
+    "factcheck_stale_refreshes_total",
+    "Background refreshes of stale verdicts, by outcome",
+    ["outcome"]
+)
+RESEARCH_EARLY_RETURNS = Counter(
+    "factcheck_research_early_returns_total",
+    "Streamed research returned once the findings were complete, by what happened to the rest "
+    "of the stream (drained: connection reused / dropped: drain failed or timed out)",
+    ["drain"]
+)
+SPECULATION_OUTCOMES = Counter(
+    "factcheck_speculation_total",
+    "Speculative research outcomes",
+    ["outcome"]
+)
+COALESCED_WAITERS = Counter(
+    "factcheck_coalesced_waiters_total",
+    "Requests served by joining an identical in-flight request",
+    ["flight"]
+)
+COALESCING_TIMEOUTS = Counter(
+    "factcheck_coalescing_timeouts_total",
+    "Followers that stopped waiting on a stuck in-flight request",
+    ["flight"]
+)
+
+JOB_OUTCOMES = Counter(
+    "factcheck_job_attempts_total",
+    "Background job attempts by outcome (succeeded, retried, dead_letter)",
+    ["kind", "outcome"]
+)
+JOB_QUEUE_WAIT = Histogram(
+    "factcheck_job_queue_wait_seconds",
+    "Time a background job waited in the queue before a worker claimed it",
+    ["kind"],
+    buckets=LATENCY_BUCKETS
+)
+SCHEDULER_QUEUE_DEPTH = Gauge(
+    "factcheck_scheduler_queue_depth",
+    "Pipeline runs waiting for a scheduler slot",
+    ["lane"]
+)
+SCHEDULER_RUNNING = Gauge(
+    "factcheck_scheduler_running",
+    "Pipeline runs holding a scheduler slot",
+    ["lane"]
+)
+SCHEDULER_WAIT = Histogram(
+    "factcheck_scheduler_wait_seconds",
+    "Time pipeline runs waited for a scheduler slot",
+    ["lane"],
+    buckets=LATENCY_BUCKETS
+)
+OVERLOADED = Gauge(
+    "factcheck_overloaded",
+    "1 while admission control is shedding non-cached requests"
+)
+SHED_REQUESTS = Counter(
+    "factcheck_requests_shed_total",
+    "Non-cached requests rejected by admission control",
+    ["reason"]
+)
+
+# Recent call/error counts per upstream, read by admission control
+upstream_health = UpstreamHealth(ADMISSION_ERROR_WINDOW_SECONDS)
+CIRCUIT_STATE = Gauge(
+    "factcheck_circuit_state",
+    "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)",
+    ["upstream"]
+)
+CIRCUIT_REJECTIONS = Counter(
+    "factcheck_circuit_rejections_total",
+    "Upstream calls failed fast by an open circuit",
+    ["upstream"]
+)
+UPSTREAM_CONCURRENCY_LIMIT = Gauge(
+    "factcheck_upstream_concurrency_limit",
+    "Current adaptive concurrency limit per upstream model",
+    ["upstream", "model"]
+)
+UPSTREAM_CONCURRENCY_IN_FLIGHT = Gauge(
+    "factcheck_upstream_concurrency_in_flight",
+    "Calls holding an adaptive concurrency permit per upstream model",
+    ["upstream", "model"]
+)
+UPSTREAM_LIMITER_WAIT = Histogram(
+    "factcheck_upstream_limiter_wait_seconds",
+    "Time spent waiting for an adaptive concurrency permit",
+    ["upstream", "model"],
+    buckets=LATENCY_BUCKETS
+)
+
+_CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def _export_circuit_state(breaker, old_state, new_state):
+    CIRCUIT_STATE.labels(breaker.name).set(_CIRCUIT_STATE_VALUES[new_state])
+
+
+for _breaker in circuit_breakers.values():
+    CIRCUIT_STATE.labels(_breaker.name).set(0)
+    _breaker.on_state_change(_export_circuit_state)
+
+@asynccontextmanager
+async def track_request(entry_point: str):
+    """Label everything inside the block with the entry point and time it end to end."""
+    token = current_entry_point.set(entry_point)
+    REQUESTS_IN_FLIGHT.labels(entry_point).inc()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        REQUEST_LATENCY.labels(entry_point).observe(time.perf_counter() - started)
+        REQUESTS_IN_FLIGHT.labels(entry_point).dec()
+        current_entry_point.reset(token)
+
+
+@asynccontextmanager
+async def track_stage(stage: str):
+    """Time one pipeline stage and record it as a trace span."""
+    entry_point = current_entry_point.get()
+    STAGES_IN_FLIGHT.labels(stage, entry_point).inc()
+    started = time.perf_counter()
+    try:
+        async with span(stage, service=STAGE_SERVICES.get(stage, ""), entry_point=entry_point):
+            yield
+    finally:
+        STAGE_LATENCY.labels(stage, entry_point).observe(time.perf_counter() - started)
+        STAGES_IN_FLIGHT.labels(stage, entry_point).dec()
+
+
+@asynccontextmanager
+async def track_upstream(upstream: str, operation: str, model: str = None):
+    """
+    Time one upstream call and record it as a trace span; exceptions are
+    counted as errors and re-raised. Client errors (our own bad request)
+    don't count towards the upstream's error rate or its circuit.
+
+    Calls to upstreams with a circuit breaker go through it: while the
+    circuit is open this raises CircuitOpen without making the call.
+    Gemini and Perplexity calls also wait for a permit from the adaptive
+    concurrency limiter of `model`, and report their latency and outcome
+    back to it.
+    """
+    breaker = get_circuit_breaker(upstream)
+    probe = False
+    if breaker is not None:
+        try:
+            probe = breaker.before_call()
+        except Exception:
+            CIRCUIT_REJECTIONS.labels(upstream).inc()
+            raise
+
+    limiter = get_limiter(upstream, model)
+    if limiter is not None:
+        model_label = model or "default"
+        wait_started = time.perf_counter()
+        try:
+            await limiter.acquire()
+        except BaseException:
+            if breaker is not None:
+                breaker.record_neutral(probe)
+            raise
+        UPSTREAM_LIMITER_WAIT.labels(upstream, model_label).observe(time.perf_counter() - wait_started)
+        UPSTREAM_CONCURRENCY_IN_FLIGHT.labels(upstream, model_label).set(limiter.in_flight)
+
+    entry_point = current_entry_point.get()
+    started = time.perf_counter()
+    outcome = SUCCESS
+    try:
+        async with span(f"{upstream}.{operation}", upstream=upstream, operation=operation):
+            yield
+    except DeadlineExceeded:
+        # Out of request budget: says nothing about the upstream's health
+        outcome = IGNORE
+        if breaker is not None:
+            breaker.record_neutral(probe)
+        raise
+    except Exception as e:
+        UPSTREAM_ERRORS.labels(upstream, operation, entry_point).inc()
+        failed = counts_as_failure(e)
+        if failed:
+            upstream_health.record_error(upstream)
+        if is_overload(e):
+            outcome = OVERLOAD
+        elif classify_error(e) == TIMED_OUT:
+            # The call hung past its own cap (StageTimeout) or the transport timed out
+            outcome = TIMEOUT
+        else:
+            outcome = IGNORE
+        if breaker is not None:
+            if failed:
+                breaker.record_failure(probe)
+            else:
+                # Our own bad request: neither closes the circuit nor resets the failure streak
+                breaker.record_neutral(probe)
+        raise
+    except BaseException:
+        outcome = IGNORE
+        if breaker is not None:
+            breaker.record_neutral(probe)
+        raise
+    else:
+        if breaker is not None:
+            breaker.record_success(probe)
+    finally:
+        elapsed = time.perf_counter() - started
+        upstream_health.record_call(upstream)
+        UPSTREAM_LATENCY.labels(upstream, operation, entry_point).observe(elapsed)
+        if limiter is not None:
+            limiter.release(elapsed, outcome)
+            UPSTREAM_CONCURRENCY_LIMIT.labels(upstream, model_label).set(int(limiter.limit))
+            UPSTREAM_CONCURRENCY_IN_FLIGHT.labels(upstream, model_label).set(limiter.in_flight)
+
+
+def record_upstream_error(upstream: str, operation: str):
+    """Count a failed upstream call that did not raise (e.g. a non-200 response)."""
+    UPSTREAM_ERRORS.labels(upstream, operation, current_entry_point.get()).inc()
+    upstream_health.record_error(upstream)
+
+
+def record_retry(upstream: str, operation: str):
+    UPSTREAM_RETRIES.labels(upstream, operation, current_entry_point.get()).inc()
+    active = current_span()
+    if active is not None:
+        active.set_attributes(retries=active.attributes.get("retries", 0) + 1)
+        active.add_event("retry", upstream=upstream, operation=operation)
+
+
+def record_cache_lookup(hit: bool, tier: str = ""):
+    CACHE_LOOKUPS.labels("hit" if hit else "miss", tier if hit else "", current_entry_point.get()).inc()
+    set_span_attributes(cache_hit=hit)
+    if hit and tier:
+        set_span_attributes(cache_tier=tier)
+
+
+def record_canonical_lookup(hit: bool):
+    """
+    Count a canonical lookup separately: the request was already counted as
+    a miss in factcheck_cache_lookups_total, and counting it there again
+    would double its lookups.
+    """
+    CANONICAL_LOOKUPS.labels("hit" if hit else "miss", current_entry_point.get()).inc()
+    if hit:
+        set_span_attributes(cache_hit=True, cache_tier="canonical")
+
+
+def render_metrics() -> tuple:
+    """Return (body, content_type) in the Prometheus text exposition format."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,153 @@
+"""
+Short-lived cache of failed research.
+
+The response cache only holds results backed by successful research, so
+during a Perplexity outage every retry of a claim would structure it, call
+the dead API and generate a verdict all over again. Instead, a failure is
+remembered for a few seconds under the search query (the Perplexity
+service skips the call) and under the claim (the pipeline returns the
+degraded response straight away). Entries keep the failure class from
+classify_error so callers can tell rate limiting from an outage, and
+expire after a jittered TTL so retries from many clients don't line up.
+
+The whole cache is emptied as soon as the upstream recovers: when the
+Perplexity circuit closes or any research call succeeds.
+"""
+from app.core.config import NEGATIVE_CACHE_TTL_SECONDS, NEGATIVE_CACHE_JITTER, NEGATIVE_CACHE_MAX_ENTRIES
+from app.core.circuit_breaker import get_circuit_breaker, CLOSED
+from app.core.metrics import NEGATIVE_CACHE_LOOKUPS, NEGATIVE_CACHE_CLEARS
+from collections import OrderedDict
+import random
+import time
+
+# Failure class of a call skipped because the upstream's circuit is open
+CIRCUIT_OPEN = "circuit_open"
+
+
+class Failure:
+    __slots__ = ("error_class", "value", "expires_at")
+
+    def __init__(self, error_class: str, value, expires_at: float):
+        self.error_class = error_class
+        self.value = value
+        self.expires_at = expires_at
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until the entry expires and the upstream is tried again."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+class NegativeCache:
+    """
+    Recent failures by key, each with its failure class and an optional
+    value (e.g. the degraded response). Oldest entries are dropped past
+    `max_entries`. Only used from the event loop, so no locking.
+    """
+
+    def __init__(self, ttl_seconds: float = NEGATIVE_CACHE_TTL_SECONDS, jitter: float = NEGATIVE_CACHE_JITTER,
+                 max_entries: int = NEGATIVE_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.jitter = jitter
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.recoveries = 0
+        self._entries = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: str):
+        """
+        The recent failure recorded under `key`, or None.
+
+        Returns:
+            Failure or None
+        """
+        if not self.enabled:
+            return None
+        failure = self._entries.get(key)
+        if failure is not None and failure.expires_at <= time.monotonic():
+            del self._entries[key]
+            failure = None
+        if failure is None:
+            self.misses += 1
+            NEGATIVE_CACHE_LOOKUPS.labels("miss", "").inc()
+            return None
+        self.hits += 1
+        NEGATIVE_CACHE_LOOKUPS.labels("hit", failure.error_class).inc()
+        return failure
+
+    def put(self, key: str, error_class: str, value=None, retry_after: float = None):
+        """
+        Record a failure.
+
+        Args:
+            key (str): What failed, e.g. research_key(search_query)
+            error_class (str): Failure class from classify_error
+            value: Anything to hand back with the failure, e.g. the degraded response
+            retry_after (float): Delay the upstream asked for; extends the TTL
+        """
+        if not self.enabled:
+            return
+        ttl_seconds = self.ttl_seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+        if retry_after is not None:
+            ttl_seconds = max(ttl_seconds, retry_after)
+        self._entries.pop(key, None)
+        self._entries[key] = Failure(error_class, value, time.monotonic() + ttl_seconds)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def recovered(self, reason: str):
+        """The upstream answered again: forget every failure so retries go through."""
+        if not self._entries:
+            return
+        print(f"[NEGATIVE_CACHE] Upstream recovered ({reason}), dropping {len(self._entries)} failures")
+        self._entries.clear()
+        self.recoveries += 1
+        NEGATIVE_CACHE_CLEARS.labels(reason).inc()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> dict:
+        """Summary suitable for a stats endpoint."""
+        now = time.monotonic()
+        by_class = {}
+        for failure in self._entries.values():
+            if failure.expires_at > now:
+                by_class[failure.error_class] = by_class.get(failure.error_class, 0) + 1
+        return {
+            "enabled": self.enabled,
+            "entries": sum(by_class.values()),
+            "by_error_class": by_class,
+            "ttl_seconds": self.ttl_seconds,
+            "jitter": self.jitter,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recoveries": self.recoveries
+        }
+
+
+def research_key(search_query: str) -> str:
+    """Negative cache key of a Perplexity search query, ignoring case and spacing."""
+    return "query:" + " ".join(search_query.lower().split())
+
+
+def claim_key(claim_hash: str) -> str:
+    """Negative cache key of a claim (see hash_claim)."""
+    return "claim:" + claim_hash
+
+
+# Shared by every service instance in the process
+research_failures = NegativeCache()
+
+
+def _on_perplexity_circuit_change(breaker, old_state: str, new_state: str):
+    if new_state == CLOSED:
+        research_failures.recovered("circuit_closed")
+
+
+get_circuit_breaker("perplexity").on_state_change(_on_perplexity_circuit_change)
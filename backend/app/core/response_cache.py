@@ -0,0 +1,143 @@
+"""
+In-process cache of formatted fact-check responses.
+
+Sits in front of the claim repository: hot claims are answered from
+memory on the event loop without a MongoDB round trip or re-parsing the
+stored response. Entries expire after a TTL and the least recently used
+ones are evicted once the cache exceeds its entry or byte cap. The
+repository invalidates an entry whenever it saves or deletes that claim.
+"""
+from app.core.config import RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL_SECONDS
+from app.core.metrics import RESPONSE_CACHE_LOOKUPS, RESPONSE_CACHE_REMOVALS, RESPONSE_CACHE_BYTES
+from collections import OrderedDict
+import json
+import time
+
+
+def _estimate_size(response: dict) -> int:
+    """Approximate memory held by a response: its JSON length plus per-entry overhead."""
+    return len(json.dumps(response, default=str)) + 200
+
+
+class _Entry:
+    __slots__ = ("response", "size", "expires_at")
+
+    def __init__(self, response: dict, size: int, expires_at: float):
+        self.response = response
+        self.size = size
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    LRU cache of formatted responses keyed by claim hash, capped by entry
+    count and estimated bytes, with a TTL per entry. Only used from the
+    event loop, so no locking.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 max_bytes: int = RESPONSE_CACHE_MAX_BYTES, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0 and self.ttl_seconds > 0
+
+    def get(self, claim_hash: str):
+        """
+        The cached response for a claim, or None.
+
+        Returns a shallow copy, so callers can set top-level fields
+        without touching the cached entry.
+        """
+        if not self.enabled:
+            return None
+        entry = self._entries.get(claim_hash)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(claim_hash, "expired")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            RESPONSE_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+        self._entries.move_to_end(claim_hash)
+        self.hits += 1
+        RESPONSE_CACHE_LOOKUPS.labels("hit").inc()
+        return dict(entry.response)
+
+    def put(self, claim_hash: str, response: dict, ttl_seconds: float = None):
+        """
+        Cache a formatted response, evicting least recently used entries to stay under the caps.
+
+        Args:
+            claim_hash (str): Claim hash (see hash_claim)
+            response (dict): Formatted response
+            ttl_seconds (float): Shorter TTL for this entry, e.g. until the verdict goes stale
+        """
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if not self.enabled or ttl_seconds <= 0:
+            return
+        size = _estimate_size(response)
+        if size > self.max_bytes:
+            # Would evict everything else and still not fit
+            return
+        if claim_hash in self._entries:
+            self._remove(claim_hash)
+        self._entries[claim_hash] = _Entry(dict(response), size, time.monotonic() + ttl_seconds)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)), "capacity")
+        RESPONSE_CACHE_BYTES.set(self.bytes)
+
+    def invalidate(self, claim_hash: str):
+        """Drop a claim's entry, e.g. because its stored result changed."""
+        if claim_hash in self._entries:
+            self._remove(claim_hash, "invalidated")
+            RESPONSE_CACHE_BYTES.set(self.bytes)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+        RESPONSE_CACHE_BYTES.set(0)
+
+    def _remove(self, claim_hash: str, reason: str = None):
+        entry = self._entries.pop(claim_hash)
+        self.bytes -= entry.size
+        if reason == "invalidated":
+            self.invalidations += 1
+        elif reason is not None:
+            self.evictions += 1
+        if reason is not None:
+            RESPONSE_CACHE_REMOVALS.labels(reason).inc()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> dict:
+        """Summary suitable for a stats endpoint."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+# Shared by every service instance in the process
+response_cache = ResponseCache()
@@ -0,0 +1,250 @@
+from app.core.config import SCHEDULER_CONCURRENCY, SCHEDULER_LANE_LIMITS, SCHEDULER_LANE_MAX_WAIT_SECONDS
+from app.core.deadline import DeadlineExceeded, budget
+from app.core.metrics import SCHEDULER_QUEUE_DEPTH, SCHEDULER_RUNNING, SCHEDULER_WAIT
+from app.core.tracing import set_span_attributes
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from collections import deque
+import asyncio
+import time
+
+# User the current request is served for; set by the API routes and the job
+# worker so pipeline stages deep in the services are scheduled per user
+current_user_id = ContextVar("current_user_id", default=None)
+
+# Set while a pipeline slot is held, so nested stages (e.g. the text pipeline
+# run by a multimodal check) don't take a second slot
+_holding_slot = ContextVar("holding_slot", default=False)
+
+
+@contextmanager
+def user_scope(user_id: str):
+    """Attribute everything inside the block to a user for fair scheduling."""
+    token = current_user_id.set(user_id)
+    try:
+        yield
+    finally:
+        current_user_id.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("future", "cost", "enqueued_at")
+
+    def __init__(self, future, cost: int):
+        self.future = future
+        self.cost = cost
+        self.enqueued_at = time.monotonic()
+
+
+class _Lane:
+    """Waiters of one priority lane, queued per user."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.running = 0
+        self.waiting = 0
+        self.queues = {}
+        self.deficits = {}
+        self.active_users = deque()
+        self.promoted = 0
+
+    def oldest_enqueued_at(self):
+        """When the longest-queued run in this lane was queued, or None if none is."""
+        return min((queue[0].enqueued_at for queue in self.queues.values()), default=None)
+
+
+class FairScheduler:
+    """
+    Admits pipeline runs into a fixed number of slots.
+
+    Lanes are served in priority order, and each lane may hold at most its
+    own limit of slots, so heavy lanes (multimodal) always leave headroom for
+    light ones (text). The first lane is never overtaken. Among the heavy
+    lanes behind it, one whose oldest run has been queued for
+    `max_lane_wait` is promoted ahead of the others, so multimodal keeps
+    making progress under steady URL load. Within a lane, users take turns
+    by deficit round robin: a user with a hundred queued claims gets one
+    slot per turn, the same as a user with one.
+    """
+
+    def __init__(self, name: str, capacity: int, lanes: list, quantum: int = 1,
+                 max_lane_wait: float = SCHEDULER_LANE_MAX_WAIT_SECONDS):
+        """
+        Args:
+            name (str): Label used in log lines
+            capacity (int): Total slots shared by all lanes
+            lanes (list): (lane_name, slot_limit) pairs, highest priority first
+            quantum (int): Cost credited to a user on each round-robin turn
+            max_lane_wait (float): Queue age after which a heavy lane is served
+                ahead of higher-priority heavy lanes
+        """
+        self.name = name
+        self.capacity = capacity
+        self.quantum = quantum
+        self.max_lane_wait = max_lane_wait
+        self.running = 0
+        self._lanes = {lane_name: _Lane(lane_name, min(limit, capacity)) for lane_name, limit in lanes}
+        self._first_lane = next(iter(self._lanes.values()))
+
+    @asynccontextmanager
+    async def slot(self, lane_name: str, user_id: str = None, cost: int = 1):
+        """
+        Hold a pipeline slot for the duration of the block.
+
+        Args:
+            lane_name (str): Priority lane
+            user_id (str): User to queue under (defaults to the current user)
+            cost (int): Relative cost of the work, charged against the user's turn
+
+        Raises:
+            DeadlineExceeded: If the request's budget runs out while queued
+        """
+        if _holding_slot.get():
+            yield
+            return
+
+        lane = self._lanes[lane_name]
+        user = user_id or current_user_id.get() or "anonymous"
+        started = time.perf_counter()
+
+        if self.running < self.capacity and lane.running < lane.limit and not lane.waiting:
+            self._start(lane)
+        else:
+            await self._wait_for_slot(lane, user, cost)
+
+        waited = time.perf_counter() - started
+        SCHEDULER_WAIT.labels(lane.name).observe(waited)
+        set_span_attributes(scheduler_lane=lane.name, scheduler_wait_ms=round(waited * 1000, 3))
+
+        token = _holding_slot.set(True)
+        try:
+            yield
+        finally:
+            _holding_slot.reset(token)
+            self._release(lane)
+
+    async def _wait_for_slot(self, lane: _Lane, user: str, cost: int):
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), cost)
+        if user not in lane.queues:
+            lane.queues[user] = deque()
+            lane.deficits[user] = 0
+            lane.active_users.append(user)
+        lane.queues[user].append(waiter)
+        lane.waiting += 1
+        SCHEDULER_QUEUE_DEPTH.labels(lane.name).set(lane.waiting)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=budget())
+        except BaseException as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we gave up: hand the slot back
+                self._release(lane)
+            else:
+                waiter.future.cancel()
+                self._remove_waiter(lane, user, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise DeadlineExceeded(f"No {lane.name} pipeline slot became free within the request budget")
+            raise
+
+    def _remove_waiter(self, lane: _Lane, user: str, waiter: _Waiter):
+        queue = lane.queues.get(user)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        lane.waiting -= 1
+        SCHEDULER_QUEUE_DEPTH.labels(lane.name).set(lane.waiting)
+        if not queue:
+            self._drop_user(lane, user)
+
+    def _drop_user(self, lane: _Lane, user: str):
+        del lane.queues[user]
+        del lane.deficits[user]
+        lane.active_users.remove(user)
+
+    def _start(self, lane: _Lane):
+        self.running += 1
+        lane.running += 1
+        SCHEDULER_RUNNING.labels(lane.name).set(lane.running)
+
+    def _release(self, lane: _Lane):
+        self.running -= 1
+        lane.running -= 1
+        SCHEDULER_RUNNING.labels(lane.name).set(lane.running)
+        self._dispatch()
+
+    def _dispatch(self):
+        """
+        Hand free slots to waiters: the first lane whenever it can take one;
+        otherwise the heavy lane that has waited longest past max_lane_wait,
+        or failing that the highest-priority eligible lane.
+        """
+        while self.running < self.capacity:
+            eligible = [lane for lane in self._lanes.values() if lane.waiting and lane.running < lane.limit]
+            if not eligible:
+                return
+            lane = eligible[0]
+            if lane is not self._first_lane:
+                promote_before = time.monotonic() - self.max_lane_wait
+                oldest = min(eligible, key=lambda candidate: candidate.oldest_enqueued_at())
+                if oldest is not lane and oldest.oldest_enqueued_at() <= promote_before:
+                    lane = oldest
+                    lane.promoted += 1
+            self._start(lane)
+            self._next_waiter(lane).future.set_result(True)
+
+    def _next_waiter(self, lane: _Lane) -> _Waiter:
+        """Deficit round robin over the lane's users."""
+        while True:
+            user = lane.active_users[0]
+            queue = lane.queues[user]
+            head = queue[0]
+            if lane.deficits[user] < head.cost:
+                lane.deficits[user] += self.quantum
+                if lane.deficits[user] < head.cost:
+                    lane.active_users.rotate(-1)
+                    continue
+
+            lane.deficits[user] -= head.cost
+            queue.popleft()
+            lane.waiting -= 1
+            SCHEDULER_QUEUE_DEPTH.labels(lane.name).set(lane.waiting)
+            if not queue:
+                self._drop_user(lane, user)
+            elif lane.deficits[user] < queue[0].cost:
+                # Turn is over; the next user goes first
+                lane.active_users.rotate(-1)
+            return head
+
+    @property
+    def waiting(self) -> int:
+        """Runs queued for a slot across all lanes."""
+        return sum(lane.waiting for lane in self._lanes.values())
+
+    def oldest_wait(self) -> float:
+        """Seconds the longest-queued run has been waiting (0 if none)."""
+        oldest = min(
+            (lane.oldest_enqueued_at() for lane in self._lanes.values() if lane.waiting),
+            default=None
+        )
+        return 0.0 if oldest is None else time.monotonic() - oldest
+
+    def snapshot(self) -> dict:
+        """Summary suitable for a stats endpoint."""
+        return {
+            "capacity": self.capacity,
+            "running": self.running,
+            "lanes": {
+                lane.name: {
+                    "limit": lane.limit,
+                    "running": lane.running,
+                    "waiting": lane.waiting,
+                    "waiting_users": len(lane.queues),
+                    "promoted": lane.promoted
+                }
+                for lane in self._lanes.values()
+            }
+        }
+
+
+pipeline_scheduler = FairScheduler("pipeline", SCHEDULER_CONCURRENCY, SCHEDULER_LANE_LIMITS)
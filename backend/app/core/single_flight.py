@@ -0,0 +1,87 @@
+from app.core.metrics import COALESCED_WAITERS, COALESCING_TIMEOUTS
+from app.core.tracing import set_span_attributes
+import asyncio
+import copy
+
+
+class SingleFlightTimeout(Exception):
+    """Raised when a follower gives up waiting on the leader's result."""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key (the leader) starts the work as a separate
+    task; every concurrent caller with the same key (a follower) awaits that
+    same task instead of repeating the work. The task is shielded, so a
+    leader whose request is cancelled does not take the followers down with it.
+    """
+
+    def __init__(self, name: str, timeout: float):
+        """
+        Args:
+            name (str): Label used in log lines
+            timeout (float): Seconds a follower waits before giving up
+        """
+        self.name = name
+        self.timeout = timeout
+        self._tasks = {}
+
+        # Counters reported by snapshot()
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    async def do(self, key: str, fn, timeout: float = None):
+        """
+        Run fn() once per key across concurrent callers.
+
+        Args:
+            key (str): Coalescing key
+            fn: Zero-argument callable returning an awaitable
+            timeout (float): Override of the follower timeout for this call
+
+        Returns:
+            A private deep copy of the result, so callers can annotate it freely
+
+        Raises:
+            SingleFlightTimeout: If a follower waited longer than the timeout
+        """
+        task = self._tasks.get(key)
+
+        if task is None:
+            self.leaders += 1
+            task = asyncio.create_task(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            result = await asyncio.shield(task)
+            return copy.deepcopy(result)
+
+        timeout = self.timeout if timeout is None else timeout
+        self.coalesced += 1
+        COALESCED_WAITERS.labels(self.name).inc()
+        set_span_attributes(coalesced=True)
+        print(f"[SINGLE-FLIGHT] {self.name}: joining in-flight request ({self.in_flight()} in flight)")
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            COALESCING_TIMEOUTS.labels(self.name).inc()
+            print(f"[SINGLE-FLIGHT] {self.name}: leader did not finish within {timeout:.1f}s")
+            raise SingleFlightTimeout(f"Timed out waiting for in-flight {self.name} request")
+        return copy.deepcopy(result)
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed."""
+        return len(self._tasks)
+
+    def snapshot(self) -> dict:
+        """Summary suitable for a stats endpoint."""
+        return {
+            "in_flight": self.in_flight(),
+            "leaders": self.leaders,
+            "coalesced_waiters": self.coalesced,
+            "timeouts": self.timeouts,
+            "timeout_seconds": self.timeout
+        }
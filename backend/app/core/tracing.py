@@ -0,0 +1,312 @@
+from app.core.config import TRACE_EXPORTER, TRACE_FILE_PATH, OTLP_TRACES_ENDPOINT, TRACE_SERVICE_NAME
+from app.core.async_utils import LoopLocal
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+import asyncio
+import httpx
+import json
+import os
+import re
+import threading
+import time
+
+TRACE_ID_HEADER = "X-Trace-Id"
+
+# Span currently active in this request's context. Tasks spawned from the
+# request copy the context, so their spans nest under the right parent.
+_current_span = ContextVar("current_span", default=None)
+
+# W3C trace context: version-traceid-parentid-flags
+_TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Span:
+    """
+    One timed operation within a trace.
+
+    Spans of a trace share a single list (owned by the root span), which is
+    handed to the exporter when the root span ends.
+    """
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, spans: list = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.spans = spans if spans is not None else []
+        self.spans.append(self)
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def end(self, error: Exception = None):
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.end_ns = time.time_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns or time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "events": self.events,
+            "error": self.error
+        }
+
+
+class JSONFileExporter:
+    """Appends one JSON line per finished trace, with spans nested as a tree."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: list):
+        root = spans[0]
+        nodes = {span.span_id: dict(span.to_dict(), children=[]) for span in spans}
+        for span in spans[1:]:
+            parent = nodes.get(span.parent_id)
+            if parent is not None:
+                parent["children"].append(nodes[span.span_id])
+        line = json.dumps({
+            "trace_id": root.trace_id,
+            "name": root.name,
+            "duration_ms": round(root.duration_ms, 3),
+            "root": nodes[root.span_id]
+        }, default=str)
+        _run_in_background(asyncio.to_thread(self._write, line))
+
+    def _write(self, line: str):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as trace_file:
+                trace_file.write(line + "\n")
+
+
+class OTLPHTTPExporter:
+    """Posts finished traces to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._http_clients = LoopLocal(lambda: httpx.AsyncClient(timeout=5))
+
+    def export(self, spans: list):
+        _run_in_background(self._post(self._encode(spans)))
+
+    async def _post(self, payload: dict):
+        try:
+            await self._http_clients.get().post(self.endpoint, json=payload)
+        except Exception as e:
+            print(f"[WARNING] Trace export failed: {str(e)}")
+
+    def _encode(self, spans: list) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "app.core.tracing"},
+                    "spans": [self._encode_span(span) for span in spans]
+                }]
+            }]
+        }
+
+    def _encode_span(self, span: Span) -> dict:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns or time.time_ns()),
+            "attributes": _otlp_attributes(span.attributes),
+            "events": [
+                {
+                    "name": event["name"],
+                    "timeUnixNano": str(event["time_ns"]),
+                    "attributes": _otlp_attributes(event["attributes"])
+                }
+                for event in span.events
+            ],
+            # 1 = OK, 2 = ERROR
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+
+def _otlp_attributes(attributes: dict) -> list:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": typed})
+    return encoded
+
+
+def _run_in_background(coro):
+    """Fire-and-forget so exporting never delays a response."""
+    try:
+        asyncio.get_running_loop().create_task(coro)
+    except RuntimeError:
+        coro.close()
+
+
+def _build_exporter():
+    if TRACE_EXPORTER == "json":
+        return JSONFileExporter(TRACE_FILE_PATH)
+    if TRACE_EXPORTER == "otlp":
+        return OTLPHTTPExporter(OTLP_TRACES_ENDPOINT, TRACE_SERVICE_NAME)
+    return None
+
+
+exporter = _build_exporter()
+
+
+def start_trace(name: str, traceparent: str = None, **attributes) -> tuple:
+    """
+    Start a root span and make it current.
+
+    Args:
+        name (str): Root span name
+        traceparent (str): Optional W3C traceparent header to continue
+        **attributes: Initial span attributes
+
+    Returns:
+        tuple: (span, context token) - pass both to end_trace
+    """
+    trace_id, parent_id = os.urandom(16).hex(), None
+    match = _TRACEPARENT_RE.match(traceparent or "")
+    if match:
+        trace_id, parent_id = match.group(1), match.group(2)
+
+    root = Span(name, trace_id, parent_id=parent_id, attributes=attributes)
+    return root, _current_span.set(root)
+
+
+def end_trace(root: Span, token, error: Exception = None):
+    """End the root span and export the whole trace."""
+    root.end(error)
+    _current_span.reset(token)
+    if exporter is not None:
+        exporter.export(root.spans)
+
+
+@asynccontextmanager
+async def span(name: str, **attributes):
+    """
+    Record a child span of the current span.
+    Outside of a trace (scripts, sync wrappers) this is a no-op.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(name, parent.trace_id, parent_id=parent.span_id, spans=parent.spans, attributes=attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.end(e)
+        raise
+    else:
+        child.end()
+    finally:
+        _current_span.reset(token)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def current_trace_id():
+    active = _current_span.get()
+    return active.trace_id if active else None
+
+
+def set_span_attributes(**attributes):
+    """Attach attributes to the current span, if any."""
+    active = _current_span.get()
+    if active is not None:
+        active.set_attributes(**attributes)
+
+
+def add_span_event(name: str, **attributes):
+    """Record an event (e.g. a retry) on the current span, if any."""
+    active = _current_span.get()
+    if active is not None:
+        active.add_event(name, **attributes)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that wraps each API request in a root span and returns
+    the trace ID in the X-Trace-Id response header.
+
+    The root span ends when the last body chunk is sent, so streaming
+    responses (SSE, NDJSON) are traced for their full duration.
+    """
+
+    def __init__(self, app, path_prefix: str = "/api/"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1")
+        root, token = start_trace(
+            f"{scope['method']} {scope['path']}",
+            traceparent=traceparent,
+            **{"http.method": scope["method"], "http.path": scope["path"]}
+        )
+        finished = False
+
+        async def send_with_trace_id(message):
+            nonlocal finished
+            if message["type"] == "http.response.start":
+                root.set_attributes(**{"http.status_code": message["status"]})
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (TRACE_ID_HEADER.lower().encode("latin-1"), root.trace_id.encode("latin-1"))
+                ]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = True
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if not finished and error is None:
+                root.set_attributes(**{"http.client_disconnected": True})
+            end_trace(root, token, error)
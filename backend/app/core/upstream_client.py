@@ -0,0 +1,137 @@
+from app.core.config import (
+    UPSTREAM_MAX_ATTEMPTS, RETRY_BASE_DELAY_SECONDS, RETRY_MAX_DELAY_SECONDS,
+    RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN_RETRIES, RETRY_BUDGET_WINDOW_SECONDS
+)
+from app.core.circuit_breaker import CircuitOpen
+from app.core.deadline import DeadlineExceeded, run_within_deadline, allows
+from app.core.metrics import track_upstream, record_retry, RETRIES_DENIED
+from app.core.upstream_errors import classify_error, retry_after_seconds, RETRYABLE_KINDS
+from collections import deque
+import asyncio
+import random
+import time
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of calls per upstream over a sliding window,
+    so a failing upstream sees at most (1 + ratio) times normal traffic
+    instead of max_attempts times. `min_retries` lets a quiet process still
+    retry the occasional blip.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, min_retries: int = RETRY_BUDGET_MIN_RETRIES,
+                 window_seconds: float = RETRY_BUDGET_WINDOW_SECONDS):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window_seconds = window_seconds
+        self._calls = {}
+        self._retries = {}
+
+    def record_call(self, upstream: str):
+        self._append(self._calls, upstream)
+
+    def try_spend(self, upstream: str) -> bool:
+        """Take one retry from the budget; False if it is used up."""
+        calls = len(self._prune(self._calls.get(upstream)))
+        retries = len(self._prune(self._retries.get(upstream)))
+        if retries >= max(self.min_retries, self.ratio * calls):
+            return False
+        self._append(self._retries, upstream)
+        return True
+
+    def _append(self, events: dict, upstream: str):
+        timestamps = events.setdefault(upstream, deque())
+        timestamps.append(time.monotonic())
+        self._prune(timestamps)
+
+    def _prune(self, timestamps) -> deque:
+        if timestamps is None:
+            return deque()
+        cutoff = time.monotonic() - self.window_seconds
+        while timestamps and timestamps[0] < cutoff:
+            timestamps.popleft()
+        return timestamps
+
+    def snapshot(self) -> dict:
+        return {
+            upstream: {
+                "calls": len(self._prune(self._calls.get(upstream))),
+                "retries": len(self._prune(self._retries.get(upstream)))
+            }
+            for upstream in self._calls
+        }
+
+
+# Shared by every upstream call in the process
+retry_budget = RetryBudget()
+
+
+def _backoff(previous: float) -> float:
+    """Decorrelated jitter: uniform between the base delay and three times the previous one."""
+    return min(RETRY_MAX_DELAY_SECONDS, random.uniform(RETRY_BASE_DELAY_SECONDS, previous * 3))
+
+
+async def call_upstream(upstream: str, operation: str, call, model: str = None,
+                        timeout: float = None, max_attempts: int = UPSTREAM_MAX_ATTEMPTS,
+                        min_budget: float = 0.0):
+    """
+    Make one logical upstream call, retrying transient failures.
+
+    Each attempt runs inside track_upstream (metrics, tracing, circuit
+    breaker, adaptive concurrency) and is capped by `timeout` and the
+    request's remaining budget. Rate limiting, 5xx and transport errors are
+    retried with decorrelated jitter, waiting at least as long as the
+    upstream's Retry-After, while the retry budget and the request budget
+    allow it. Anything else is raised on the first attempt.
+
+    Args:
+        upstream (str): "gemini", "perplexity", ...
+        operation (str): Operation label for metrics and spans
+        call: Zero-argument coroutine function making the request
+        model (str): Model, for the adaptive concurrency limiter
+        timeout (float): Per-attempt timeout cap
+        max_attempts (int): Attempts including the first
+        min_budget (float): Request budget an attempt needs to be worth starting
+
+    Returns:
+        Whatever `call` returns
+
+    Raises:
+        DeadlineExceeded: If the request budget runs out
+        CircuitOpen: If the upstream's circuit is open
+        Exception: The last error from `call` once retries stop
+    """
+    retry_budget.record_call(upstream)
+    delay = RETRY_BASE_DELAY_SECONDS
+    for attempt in range(1, max_attempts + 1):
+        if not allows(min_budget):
+            raise DeadlineExceeded(f"Not enough time budget left for {upstream}.{operation}")
+        try:
+            async with track_upstream(upstream, operation, model=model):
+                return await run_within_deadline(call(), timeout)
+        except (DeadlineExceeded, CircuitOpen):
+            raise
+        except Exception as e:
+            kind = classify_error(e)
+            if kind not in RETRYABLE_KINDS or attempt == max_attempts:
+                raise
+
+            delay = _backoff(delay)
+            retry_after = retry_after_seconds(e)
+            if retry_after is not None:
+                if retry_after > RETRY_MAX_DELAY_SECONDS:
+                    print(f"[RETRY] {upstream}.{operation} asked to retry after {retry_after:.0f}s, giving up")
+                    raise
+                delay = max(delay, retry_after)
+
+            if not allows(delay + min_budget):
+                raise
+            if not retry_budget.try_spend(upstream):
+                RETRIES_DENIED.labels(upstream).inc()
+                print(f"[RETRY] {upstream} retry budget exhausted, not retrying {operation} ({kind})")
+                raise
+
+            print(f"[RETRY] {upstream}.{operation} failed ({kind}, attempt {attempt}/{max_attempts}), retrying in {delay:.1f}s")
+            record_retry(upstream, operation)
+            await asyncio.sleep(delay)
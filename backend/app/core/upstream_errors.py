@@ -0,0 +1,90 @@
+from email.utils import parsedate_to_datetime
+from pymongo.errors import ConnectionFailure, OperationFailure
+import asyncio
+import datetime
+import httpx
+import re
+
+# Error classes, by what they say about the upstream
+RATE_LIMITED = "rate_limited"    # 429: over quota, back off
+UNAVAILABLE = "unavailable"      # 5xx / 408 / 529: overloaded or briefly down
+TIMEOUT = "timeout"              # no answer in time at the transport level
+CONNECTION = "connection"        # connection refused/reset, DNS, protocol errors
+CLIENT = "client"                # the request itself was wrong (4xx, Mongo server errors)
+UNKNOWN = "unknown"              # anything else, e.g. a bug in our own response handling
+
+RETRYABLE_KINDS = (RATE_LIMITED, UNAVAILABLE, TIMEOUT, CONNECTION)
+
+# Upstream is over quota or overloaded: adaptive concurrency backs off on these
+OVERLOAD_KINDS = (RATE_LIMITED, UNAVAILABLE)
+
+_UNAVAILABLE_STATUS_CODES = (408, 500, 502, 503, 504, 529)
+
+# Gemini puts the retry delay in a google.rpc.RetryInfo detail, e.g. "retryDelay": "12s"
+_RETRY_DELAY_PATTERN = re.compile(r"'retryDelay': '(\d+(?:\.\d+)?)s'|\"retryDelay\": \"(\d+(?:\.\d+)?)s\"")
+
+
+def status_code_of(error: Exception):
+    """HTTP status of a Gemini APIError or httpx.HTTPStatusError, or None."""
+    if isinstance(error, OperationFailure):
+        # Mongo error codes are not HTTP statuses
+        return None
+    status_code = getattr(error, "code", None)
+    response = getattr(error, "response", None)
+    if not isinstance(status_code, int) and response is not None:
+        status_code = getattr(response, "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Classify an upstream error by its type and status code, never by its message.
+
+    Returns:
+        str: One of RATE_LIMITED, UNAVAILABLE, TIMEOUT, CONNECTION, CLIENT, UNKNOWN
+    """
+    status_code = status_code_of(error)
+    if status_code is not None:
+        if status_code == 429:
+            return RATE_LIMITED
+        if status_code in _UNAVAILABLE_STATUS_CODES:
+            return UNAVAILABLE
+        if 400 <= status_code < 500:
+            return CLIENT
+        if status_code >= 500:
+            return UNKNOWN
+    if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError)):
+        return TIMEOUT
+    if isinstance(error, (httpx.TransportError, ConnectionFailure, ConnectionError)):
+        return CONNECTION
+    if isinstance(error, OperationFailure):
+        return CLIENT
+    return UNKNOWN
+
+
+def retry_after_seconds(error: Exception):
+    """
+    Delay the upstream asked for, from a Retry-After header or Gemini's RetryInfo.
+
+    Returns:
+        float: Seconds to wait, or None if the upstream didn't say
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(value)
+                return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+
+    details = getattr(error, "details", None)
+    if details:
+        match = _RETRY_DELAY_PATTERN.search(str(details))
+        if match:
+            return float(match.group(1) or match.group(2))
+    return None
@@ -0,0 +1,44 @@
+from collections import deque
+import time
+
+
+class UpstreamHealth:
+    """
+    Sliding-window call and error counts per upstream, fed by
+    track_upstream / record_upstream_error.
+    """
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._calls = {}
+        self._errors = {}
+
+    def record_call(self, upstream: str):
+        self._append(self._calls, upstream)
+
+    def record_error(self, upstream: str):
+        self._append(self._errors, upstream)
+
+    def error_rate(self, upstream: str) -> tuple:
+        """
+        Returns:
+            tuple: (error rate 0-1, calls in the window)
+        """
+        calls = len(self._prune(self._calls.get(upstream)))
+        errors = len(self._prune(self._errors.get(upstream)))
+        if calls == 0:
+            return 0.0, 0
+        return min(1.0, errors / calls), calls
+
+    def _append(self, events: dict, upstream: str):
+        timestamps = events.setdefault(upstream, deque())
+        timestamps.append(time.monotonic())
+        self._prune(timestamps)
+
+    def _prune(self, timestamps) -> deque:
+        if timestamps is None:
+            return deque()
+        cutoff = time.monotonic() - self.window_seconds
+        while timestamps and timestamps[0] < cutoff:
+            timestamps.popleft()
+        return timestamps
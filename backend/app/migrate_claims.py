@@ -0,0 +1,90 @@
+"""
+Convert stored claims to the current schema version in place.
+
+Schema version 1 stored each formatted result as its Python repr; version
+2 stores it as a native subdocument. The collection is streamed in cursor
+batches and each batch is written back with one bulk_write, so memory use
+doesn't grow with the collection:
+
+    python -m app.migrate_claims --batch-size 500 [--dry-run]
+
+Safe to run while the API is serving (old documents are still readable)
+and safe to re-run: converted documents no longer match the query.
+"""
+from app.core.database import get_async_claims_collection
+from app.repository.claim_repository import CLAIM_SCHEMA_VERSION, parse_legacy_response
+from pymongo import UpdateOne
+import argparse
+import asyncio
+import time
+
+DEFAULT_BATCH_SIZE = 500
+
+# Documents written by earlier schema versions
+OUTDATED = {"$or": [{"schema_version": {"$exists": False}}, {"schema_version": {"$lt": CLAIM_SCHEMA_VERSION}}]}
+
+
+def upgrade(doc: dict) -> dict:
+    """
+    The $set that brings one outdated document to CLAIM_SCHEMA_VERSION.
+
+    A response that isn't a dict repr (e.g. a quick-check verdict) is kept
+    as text; it was never parseable, so only the version changes.
+    """
+    update = {"schema_version": CLAIM_SCHEMA_VERSION}
+    response = doc.get("response")
+    if not isinstance(response, dict):
+        parsed = parse_legacy_response(response)
+        if parsed is not None:
+            update["response"] = parsed
+    return update
+
+
+async def migrate(batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False) -> dict:
+    """
+    Upgrade every outdated claim document.
+
+    Returns:
+        dict: Counts of documents scanned, converted and kept as text
+    """
+    collection = get_async_claims_collection()
+    counts = {"scanned": 0, "converted": 0, "kept_as_text": 0}
+    started = time.perf_counter()
+
+    async def flush(batch: list):
+        if batch and not dry_run:
+            await collection.bulk_write(batch, ordered=False)
+        batch.clear()
+        print(f"[MIGRATE] {counts['scanned']} scanned, {counts['converted']} converted, "
+              f"{counts['kept_as_text']} kept as text ({time.perf_counter() - started:.1f}s)")
+
+    batch = []
+    cursor = collection.find(OUTDATED, {"response": 1, "schema_version": 1}, batch_size=batch_size)
+    async for doc in cursor:
+        update = upgrade(doc)
+        counts["scanned"] += 1
+        if "response" in update:
+            counts["converted"] += 1
+        else:
+            counts["kept_as_text"] += 1
+        # Match the version too, so a document rewritten meanwhile by a save is left alone
+        batch.append(UpdateOne({"_id": doc["_id"], **OUTDATED}, {"$set": update}))
+        if len(batch) >= batch_size:
+            await flush(batch)
+    await flush(batch)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert stored claims to the current schema version")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Documents per cursor batch and bulk write")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    counts = asyncio.run(migrate(args.batch_size, args.dry_run))
+    verb = "Would convert" if args.dry_run else "Converted"
+    print(f"[MIGRATE] {verb} {counts['converted']} of {counts['scanned']} claims to schema version {CLAIM_SCHEMA_VERSION}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,163 @@
-from ..core.database import claims_collection
+from ..core.database import claims_collection, get_async_claims_collection
+from ..core.metrics import track_upstream
+from ..core.response_cache import response_cache
+from ..core.claim_similarity import tokens, shingles, lsh_bands, best_match
+from ..core.metrics import SIMILARITY_SCORES
+from pymongo import ReturnDocument
 from datetime import datetime
+import ast
+import json
 import uuid
 import hashlib
 
+# Version 1 (no schema_version field) stored the formatted result as its
+# Python repr; version 2 stores it as a native subdocument
+CLAIM_SCHEMA_VERSION = 2
+
+# Stored claims sharing an LSH band that are compared per similarity lookup,
+# those sharing the most bands first
+SIMILARITY_MAX_CANDIDATES = 50
+
+
+def hash_claim(claim_text: str) -> str:
+    """
+    Create a hash of the claim for efficient lookup.
+    Normalizes the text before hashing.
+
+    Args:
+        claim_text (str): Claim to hash
+
+    Returns:
+        str: SHA256 hash of normalized claim
+    """
+    # Normalize: lowercase, strip whitespace, remove extra spaces
+    normalized = " ".join(claim_text.lower().strip().split())
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def canonical_claim_hash(structured_claim: dict):
+    """
+    Hash of a structured claim's canonical form: the structured claim text
+    plus its entities and time period, normalized like hash_claim. Phrasings
+    that structure to the same claim share this hash.
+
+    Args:
+        structured_claim (dict): Output of ClaimStructuringService.structure_claim_async
+
+    Returns:
+        str or None: SHA256 hash, or None if there is no structured claim text
+    """
+    claim = " ".join(str((structured_claim or {}).get("claim") or "").lower().split()).rstrip(".!?")
+    if not claim:
+        return None
+    entities = sorted({" ".join(str(entity).lower().split()) for entity in structured_claim.get("entities") or []} - {""})
+    time_period = " ".join(str(structured_claim.get("time_period") or "").lower().split())
+    canonical = json.dumps([claim, entities, time_period], ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def exact_claim_query(claim_hashes: list) -> dict:
+    """Match claims stored under any of these hashes, or that list one as an alias."""
+    return {"$or": [{"claim_hash": {"$in": claim_hashes}}, {"alias_hashes": {"$in": claim_hashes}}]}
+
+
+def preferred_claim_doc(docs: list, claim_hash: str):
+    """
+    The document that answers a claim hash among those exact_claim_query
+    found: the claim's own if it is stored, otherwise the most recently
+    updated one listing it as an alias.
+    """
+    for doc in docs:
+        if doc.get("claim_hash") == claim_hash:
+            return doc
+    return max(docs, key=lambda doc: doc.get("updated_at") or datetime.min, default=None)
+
+
+def cached_hashes(claim_doc: dict) -> list:
+    """Every raw-text hash a stored claim answers: its own and its aliases."""
+    return [claim_doc["claim_hash"], *(claim_doc.get("alias_hashes") or [])]
+
+
+def parse_legacy_response(response_text: str):
+    """
+    Parse a formatted result stored by schema version 1 as a Python repr.
+
+    Args:
+        response_text (str): str() of the formatted response dict
+
+    Returns:
+        dict or None: The formatted response, or None if the text isn't a dict repr
+    """
+    if not isinstance(response_text, str) or not response_text.startswith("{"):
+        return None
+    try:
+        response = ast.literal_eval(response_text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return response if isinstance(response, dict) else None
+
+
+def build_claim_doc(claim_text: str, response, structured_data: dict = None, research_data: dict = None) -> dict:
+    """Build the MongoDB document stored for a fact-checked claim."""
+    words = tokens(claim_text)
+    return {
+        "_id": str(uuid.uuid4()),
+        "schema_version": CLAIM_SCHEMA_VERSION,
+        "claim_hash": hash_claim(claim_text),
+        "prompt": claim_text,
+        "tokens": words,
+        "lsh_bands": lsh_bands(shingles(words)),
+        "canonical_hash": canonical_claim_hash(structured_data),
+        "response": response,
+        "structured_data": structured_data or {},
+        "research_data": research_data or {},
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+
+
+def upsert_claim_doc(claim_doc: dict) -> tuple:
+    """
+    Filter and update that store a claim document, replacing the stored
+    result if the claim was checked before (claim_hash is unique).
+    """
+    on_insert = {"_id": claim_doc["_id"], "created_at": claim_doc["created_at"]}
+    fields = {key: value for key, value in claim_doc.items() if key not in on_insert}
+    return {"claim_hash": claim_doc["claim_hash"]}, {"$set": fields, "$setOnInsert": on_insert}
+
+
+def _release_alias(saved_doc: dict) -> tuple:
+    """Filter and update that drop a saved claim's hash from other claims' aliases."""
+    claim_hash = saved_doc["claim_hash"]
+    return {"alias_hashes": claim_hash, "_id": {"$ne": saved_doc["_id"]}}, {"$pull": {"alias_hashes": claim_hash}}
+
+
+def _invalidate(claim_hashes: list):
+    for claim_hash in claim_hashes:
+        response_cache.invalidate(claim_hash)
+
+
+def similar_claims_pipeline(bands: list, limit: int = SIMILARITY_MAX_CANDIDATES) -> list:
+    """
+    Aggregation pipeline for near-duplicate candidates: stored claims sharing
+    any of `bands`, ranked by how many they share (then newest first), so
+    claims that only collide on a popular band can't crowd out the real match.
+
+    Args:
+        bands (list): LSH bands of the claim being looked up
+        limit (int): Candidates to return
+
+    Returns:
+        list: Pipeline stages
+    """
+    return [
+        {"$match": {"lsh_bands": {"$in": bands}}},
+        {"$addFields": {"shared_bands": {"$size": {"$setIntersection": ["$lsh_bands", bands]}}}},
+        {"$sort": {"shared_bands": -1, "updated_at": -1}},
+        {"$limit": limit},
+        {"$project": {"shared_bands": 0}}
+    ]
+
 
 class ClaimRepository:
     def __init__(self):
@@ -22,7 +177,7 @@ class ClaimRepository:
         claim_hash = self._hash_claim(claim_text)
 
         try:
-            cached = self.collection.find_one({"claim_hash": claim_hash})
+            cached = preferred_claim_doc(list(self.collection.find(exact_claim_query([claim_hash]))), claim_hash)
             if cached:
                 print(f"Cache hit for claim: {claim_text[:50]}...")
             return cached
@@ -30,36 +185,58 @@ class ClaimRepository:
             print(f"Error checking cache: {str(e)}")
             return None
 
-    def save(self, claim_text: str, response_text: str, structured_data: dict = None, research_data: dict = None):
+    def save(self, claim_text: str, response, structured_data: dict = None, research_data: dict = None):
         """
-        Save the claim, response, and research data into MongoDB.
+        Save the claim, response, and research data into MongoDB,
+        replacing the stored result if the claim was saved before.
 
         Args:
             claim_text (str): Original claim
-            response_text (str): Formatted fact-check result
+            response (dict or str): Formatted fact-check result, stored as a subdocument
             structured_data (dict): Structured claim data
             research_data (dict): Perplexity research results
         """
-        claim_hash = self._hash_claim(claim_text)
+        claim_doc = build_claim_doc(claim_text, response, structured_data, research_data)
 
-        claim_doc = {
-            "_id": str(uuid.uuid4()),
-            "claim_hash": claim_hash,
-            "prompt": claim_text,
-            "response": response_text,
-            "structured_data": structured_data or {},
-            "research_data": research_data or {},
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
+        claim_filter, update = upsert_claim_doc(claim_doc)
 
         try:
-            self.collection.insert_one(claim_doc)
+            saved = self.collection.find_one_and_update(
+                claim_filter, update, projection={"_id": 1, "claim_hash": 1, "alias_hashes": 1},
+                upsert=True, return_document=ReturnDocument.AFTER
+            )
+            # The claim has its own document now: stop answering it as another claim's alias
+            self.collection.update_many(*_release_alias(saved))
             print(f"Saved claim to database: {claim_text[:50]}...")
-            return claim_doc["_id"]
+            _invalidate(cached_hashes(saved))
+            return saved["_id"]
         except Exception as e:
             print(f"Error saving claim: {str(e)}")
             return None
+        finally:
+            response_cache.invalidate(claim_doc["claim_hash"])
+
+    def delete_claim(self, claim_text: str) -> int:
+        """
+        Delete every stored result for a claim.
+
+        Args:
+            claim_text (str): Claim to forget
+
+        Returns:
+            int: Number of documents deleted
+        """
+        claim_hash = self._hash_claim(claim_text)
+        try:
+            docs = list(self.collection.find({"claim_hash": claim_hash}, {"claim_hash": 1, "alias_hashes": 1}))
+            deleted = self.collection.delete_many({"claim_hash": claim_hash}).deleted_count
+            # The claim may also be answered as another claim's alias
+            self.collection.update_many({"alias_hashes": claim_hash}, {"$pull": {"alias_hashes": claim_hash}})
+            for doc in docs:
+                _invalidate(cached_hashes(doc))
+            return deleted
+        finally:
+            response_cache.invalidate(claim_hash)
 
     def _hash_claim(self, claim_text: str) -> str:
         """
@@ -72,9 +249,7 @@ class ClaimRepository:
         Returns:
             str: SHA256 hash of normalized claim
         """
-        # Normalize: lowercase, strip whitespace, remove extra spaces
-        normalized = " ".join(claim_text.lower().strip().split())
-        return hashlib.sha256(normalized.encode()).hexdigest()
+        return hash_claim(claim_text)
 
     def get_by_id(self, claim_id: str):
         """Get claim by ID."""
@@ -99,3 +274,211 @@ class ClaimRepository:
         except Exception as e:
             print(f"Error retrieving recent claims: {str(e)}")
             return []
+
+
+class AsyncClaimRepository:
+    """
+    Async counterpart of ClaimRepository used by the fact-check pipeline.
+    Queries run on the event loop instead of tying up executor threads.
+    """
+
+    @property
+    def collection(self):
+        return get_async_claims_collection()
+
+    async def find_cached_claim(self, claim_text: str):
+        """
+        Check if an exact claim already exists in the database.
+
+        Args:
+            claim_text (str): The claim to search for
+
+        Returns:
+            dict or None: Cached claim data if found, None otherwise
+        """
+        claim_hash = self._hash_claim(claim_text)
+
+        try:
+            async with track_upstream("mongodb", "find_one"):
+                cursor = self.collection.find(exact_claim_query([claim_hash]))
+                cached = preferred_claim_doc(await cursor.to_list(length=None), claim_hash)
+            if cached:
+                print(f"Cache hit for claim: {claim_text[:50]}...")
+            return cached
+        except Exception as e:
+            print(f"Error checking cache: {str(e)}")
+            return None
+
+    async def find_cached_claims(self, claim_hashes: list) -> dict:
+        """
+        Look up many claims in a single query.
+
+        Args:
+            claim_hashes (list): Claim hashes (see hash_claim)
+
+        Returns:
+            dict: claim_hash -> cached claim, for the hashes that were found
+        """
+        if not claim_hashes:
+            return {}
+
+        try:
+            async with track_upstream("mongodb", "find_many"):
+                cursor = self.collection.find(exact_claim_query(list(claim_hashes)))
+                docs = await cursor.to_list(length=None)
+        except Exception as e:
+            print(f"Error checking cache: {str(e)}")
+            return {}
+
+        wanted = set(claim_hashes)
+        matches = {}
+        for doc in docs:
+            for claim_hash in cached_hashes(doc):
+                if claim_hash in wanted:
+                    matches.setdefault(claim_hash, []).append(doc)
+        cached = {claim_hash: preferred_claim_doc(matches[claim_hash], claim_hash) for claim_hash in matches}
+        if cached:
+            print(f"Cache hits for {len(cached)} of {len(claim_hashes)} claims")
+        return cached
+
+    async def save(self, claim_text: str, response, structured_data: dict = None, research_data: dict = None):
+        """
+        Save the claim, response, and research data into MongoDB,
+        replacing the stored result if the claim was saved before.
+
+        Args:
+            claim_text (str): Original claim
+            response (dict or str): Formatted fact-check result, stored as a subdocument
+            structured_data (dict): Structured claim data
+            research_data (dict): Perplexity research results
+        """
+        claim_doc = build_claim_doc(claim_text, response, structured_data, research_data)
+
+        claim_filter, update = upsert_claim_doc(claim_doc)
+
+        try:
+            async with track_upstream("mongodb", "upsert"):
+                saved = await self.collection.find_one_and_update(
+                    claim_filter, update, projection={"_id": 1, "claim_hash": 1, "alias_hashes": 1},
+                    upsert=True, return_document=ReturnDocument.AFTER
+                )
+                # The claim has its own document now: stop answering it as another claim's alias
+                await self.collection.update_many(*_release_alias(saved))
+            print(f"Saved claim to database: {claim_text[:50]}...")
+            _invalidate(cached_hashes(saved))
+            return saved["_id"]
+        except Exception as e:
+            print(f"Error saving claim: {str(e)}")
+            return None
+        finally:
+            response_cache.invalidate(claim_doc["claim_hash"])
+
+    async def delete_claim(self, claim_text: str) -> int:
+        """
+        Delete every stored result for a claim.
+
+        Args:
+            claim_text (str): Claim to forget
+
+        Returns:
+            int: Number of documents deleted
+        """
+        claim_hash = self._hash_claim(claim_text)
+        try:
+            async with track_upstream("mongodb", "delete_many"):
+                cursor = self.collection.find({"claim_hash": claim_hash}, {"claim_hash": 1, "alias_hashes": 1})
+                docs = await cursor.to_list(length=None)
+                result = await self.collection.delete_many({"claim_hash": claim_hash})
+                # The claim may also be answered as another claim's alias
+                await self.collection.update_many({"alias_hashes": claim_hash}, {"$pull": {"alias_hashes": claim_hash}})
+            for doc in docs:
+                _invalidate(cached_hashes(doc))
+            return result.deleted_count
+        finally:
+            response_cache.invalidate(claim_hash)
+
+    async def find_by_canonical_hash(self, canonical_hash: str):
+        """
+        Find a stored claim whose structured claim has this canonical hash
+        (see canonical_claim_hash).
+
+        Returns:
+            dict or None: Most recently updated matching claim
+        """
+        if not canonical_hash:
+            return None
+        try:
+            async with track_upstream("mongodb", "find_canonical"):
+                return await self.collection.find_one({"canonical_hash": canonical_hash}, sort=[("updated_at", -1)])
+        except Exception as e:
+            print(f"Error checking canonical cache: {str(e)}")
+            return None
+
+    async def add_alias(self, claim_id: str, claim_text: str):
+        """
+        Record that another phrasing resolves to a stored claim, so exact
+        lookups of that phrasing find it without structuring.
+        """
+        claim_hash = self._hash_claim(claim_text)
+        try:
+            async with track_upstream("mongodb", "add_alias"):
+                await self.collection.update_one({"_id": claim_id}, {"$addToSet": {"alias_hashes": claim_hash}})
+        except Exception as e:
+            print(f"Error saving claim alias: {str(e)}")
+
+    async def find_similar_claim(self, claim_text: str, threshold: float = None):
+        """
+        Find a stored claim that says the same thing in different words
+        (see app/core/claim_similarity.py).
+
+        Args:
+            claim_text (str): The claim to search for
+            threshold (float): Minimum similarity (defaults to SIMILARITY_THRESHOLD)
+
+        Returns:
+            tuple: (cached claim, similarity), or (None, 0.0) if nothing is similar enough
+        """
+        words = tokens(claim_text)
+        bands = lsh_bands(shingles(words))
+        if not bands:
+            return None, 0.0
+
+        try:
+            async with track_upstream("mongodb", "find_similar"):
+                cursor = await self.collection.aggregate(similar_claims_pipeline(bands))
+                candidates = await cursor.to_list(length=SIMILARITY_MAX_CANDIDATES)
+        except Exception as e:
+            print(f"Error checking similarity cache: {str(e)}")
+            return None, 0.0
+
+        match, score = best_match(words, candidates, threshold)
+        if candidates:
+            SIMILARITY_SCORES.observe(score)
+        if match:
+            print(f"Similar claim hit ({score:.2f}): {claim_text[:50]}... ~ {match.get('prompt', '')[:50]}...")
+            return match, score
+        return None, 0.0
+
+    def _hash_claim(self, claim_text: str) -> str:
+        return hash_claim(claim_text)
+
+    async def get_by_id(self, claim_id: str):
+        """Get claim by ID."""
+        return await self.collection.find_one({"_id": claim_id})
+
+    async def get_recent_claims(self, limit: int = 10):
+        """
+        Get recent claims, sorted by creation date.
+
+        Args:
+            limit (int): Number of recent claims to retrieve
+
+        Returns:
+            list: Recent claims
+        """
+        try:
+            cursor = self.collection.find().sort("created_at", -1).limit(limit)
+            return await cursor.to_list(length=limit)
+        except Exception as e:
+            print(f"Error retrieving recent claims: {str(e)}")
+            return []
@@ -0,0 +1,253 @@
+from ..core.database import get_async_jobs_collection, get_async_media_bucket
+from ..core.metrics import track_upstream
+from pymongo import ReturnDocument
+from datetime import datetime, timedelta
+import uuid
+
+# Job lifecycle: queued -> running -> succeeded, or back to queued for a
+# retry, or dead_letter once every attempt has failed
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_DEAD_LETTER = "dead_letter"
+TERMINAL_JOB_STATUSES = (JOB_SUCCEEDED, JOB_DEAD_LETTER)
+
+
+class AsyncJobRepository:
+    """
+    MongoDB-backed queue of background fact-check jobs.
+
+    A worker claims a job by atomically setting it to running with a lease
+    (visibility timeout). The worker renews the lease while it works. If the
+    worker dies, the lease expires and any worker may claim the job again.
+    """
+
+    @property
+    def collection(self):
+        return get_async_jobs_collection()
+
+    async def ensure_indexes(self):
+        """Create the indexes used to claim and reap jobs."""
+        await self.collection.create_index([("status", 1), ("available_at", 1)])
+        await self.collection.create_index([("status", 1), ("lease_expires_at", 1)])
+
+    async def create(self, kind: str, payload: dict, user_id: str, max_attempts: int) -> dict:
+        """
+        Queue a new job.
+
+        Args:
+            kind (str): Job type ("text", "multimodal", "url")
+            payload (dict): Arguments for the job handler
+            user_id (str): Owner of the job
+            max_attempts (int): Attempts before the job is dead-lettered
+
+        Returns:
+            dict: The stored job document
+        """
+        now = datetime.utcnow()
+        job = {
+            "_id": str(uuid.uuid4()),
+            "kind": kind,
+            "user_id": user_id,
+            "payload": payload,
+            "status": JOB_QUEUED,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "available_at": now,
+            "lease_expires_at": None,
+            "worker_id": None,
+            "result": None,
+            "last_error": None,
+            "errors": [],
+            "created_at": now,
+            "updated_at": now,
+            "started_at": None,
+            "finished_at": None
+        }
+        async with track_upstream("mongodb", "insert_one"):
+            await self.collection.insert_one(job)
+        return job
+
+    async def get(self, job_id: str):
+        """Get a job by ID."""
+        async with track_upstream("mongodb", "find_one"):
+            return await self.collection.find_one({"_id": job_id})
+
+    async def count_queued(self) -> int:
+        """Number of jobs waiting for a worker (including scheduled retries)."""
+        async with track_upstream("mongodb", "count_documents"):
+            return await self.collection.count_documents({"status": JOB_QUEUED})
+
+    async def claim_next(self, worker_id: str, visibility_timeout: float):
+        """
+        Atomically claim the oldest runnable job: a queued job whose retry
+        delay has passed, or a running job whose lease has expired.
+
+        Args:
+            worker_id (str): Claiming worker
+            visibility_timeout (float): Lease length in seconds
+
+        Returns:
+            dict or None: The claimed job (attempts already incremented)
+        """
+        now = datetime.utcnow()
+        async with track_upstream("mongodb", "find_one_and_update"):
+            return await self.collection.find_one_and_update(
+                {"$or": [
+                    {"status": JOB_QUEUED, "available_at": {"$lte": now}},
+                    {
+                        "status": JOB_RUNNING,
+                        "lease_expires_at": {"$lte": now},
+                        "$expr": {"$lt": ["$attempts", "$max_attempts"]}
+                    }
+                ]},
+                {
+                    "$set": {
+                        "status": JOB_RUNNING,
+                        "worker_id": worker_id,
+                        "lease_expires_at": now + timedelta(seconds=visibility_timeout),
+                        "started_at": now,
+                        "updated_at": now
+                    },
+                    "$inc": {"attempts": 1}
+                },
+                sort=[("available_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+
+    async def extend_lease(self, job_id: str, worker_id: str, visibility_timeout: float) -> bool:
+        """
+        Push back the lease of a job this worker is still running.
+
+        Returns:
+            bool: False if the worker no longer holds the job
+        """
+        now = datetime.utcnow()
+        async with track_upstream("mongodb", "update_one"):
+            result = await self.collection.update_one(
+                {"_id": job_id, "worker_id": worker_id, "status": JOB_RUNNING},
+                {"$set": {"lease_expires_at": now + timedelta(seconds=visibility_timeout), "updated_at": now}}
+            )
+        return result.matched_count == 1
+
+    async def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        """
+        Store a job's result.
+
+        Returns:
+            bool: False if the worker no longer holds the job (its lease expired)
+        """
+        now = datetime.utcnow()
+        async with track_upstream("mongodb", "update_one"):
+            update = await self.collection.update_one(
+                {"_id": job_id, "worker_id": worker_id, "status": JOB_RUNNING},
+                {"$set": {
+                    "status": JOB_SUCCEEDED,
+                    "result": result,
+                    "lease_expires_at": None,
+                    "updated_at": now,
+                    "finished_at": now
+                }}
+            )
+        return update.matched_count == 1
+
+    async def fail(self, job: dict, worker_id: str, error: str, retry_delay: float):
+        """
+        Record a failed attempt. The job is retried after `retry_delay`
+        seconds, or dead-lettered if it has no attempts left.
+
+        Args:
+            job (dict): The job as claimed
+            worker_id (str): Worker that ran the attempt
+            error (str): Failure message
+            retry_delay (float): Seconds before the job becomes runnable again
+
+        Returns:
+            str or None: The job's new status, or None if the worker no longer holds it
+        """
+        now = datetime.utcnow()
+        retry = job["attempts"] < job["max_attempts"]
+        update = {
+            "status": JOB_QUEUED if retry else JOB_DEAD_LETTER,
+            "last_error": error,
+            "lease_expires_at": None,
+            "updated_at": now
+        }
+        if retry:
+            update["available_at"] = now + timedelta(seconds=retry_delay)
+        else:
+            update["finished_at"] = now
+
+        async with track_upstream("mongodb", "update_one"):
+            result = await self.collection.update_one(
+                {"_id": job["_id"], "worker_id": worker_id, "status": JOB_RUNNING},
+                {
+                    "$set": update,
+                    "$push": {"errors": {"attempt": job["attempts"], "error": error, "at": now}}
+                }
+            )
+        return update["status"] if result.matched_count == 1 else None
+
+    async def reap_expired(self) -> list:
+        """
+        Dead-letter running jobs whose lease expired on their last attempt
+        (the worker died or hung and no attempts are left).
+
+        Returns:
+            list: The dead-lettered jobs
+        """
+        now = datetime.utcnow()
+        query = {
+            "status": JOB_RUNNING,
+            "lease_expires_at": {"$lte": now},
+            "$expr": {"$gte": ["$attempts", "$max_attempts"]}
+        }
+        reaped = []
+        async with track_upstream("mongodb", "find_many"):
+            expired = await self.collection.find(query).to_list(length=None)
+        for job in expired:
+            async with track_upstream("mongodb", "update_one"):
+                result = await self.collection.update_one(
+                    {"_id": job["_id"], "status": JOB_RUNNING, "lease_expires_at": job["lease_expires_at"]},
+                    {
+                        "$set": {
+                            "status": JOB_DEAD_LETTER,
+                            "last_error": "Visibility timeout expired",
+                            "lease_expires_at": None,
+                            "updated_at": now,
+                            "finished_at": now
+                        },
+                        "$push": {"errors": {"attempt": job["attempts"], "error": "Visibility timeout expired", "at": now}}
+                    }
+                )
+            if result.matched_count == 1:
+                reaped.append(job)
+        return reaped
+
+    async def store_media(self, file_content: bytes, filename: str, content_type: str):
+        """
+        Store an uploaded file in GridFS so any worker can process it.
+
+        Returns:
+            ObjectId: GridFS file ID
+        """
+        async with track_upstream("mongodb", "gridfs_upload"):
+            return await get_async_media_bucket().upload_from_stream(
+                filename or "upload",
+                file_content,
+                metadata={"content_type": content_type}
+            )
+
+    async def load_media(self, file_id) -> bytes:
+        """Read an uploaded file back from GridFS."""
+        async with track_upstream("mongodb", "gridfs_download"):
+            stream = await get_async_media_bucket().open_download_stream(file_id)
+            return await stream.read()
+
+    async def delete_media(self, file_id):
+        """Remove an uploaded file once its job is finished."""
+        try:
+            async with track_upstream("mongodb", "gridfs_delete"):
+                await get_async_media_bucket().delete(file_id)
+        except Exception as e:
+            print(f"Error deleting job media {file_id}: {str(e)}")
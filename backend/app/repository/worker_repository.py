@@ -0,0 +1,46 @@
+from ..core.database import get_async_workers_collection
+from ..core.metrics import track_upstream
+from datetime import datetime, timedelta
+
+
+class AsyncWorkerRepository:
+    """Heartbeats of running job workers, used to size the job backlog."""
+
+    @property
+    def collection(self):
+        return get_async_workers_collection()
+
+    async def heartbeat(self, worker_id: str, concurrency: int, active: int, draining: bool, started_at: datetime):
+        """
+        Publish a worker's liveness and current load.
+
+        Args:
+            worker_id (str): Worker identifier
+            concurrency (int): Jobs the worker can run at once
+            active (int): Jobs it is running now
+            draining (bool): Whether it has stopped taking new jobs
+            started_at (datetime): When the worker started
+        """
+        async with track_upstream("mongodb", "update_one"):
+            await self.collection.update_one(
+                {"_id": worker_id},
+                {"$set": {
+                    "concurrency": concurrency,
+                    "active": active,
+                    "draining": draining,
+                    "started_at": started_at,
+                    "heartbeat_at": datetime.utcnow()
+                }},
+                upsert=True
+            )
+
+    async def remove(self, worker_id: str):
+        """Deregister a worker that has shut down."""
+        async with track_upstream("mongodb", "delete_one"):
+            await self.collection.delete_one({"_id": worker_id})
+
+    async def live_workers(self, ttl_seconds: float) -> list:
+        """Workers that sent a heartbeat within the last `ttl_seconds`."""
+        cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+        async with track_upstream("mongodb", "find_many"):
+            return await self.collection.find({"heartbeat_at": {"$gte": cutoff}}).to_list(length=None)
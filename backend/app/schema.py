@@ -0,0 +1,393 @@
+"""
+Declarative indexes and data migrations for the MongoDB collections.
+
+INDEXES lists the indexes each collection's queries need and MIGRATIONS
+the one-off data conversions, in order. ensure_schema() applies whatever
+is missing; it is idempotent, runs in the background at API startup
+(SCHEMA_MIGRATE_ON_STARTUP) and from the command line:
+
+    python -m app.schema status               # applied / pending migrations, missing indexes
+    python -m app.schema up                   # run pending migrations, create missing indexes
+    python -m app.schema up --dedupe          # ...deleting duplicate claims a unique index reports
+    python -m app.schema explain --slow-ms 100
+
+`explain` runs the explain command for every query shape in QUERY_SHAPES
+and flags collection scans and in-memory sorts, then lists recent slow
+operations from the database profiler when it is enabled.
+"""
+from app.core.database import get_async_db, DATABASE_NAME
+from app.migrate_claims import migrate as convert_claims, DEFAULT_BATCH_SIZE
+from app.core.claim_similarity import tokens, shingles, lsh_bands
+from app.repository.claim_repository import canonical_claim_hash, exact_claim_query
+from pymongo import IndexModel, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import os
+import socket
+import time
+
+# A migration left "running" this long is assumed abandoned by a crashed process
+MIGRATION_LOCK_TIMEOUT = timedelta(hours=1)
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+
+# Placeholder value for explaining lookups by hash; the plan doesn't depend on it
+SAMPLE_HASH = "0" * 64
+
+# Name used to mark which process is running a migration
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def dedupe_claim_hashes(db, dry_run: bool = True) -> dict:
+    """
+    Keep only the most recently updated document per claim_hash, so the
+    unique index can be built over a collection that predates it.
+
+    Args:
+        dry_run (bool): Only report the duplicates; deleting them takes an
+            explicit `python -m app.schema up --dedupe`
+
+    Returns:
+        dict: Claim hashes with duplicates and documents deleted (or that would be)
+    """
+    pipeline = [
+        {"$sort": {"claim_hash": 1, "updated_at": -1}},
+        {"$group": {"_id": "$claim_hash", "keep": {"$first": "$_id"}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+    groups = 0
+    deleted = 0
+    cursor = await db["claims"].aggregate(pipeline, allowDiskUse=True)
+    async for group in cursor:
+        duplicates = [claim_id for claim_id in group["ids"] if claim_id != group["keep"]]
+        groups += 1
+        if dry_run:
+            deleted += len(duplicates)
+            print(f"[SCHEMA] claim_hash {group['_id']}: keeping {group['keep']}, duplicates {duplicates}")
+            continue
+        result = await db["claims"].delete_many({"_id": {"$in": duplicates}})
+        deleted += result.deleted_count
+    verb = "Would remove" if dry_run else "Removed"
+    print(f"[SCHEMA] {verb} {deleted} duplicate claims across {groups} claim hashes")
+    return {"claim_hashes": groups, "deleted": deleted, "dry_run": dry_run}
+
+
+async def convert_claims_to_v2(db) -> dict:
+    return await convert_claims()
+
+
+async def backfill_lsh_bands(db) -> dict:
+    """
+    Compute similarity tokens and LSH bands for claims saved before they
+    existed, or whose bands were built from unordered words.
+    """
+    backfilled = 0
+    batch = []
+    cursor = db["claims"].find({"tokens": {"$exists": False}}, {"prompt": 1}, batch_size=DEFAULT_BATCH_SIZE)
+    async for doc in cursor:
+        words = tokens(doc.get("prompt") or "")
+        batch.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"tokens": words, "lsh_bands": lsh_bands(shingles(words))}, "$unset": {"shingles": ""}}
+        ))
+        if len(batch) >= DEFAULT_BATCH_SIZE:
+            await db["claims"].bulk_write(batch, ordered=False)
+            backfilled += len(batch)
+            batch = []
+    if batch:
+        await db["claims"].bulk_write(batch, ordered=False)
+        backfilled += len(batch)
+    print(f"[SCHEMA] Backfilled LSH bands for {backfilled} claims")
+    return {"backfilled": backfilled}
+
+
+async def backfill_canonical_hashes(db) -> dict:
+    """Compute canonical claim hashes from the stored structured claims."""
+    backfilled = 0
+    batch = []
+    cursor = db["claims"].find({"canonical_hash": {"$exists": False}}, {"structured_data": 1}, batch_size=DEFAULT_BATCH_SIZE)
+    async for doc in cursor:
+        canonical_hash = canonical_claim_hash(doc.get("structured_data"))
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"canonical_hash": canonical_hash}}))
+        if len(batch) >= DEFAULT_BATCH_SIZE:
+            await db["claims"].bulk_write(batch, ordered=False)
+            backfilled += len(batch)
+            batch = []
+    if batch:
+        await db["claims"].bulk_write(batch, ordered=False)
+        backfilled += len(batch)
+    print(f"[SCHEMA] Backfilled canonical hashes for {backfilled} claims")
+    return {"backfilled": backfilled}
+
+
+# Indexes per collection. `on_duplicates(db, dry_run)` runs when a unique
+# index can't be built because of existing duplicates. It only reports them
+# unless ensure_indexes was asked to dedupe; then the build is retried once.
+INDEXES = {
+    "claims": [
+        {"keys": [("claim_hash", 1)], "name": "claim_hash_unique", "unique": True, "on_duplicates": dedupe_claim_hashes},
+        {"keys": [("created_at", -1)], "name": "created_at_desc"},
+        {"keys": [("lsh_bands", 1)], "name": "lsh_bands"},
+        {"keys": [("alias_hashes", 1)], "name": "alias_hashes"},
+        {"keys": [("canonical_hash", 1), ("updated_at", -1)], "name": "canonical_hash_updated_at"}
+    ]
+}
+
+# Data migrations, applied once each in this order: (id, description, coroutine function(db))
+MIGRATIONS = [
+    ("0001_claims_schema_v2", "Store claim results as subdocuments (schema version 2)", convert_claims_to_v2),
+    ("0002_claims_lsh_bands", "Add similarity tokens and LSH bands to existing claims", backfill_lsh_bands),
+    ("0003_claims_canonical_hash", "Add canonical claim hashes to existing claims", backfill_canonical_hashes),
+    ("0004_claims_bigram_lsh_bands", "Rebuild LSH bands from ordered word bigrams", backfill_lsh_bands)
+]
+
+# Queries the repositories run, for `explain`
+QUERY_SHAPES = [
+    {"name": "claim lookup", "collection": "claims", "filter": exact_claim_query([SAMPLE_HASH])},
+    {"name": "batch claim lookup", "collection": "claims", "filter": exact_claim_query([SAMPLE_HASH, SAMPLE_HASH[::-1]])},
+    {"name": "canonical claim lookup", "collection": "claims", "filter": {"canonical_hash": SAMPLE_HASH},
+     "sort": {"updated_at": -1}, "limit": 1},
+    {"name": "similar claim lookup", "collection": "claims", "filter": {"lsh_bands": {"$in": [f"0:{SAMPLE_HASH[:16]}"]}}},
+    {"name": "recent claims", "collection": "claims", "filter": {}, "sort": {"created_at": -1}, "limit": 10}
+]
+
+
+def _index_model(spec: dict) -> IndexModel:
+    options = {key: value for key, value in spec.items() if key not in ("keys", "on_duplicates")}
+    return IndexModel(spec["keys"], **options)
+
+
+async def ensure_indexes(db, dedupe: bool = False) -> list:
+    """
+    Create every declared index that doesn't exist yet.
+
+    Args:
+        dedupe (bool): Let `on_duplicates` delete the documents blocking a
+            unique index; otherwise they are listed and the index is skipped
+
+    Returns:
+        list: Names of the indexes created
+    """
+    created = []
+    for collection_name, specs in INDEXES.items():
+        collection = db[collection_name]
+        existing = {index["name"] async for index in await collection.list_indexes()}
+        for spec in specs:
+            if spec["name"] in existing:
+                continue
+            started = time.perf_counter()
+            try:
+                await collection.create_indexes([_index_model(spec)])
+            except (DuplicateKeyError, OperationFailure) as e:
+                if getattr(e, "code", None) != 11000 or spec.get("on_duplicates") is None:
+                    print(f"[SCHEMA] Could not create index {collection_name}.{spec['name']}: {str(e)}")
+                    continue
+                await spec["on_duplicates"](db, dry_run=not dedupe)
+                if not dedupe:
+                    print(f"[SCHEMA] ERROR: unique index {collection_name}.{spec['name']} not created because of "
+                          f"the duplicates listed above. Nothing was deleted; review them and run "
+                          f"`python -m app.schema up --dedupe` to keep the newest of each")
+                    continue
+                await collection.create_indexes([_index_model(spec)])
+            created.append(f"{collection_name}.{spec['name']}")
+            print(f"[SCHEMA] Created index {collection_name}.{spec['name']} in {time.perf_counter() - started:.1f}s")
+    return created
+
+
+async def _claim_migration(migrations, migration_id: str) -> bool:
+    """Record that this process is running a migration; False if it is done or running elsewhere."""
+    now = datetime.utcnow()
+    try:
+        await migrations.insert_one({"_id": migration_id, "status": "running", "owner": _OWNER, "started_at": now})
+        return True
+    except DuplicateKeyError:
+        # Take over a run whose process died without finishing it
+        abandoned = await migrations.find_one_and_update(
+            {"_id": migration_id, "status": "running", "started_at": {"$lt": now - MIGRATION_LOCK_TIMEOUT}},
+            {"$set": {"owner": _OWNER, "started_at": now}}
+        )
+        return abandoned is not None
+
+
+async def run_migrations(db) -> list:
+    """
+    Apply pending migrations in order. A failed migration is released so
+    the next run retries it, and later migrations wait for it.
+
+    Returns:
+        list: Ids of the migrations applied
+    """
+    migrations = db[MIGRATIONS_COLLECTION]
+    applied = []
+    for migration_id, description, migrate in MIGRATIONS:
+        if not await _claim_migration(migrations, migration_id):
+            done = await migrations.find_one({"_id": migration_id, "status": "done"})
+            if done is None:
+                print(f"[SCHEMA] Migration {migration_id} is running in another process")
+                break
+            continue
+
+        print(f"[SCHEMA] Applying {migration_id}: {description}")
+        started = time.perf_counter()
+        try:
+            result = await migrate(db)
+        except Exception as e:
+            print(f"[SCHEMA] Migration {migration_id} failed: {str(e)}")
+            await migrations.delete_one({"_id": migration_id, "owner": _OWNER})
+            break
+        await migrations.update_one(
+            {"_id": migration_id},
+            {"$set": {"status": "done", "finished_at": datetime.utcnow(), "result": result}}
+        )
+        applied.append(migration_id)
+        print(f"[SCHEMA] Applied {migration_id} in {time.perf_counter() - started:.1f}s")
+    return applied
+
+
+async def ensure_schema(dedupe: bool = False) -> dict:
+    """
+    Run pending migrations, then create missing indexes. Duplicates that
+    block a unique index are only deleted with `dedupe`.
+    """
+    db = get_async_db()
+    applied = await run_migrations(db)
+    created = await ensure_indexes(db, dedupe=dedupe)
+    return {"migrations_applied": applied, "indexes_created": created}
+
+
+async def schema_status() -> dict:
+    """Applied and pending migrations, and declared indexes that are missing."""
+    db = get_async_db()
+    records = {record["_id"]: record async for record in db[MIGRATIONS_COLLECTION].find()}
+    migrations = {
+        migration_id: records.get(migration_id, {}).get("status", "pending")
+        for migration_id, _, _ in MIGRATIONS
+    }
+    missing = []
+    for collection_name, specs in INDEXES.items():
+        existing = {index["name"] async for index in await db[collection_name].list_indexes()}
+        missing += [f"{collection_name}.{spec['name']}" for spec in specs if spec["name"] not in existing]
+    return {"migrations": migrations, "missing_indexes": missing}
+
+
+def _plan_stages(plan: dict) -> list:
+    """Stage names of a query plan, outermost first."""
+    if not plan:
+        return []
+    # Slot-based engine plans wrap the classic plan tree in "queryPlan"
+    plan = plan.get("queryPlan", plan)
+    stages = [plan.get("stage", "?")]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+async def explain_queries() -> list:
+    """
+    Explain each query shape and flag plans that scan the collection or sort in memory.
+
+    Returns:
+        list: One report dict per query shape
+    """
+    db = get_async_db()
+    reports = []
+    for shape in QUERY_SHAPES:
+        find = {"find": shape["collection"], "filter": shape["filter"]}
+        if "sort" in shape:
+            find["sort"] = shape["sort"]
+        if "limit" in shape:
+            find["limit"] = shape["limit"]
+        explained = await db.command({"explain": find, "verbosity": "executionStats"})
+        stages = _plan_stages(explained.get("queryPlanner", {}).get("winningPlan", {}))
+        stats = explained.get("executionStats", {})
+        problems = []
+        if "COLLSCAN" in stages:
+            problems.append("collection scan (missing index)")
+        if "SORT" in stages:
+            problems.append("in-memory sort")
+        reports.append({
+            "name": shape["name"],
+            "plan": " <- ".join(stages),
+            "millis": stats.get("executionTimeMillis"),
+            "keys_examined": stats.get("totalKeysExamined"),
+            "docs_examined": stats.get("totalDocsExamined"),
+            "problems": problems
+        })
+    return reports
+
+
+async def slow_queries(slow_ms: int, limit: int = 20):
+    """
+    Recent operations on the declared collections slower than `slow_ms`,
+    from the database profiler.
+
+    Returns:
+        list or None: Profiled operations, or None if the profiler is off or not available
+    """
+    db = get_async_db()
+    try:
+        profile = await db.command({"profile": -1})
+    except OperationFailure:
+        return None
+    if profile.get("was", 0) == 0:
+        return None
+    namespaces = [f"{DATABASE_NAME}.{collection_name}" for collection_name in INDEXES]
+    cursor = db["system.profile"].find(
+        {"ns": {"$in": namespaces}, "millis": {"$gte": slow_ms}}
+    ).sort("ts", -1).limit(limit)
+    return [
+        {
+            "ns": op.get("ns"),
+            "op": op.get("op"),
+            "millis": op.get("millis"),
+            "plan": op.get("planSummary"),
+            "docs_examined": op.get("docsExamined"),
+            "filter": (op.get("command") or {}).get("filter")
+        }
+        async for op in cursor
+    ]
+
+
+async def _explain(slow_ms: int):
+    for report in await explain_queries():
+        verdict = "; ".join(report["problems"]) or "ok"
+        print(f"[EXPLAIN] {report['name']}: {report['plan']} | {report['millis']} ms, "
+              f"{report['keys_examined']} keys, {report['docs_examined']} docs examined | {verdict}")
+
+    operations = await slow_queries(slow_ms)
+    if operations is None:
+        print("[EXPLAIN] Database profiler is off or not available; slow operations can't be listed")
+        return
+    print(f"[EXPLAIN] {len(operations)} recent operations slower than {slow_ms} ms")
+    for op in operations:
+        print(f"[EXPLAIN]   {op['ns']} {op['op']} {op['millis']} ms {op['plan']} "
+              f"({op['docs_examined']} docs examined) filter={op['filter']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes and data migrations")
+    parser.add_argument("command", choices=("status", "up", "explain"))
+    parser.add_argument("--slow-ms", type=int, default=100, help="Threshold for listing slow operations (explain)")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Delete duplicate documents that block a unique index, keeping the newest (up)")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        status = asyncio.run(schema_status())
+        for migration_id, state in status["migrations"].items():
+            print(f"[SCHEMA] {migration_id}: {state}")
+        print(f"[SCHEMA] Missing indexes: {', '.join(status['missing_indexes']) or 'none'}")
+    elif args.command == "up":
+        result = asyncio.run(ensure_schema(dedupe=args.dedupe))
+        print(f"[SCHEMA] {len(result['migrations_applied'])} migrations applied, "
+              f"{len(result['indexes_created'])} indexes created")
+    else:
+        asyncio.run(_explain(args.slow_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,23 @@
 from app.core.config import GEMINI_API_KEY, GEMINI_MODEL
-from google import genai
+from app.core.deadline import DeadlineExceeded
+from app.core.async_utils import run_sync
+from app.core.gemini_gateway import gemini_gateway
+from app.core.circuit_breaker import CircuitOpen
 import json
 import re
-import time
+
+# Lead-ins that turn a statement into a question; dropped from local queries
+QUESTION_PREFIXES = (
+    "is it true that", "is it true", "did you know that", "fact check", "fact-check",
+    "is this true", "verify that", "check if", "check whether"
+)
+
+# Words ignored when comparing queries
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "of", "in", "on", "at",
+    "to", "for", "and", "or", "that", "this", "it", "its", "by", "with", "as", "from",
+    "did", "does", "do", "has", "have", "had", "will", "would", "said", "says"
+}
 
 class ClaimStructuringService:
     """
@@ -13,16 +28,29 @@ class ClaimStructuringService:
     def __init__(self):
         if not GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
-        self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.model = GEMINI_MODEL
 
     def structure_claim(self, claim_text: str, max_retries: int = 3) -> dict:
         """
         Structure any free-form user query or statement into a standardized format.
+        Synchronous wrapper around structure_claim_async.
+
+        Args:
+            claim_text (str): Raw claim or question from user
+            max_retries (int): Maximum attempts when Gemini is overloaded or unreachable
+
+        Returns:
+            dict: Structured claim (see structure_claim_async)
+        """
+        return run_sync(self.structure_claim_async(claim_text, max_retries))
+
+    async def structure_claim_async(self, claim_text: str, max_retries: int = 3) -> dict:
+        """
+        Structure any free-form user query or statement into a standardized format.
 
         Args:
             claim_text (str): Raw claim or question from user
-            max_retries (int): Maximum number of retry attempts for API overload
+            max_retries (int): Maximum attempts when Gemini is overloaded or unreachable
 
         Returns:
             dict: Structured claim following the schema:
@@ -35,13 +63,30 @@ class ClaimStructuringService:
                     "output_format": "json"
                 }
         """
-        last_error = None
-
-        for attempt in range(max_retries):
-            try:
-                chat = self.client.chats.create(model=self.model)
-
-                structuring_prompt = f"""
+        structuring_prompt = self._build_structuring_prompt(claim_text)
+
+        try:
+            result_text = await gemini_gateway.generate(
+                "structure_claim", structuring_prompt, model=self.model, max_attempts=max_retries
+            )
+            return self._parse_structured_response(result_text.strip(), claim_text)
+
+        except DeadlineExceeded as e:
+            # Out of budget: research can still run on the raw claim
+            print(f"Claim structuring stopped: {str(e)}. Using fallback structure.")
+            return self._create_fallback_structure(claim_text)
+
+        except CircuitOpen as e:
+            print(f"Claim structuring skipped: {str(e)}. Using fallback structure.")
+            return self._create_fallback_structure(claim_text)
+
+        except Exception as e:
+            print(f"Claim structuring error: {str(e)}. Using fallback structure.")
+            return self._create_fallback_structure(claim_text)
+
+    def _build_structuring_prompt(self, claim_text: str) -> str:
+        """Build the prompt that asks Gemini to structure a raw claim."""
+        return f"""
 You are an LLM whose job is to convert unstructured or vague user input into a clean, structured prompt that can be used for fact-checking.
 
 ### Your Goal
@@ -81,61 +126,44 @@ Now convert this user input:
 "{claim_text}"
 """
 
-                response = chat.send_message(structuring_prompt)
-                result_text = response.text.strip()
-
-                # Extract JSON from response (in case there's extra text)
-                json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-                if json_match:
-                    structured_data = json.loads(json_match.group())
-
-                    # Ensure all required keys are present with proper defaults
-                    required_schema = {
-                        "task": "fact_check",
-                        "claim": claim_text,
-                        "context": "",
-                        "entities": [],
-                        "time_period": "",
-                        "output_format": "json"
-                    }
-
-                    # Merge AI response with required schema
-                    for key, default_value in required_schema.items():
-                        if key not in structured_data or structured_data[key] is None:
-                            structured_data[key] = default_value
-
-                    # Store original input for reference
-                    structured_data["original_input"] = claim_text
-
-                    return structured_data
-                else:
-                    # Fallback if JSON parsing fails
-                    return self._create_fallback_structure(claim_text)
-
-            except Exception as e:
-                last_error = e
-                error_msg = str(e)
-
-                # Check if it's a 503 (overload) error
-                if "503" in error_msg or "UNAVAILABLE" in error_msg or "overload" in error_msg.lower():
-                    if attempt < max_retries - 1:
-                        # Exponential backoff: wait 2^attempt seconds
-                        wait_time = 2 ** attempt
-                        print(f"Gemini API overloaded (attempt {attempt + 1}/{max_retries}). Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        print(f"Gemini API overloaded after {max_retries} attempts. Using fallback structure.")
-                else:
-                    print(f"Claim structuring error: {error_msg}")
-
-                # If last attempt or non-retriable error, use fallback
-                if attempt == max_retries - 1:
-                    return self._create_fallback_structure(claim_text)
-
-        # If all retries failed, return fallback
-        print(f"All {max_retries} attempts failed. Using fallback structure.")
-        return self._create_fallback_structure(claim_text)
+    def _parse_structured_response(self, result_text: str, claim_text: str) -> dict:
+        """
+        Parse Gemini's structuring output into the standard schema.
+
+        Args:
+            result_text (str): Raw model output
+            claim_text (str): Original user input
+
+        Returns:
+            dict: Structured claim, or the fallback structure if no JSON was found
+        """
+        # Extract JSON from response (in case there's extra text)
+        json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
+        if not json_match:
+            # Fallback if JSON parsing fails
+            return self._create_fallback_structure(claim_text)
+
+        structured_data = json.loads(json_match.group())
+
+        # Ensure all required keys are present with proper defaults
+        required_schema = {
+            "task": "fact_check",
+            "claim": claim_text,
+            "context": "",
+            "entities": [],
+            "time_period": "",
+            "output_format": "json"
+        }
+
+        # Merge AI response with required schema
+        for key, default_value in required_schema.items():
+            if key not in structured_data or structured_data[key] is None:
+                structured_data[key] = default_value
+
+        # Store original input for reference
+        structured_data["original_input"] = claim_text
+
+        return structured_data
 
     def _create_fallback_structure(self, claim_text: str) -> dict:
         """
@@ -197,3 +225,55 @@ Now convert this user input:
             search_query = structured_claim.get("original_input", "")[:200]
 
         return search_query.strip()
+
+    def create_local_query(self, claim_text: str) -> str:
+        """
+        Build a search query from the raw claim without calling the LLM.
+        Used to start research speculatively while structuring is in flight.
+
+        Args:
+            claim_text (str): Raw claim or question from user
+
+        Returns:
+            str: Search query for Perplexity
+        """
+        query = " ".join(claim_text.split())
+        lowered = query.lower()
+        for prefix in QUESTION_PREFIXES:
+            if lowered.startswith(prefix):
+                query = query[len(prefix):].lstrip(" :,-")
+                break
+        query = query.rstrip("?!. ")
+        return query[:200] or claim_text[:200]
+
+    def query_divergence(self, speculative_query: str, structured_claim: dict, search_query: str) -> float:
+        """
+        Measure how far the structured claim moved away from a speculative query.
+
+        Uses the Jaccard distance between content-word sets, compared against
+        both the structured claim and the refined search query; the closer of
+        the two wins.
+
+        Args:
+            speculative_query (str): Locally built query
+            structured_claim (dict): Structured claim data
+            search_query (str): Query built from the structured claim
+
+        Returns:
+            float: 0.0 (identical) to 1.0 (no overlap)
+        """
+        speculative_terms = self._content_terms(speculative_query)
+        candidates = [structured_claim.get("claim", ""), search_query]
+
+        divergence = 1.0
+        for candidate in candidates:
+            terms = self._content_terms(candidate)
+            union = speculative_terms | terms
+            if not union:
+                continue
+            divergence = min(divergence, 1.0 - len(speculative_terms & terms) / len(union))
+        return divergence
+
+    def _content_terms(self, text: str) -> set:
+        """Lowercased alphanumeric words minus stopwords."""
+        return {word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOPWORDS}
@@ -1,37 +1,66 @@
-from app.repository.claim_repository import ClaimRepository
 from app.core.config import GEMINI_API_KEY, GEMINI_MODEL
+from app.core.async_utils import run_sync
+from app.core.gemini_gateway import gemini_gateway
+from app.core.metrics import track_stage
+from app.core.scheduler import pipeline_scheduler
+from app.core.admission import admission_controller, Overloaded
+from app.core.deadline import DeadlineExceeded, budget
+from app.core.config import SINGLE_FLIGHT_TIMEOUT
+from app.core.single_flight import SingleFlight, SingleFlightTimeout
+from app.repository.claim_repository import hash_claim
 from app.services.text_extraction_service import TextExtractionService
 from app.services.url_extraction_service import URLExtractionService
 from app.services.professional_fact_check_service import ProfessionalFactCheckService
-from google import genai
 from google.genai import types
 import io
 from PIL import Image
 import base64
 import tempfile
 import os
-import time
+
+# Concurrent identical quick checks share one Gemini call. Kept apart from
+# claim_flights: a quick check returns a different result shape.
+quick_check_flights = SingleFlight("quick_check", timeout=SINGLE_FLIGHT_TIMEOUT)
+
 
 class FactCheckService:
     def __init__(self):
-        self.repo = ClaimRepository()
         self.text_extractor = TextExtractionService()
         self.url_extractor = URLExtractionService()
         self.professional_service = ProfessionalFactCheckService()
         if not GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
-        self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.model = GEMINI_MODEL
 
     def check_fact(self, claim_text: str):
-        # Create chat session with Gemini model
-        chat = self.client.chats.create(model=self.model)
-        response = chat.send_message(f"Fact check this claim: {claim_text}")
+        """Synchronous wrapper around check_fact_async."""
+        return run_sync(self.check_fact_async(claim_text))
+
+    def check_multimodal_fact(self, claim_text: str, file_content: bytes, content_type: str, filename: str):
+        """Synchronous wrapper around check_multimodal_fact_async."""
+        return run_sync(self.check_multimodal_fact_async(claim_text, file_content, content_type, filename))
+
+    def check_url_fact(self, url: str) -> dict:
+        """Synchronous wrapper around check_url_fact_async."""
+        return run_sync(self.check_url_fact_async(url))
+
+    async def check_fact_async(self, claim_text: str):
+        admission_controller.admit()
+        try:
+            return await quick_check_flights.do(
+                hash_claim(claim_text),
+                lambda: self._quick_check(claim_text),
+                timeout=budget(SINGLE_FLIGHT_TIMEOUT)
+            )
+        except SingleFlightTimeout:
+            print(f"[WARNING] Running quick check without coalescing: {claim_text[:50]}...")
+            return await self._quick_check(claim_text)
 
-        verdict = response.text.strip()
+    async def _quick_check(self, claim_text: str):
+        verdict = (await gemini_gateway.generate("quick_check", f"Fact check this claim: {claim_text}", model=self.model)).strip()
 
-        # ✅ Save both prompt and response to DB
-        self.repo.save(claim_text, verdict)
+        # Not saved: claims are upserted by claim hash, and a plain verdict
+        # would replace a full researched result for the same claim
 
         # ✅ Return structured response to API
         return {
@@ -41,7 +70,27 @@ class FactCheckService:
 
 
 
-    def check_multimodal_fact(self, claim_text: str, file_content: bytes, content_type: str, filename: str):
+    async def check_multimodal_fact_async(self, claim_text: str, file_content: bytes, content_type: str, filename: str):
+        """
+        Run a multimodal check in the multimodal scheduler lane. Not admission-checked
+        here: the extracted claim may be cached, and cache hits are served
+        even when overloaded. The professional pipeline sheds it on a miss.
+        """
+        try:
+            async with pipeline_scheduler.slot("multimodal"):
+                return await self._check_multimodal_fact(claim_text, file_content, content_type, filename)
+        except DeadlineExceeded as e:
+            print(f"[WARNING] {str(e)}")
+            return {
+                "claim_text": claim_text or f"Media file: {filename}",
+                "status": "❌ Error",
+                "explanation": f"The server is busy: {str(e)}",
+                "sources": [],
+                "media_type": content_type,
+                "error": str(e)
+            }
+
+    async def _check_multimodal_fact(self, claim_text: str, file_content: bytes, content_type: str, filename: str):
         """
         Handle multimodal fact checking with images, videos, and audio.
 
@@ -63,17 +112,20 @@ class FactCheckService:
             if content_type and content_type.startswith("image/"):
                 media_type = "image"
                 print("[EXTRACTING] Extracting text from image using OCR...")
-                extracted_data = self.text_extractor.extract_text_from_image(file_content, filename)
+                async with track_stage("media_extraction"):
+                    extracted_data = await self.text_extractor.extract_text_from_image_async(file_content, filename)
 
             elif content_type and content_type.startswith("video/"):
                 media_type = "video"
                 print("[EXTRACTING] Extracting text from video (speech + visual text)...")
-                extracted_data = self.text_extractor.extract_text_from_video(file_content, filename)
+                async with track_stage("media_extraction"):
+                    extracted_data = await self.text_extractor.extract_text_from_video_async(file_content, filename)
 
             elif content_type and content_type.startswith("audio/"):
                 media_type = "audio"
                 print("[EXTRACTING] Extracting text from audio (speech-to-text)...")
-                extracted_data = self.text_extractor.extract_text_from_audio(file_content, filename, content_type)
+                async with track_stage("media_extraction"):
+                    extracted_data = await self.text_extractor.extract_text_from_audio_async(file_content, filename, content_type)
 
             else:
                 return {
@@ -110,7 +162,7 @@ class FactCheckService:
 
             # Step 3: Pass to professional fact-checking service (includes Perplexity Deep Search)
             print(f"\n[FACT-CHECKING] Starting professional fact-check pipeline with Perplexity Deep Search...")
-            result = self.professional_service.check_fact(combined_claim)
+            result = await self.professional_service.check_fact_async(combined_claim)
 
             # Add media metadata to result
             result["media_type"] = content_type
@@ -123,6 +175,9 @@ class FactCheckService:
 
             return result
 
+        except Overloaded:
+            # Shed after extraction: the API answers 503 + Retry-After
+            raise
         except Exception as e:
             error_msg = f"Error processing {content_type}: {str(e)}"
             print(f"[ERROR] {error_msg}")
@@ -135,7 +190,27 @@ class FactCheckService:
                 "error": str(e)
             }
 
-    def check_url_fact(self, url: str) -> dict:
+    async def check_url_fact_async(self, url: str) -> dict:
+        """
+        Run a URL check in the URL scheduler lane. Not admission-checked
+        here: the extracted claim may be cached, and cache hits are served
+        even when overloaded. The professional pipeline sheds it on a miss.
+        """
+        try:
+            async with pipeline_scheduler.slot("url"):
+                return await self._check_url_fact(url)
+        except DeadlineExceeded as e:
+            print(f"[WARNING] {str(e)}")
+            return {
+                "claim_text": f"URL: {url}",
+                "status": "[X] Error",
+                "explanation": f"The server is busy: {str(e)}",
+                "sources": [],
+                "url": url,
+                "error": str(e)
+            }
+
+    async def _check_url_fact(self, url: str) -> dict:
         """
         Handle fact-checking from a URL/link.
 
@@ -151,7 +226,8 @@ class FactCheckService:
 
             # Step 1: Extract content from URL
             print("[EXTRACTING] Extracting content from URL...")
-            extracted_data = self.url_extractor.extract_from_url(url)
+            async with track_stage("url_extraction"):
+                extracted_data = await self.url_extractor.extract_from_url_async(url)
 
             # Never reject - always proceed with whatever was extracted
             main_claim = extracted_data.get("main_claim", "") or f"Information from URL: {url}"
@@ -169,7 +245,7 @@ class FactCheckService:
 
             # Step 3: Pass to professional fact-checking service (includes Perplexity Deep Search)
             print(f"[FACT-CHECKING] Starting professional fact-check pipeline with Perplexity Deep Search...")
-            result = self.professional_service.check_fact(claim_with_context)
+            result = await self.professional_service.check_fact_async(claim_with_context)
 
             # Add URL metadata to result
             result["url"] = url
@@ -185,6 +261,8 @@ class FactCheckService:
 
             return result
 
+        except Overloaded:
+            raise
         except Exception as e:
             error_msg = f"Error processing URL: {str(e)}"
             print(f"[ERROR] {error_msg}")
@@ -0,0 +1,188 @@
+from app.repository.job_repository import AsyncJobRepository, TERMINAL_JOB_STATUSES
+from app.repository.worker_repository import AsyncWorkerRepository
+from app.core.config import (
+    JOB_MAX_ATTEMPTS, JOB_POLL_INTERVAL_SECONDS, JOB_BACKLOG_PER_SLOT, WORKER_HEARTBEAT_TTL_SECONDS
+)
+import asyncio
+import time
+
+# How long submitters are told to back off when the job queue is full
+QUEUE_FULL_RETRY_AFTER_SECONDS = 30
+
+# Capacity snapshots are reused for this long so submissions don't each
+# query the workers collection
+CAPACITY_CACHE_SECONDS = 1.0
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the backlog exceeds worker capacity."""
+
+    def __init__(self, message: str, retry_after: int = QUEUE_FULL_RETRY_AFTER_SECONDS):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class JobNotifier:
+    """
+    Wakes local subscribers as soon as a worker in this process finishes
+    an attempt, so they don't wait for the next poll. Jobs finished by
+    other processes are picked up by polling.
+    """
+
+    def __init__(self):
+        self._waiters = {}
+
+    async def wait(self, job_id: str, timeout: float):
+        """Wait until the job is updated locally, or until the timeout."""
+        event = asyncio.Event()
+        self._waiters.setdefault(job_id, set()).add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters = self._waiters.get(job_id)
+            if waiters is not None:
+                waiters.discard(event)
+                if not waiters:
+                    del self._waiters[job_id]
+
+    def notify(self, job_id: str):
+        for event in self._waiters.get(job_id, ()):
+            event.set()
+
+
+job_notifier = JobNotifier()
+
+
+class JobService:
+    """
+    Submits fact checks as background jobs and reports their progress.
+    The jobs themselves are run by JobWorker.
+    """
+
+    def __init__(self):
+        self.repo = AsyncJobRepository()
+        self.workers = AsyncWorkerRepository()
+        self.max_attempts = JOB_MAX_ATTEMPTS
+        self._capacity = None
+        self._capacity_expires = 0.0
+
+    async def capacity(self) -> dict:
+        """
+        Live worker capacity and queue backlog, from worker heartbeats.
+
+        Returns:
+            dict: workers, slots (job slots on live, non-draining workers),
+            active (jobs running), queued (jobs waiting), backlog_limit and
+            accepting (whether new jobs are admitted)
+        """
+        if self._capacity is not None and time.monotonic() < self._capacity_expires:
+            return self._capacity
+
+        workers = await self.workers.live_workers(WORKER_HEARTBEAT_TTL_SECONDS)
+        queued = await self.repo.count_queued()
+        slots = sum(worker.get("concurrency", 0) for worker in workers if not worker.get("draining"))
+        backlog_limit = slots * JOB_BACKLOG_PER_SLOT
+        self._capacity = {
+            "workers": len(workers),
+            "slots": slots,
+            "active": sum(worker.get("active", 0) for worker in workers),
+            "queued": queued,
+            "backlog_limit": backlog_limit,
+            "accepting": queued < backlog_limit
+        }
+        self._capacity_expires = time.monotonic() + CAPACITY_CACHE_SECONDS
+        return self._capacity
+
+    async def _admit(self):
+        """
+        Apply backpressure before queueing a job.
+
+        Raises:
+            QueueFull: If no worker is alive or the backlog is at its limit
+        """
+        capacity = await self.capacity()
+        if capacity["slots"] == 0:
+            raise QueueFull("No job workers are available")
+        if not capacity["accepting"]:
+            raise QueueFull(f"Job queue is full ({capacity['queued']} jobs waiting)")
+
+    async def submit_claim(self, claim_text: str, user_id: str) -> dict:
+        """Queue a text claim check."""
+        await self._admit()
+        job = await self.repo.create("text", {"claim_text": claim_text}, user_id, self.max_attempts)
+        return self.format_job(job)
+
+    async def submit_url(self, url: str, user_id: str) -> dict:
+        """Queue a URL check."""
+        await self._admit()
+        job = await self.repo.create("url", {"url": url}, user_id, self.max_attempts)
+        return self.format_job(job)
+
+    async def submit_multimodal(self, claim_text: str, file_content: bytes, content_type: str, filename: str, user_id: str) -> dict:
+        """
+        Queue a multimodal check. The file is stored in GridFS first so
+        whichever worker claims the job can read it.
+        """
+        await self._admit()
+        file_id = None
+        if file_content is not None:
+            file_id = await self.repo.store_media(file_content, filename, content_type)
+        payload = {
+            "claim_text": claim_text,
+            "file_id": file_id,
+            "content_type": content_type,
+            "filename": filename
+        }
+        job = await self.repo.create("multimodal", payload, user_id, self.max_attempts)
+        return self.format_job(job)
+
+    async def get_job(self, job_id: str, user_id: str):
+        """
+        Get a job's current state.
+
+        Returns:
+            dict or None: The job view, or None if it doesn't exist or
+            belongs to another user
+        """
+        job = await self.repo.get(job_id)
+        if not job or job.get("user_id") != user_id:
+            return None
+        return self.format_job(job)
+
+    async def watch(self, job_id: str, user_id: str):
+        """
+        Follow a job until it finishes.
+
+        Yields:
+            dict: The job view, each time its status or attempt count changes;
+            the last one is terminal (succeeded or dead_letter)
+        """
+        last_seen = None
+        while True:
+            view = await self.get_job(job_id, user_id)
+            if view is None:
+                return
+            seen = (view["status"], view["attempts"])
+            if seen != last_seen:
+                last_seen = seen
+                yield view
+            if view["status"] in TERMINAL_JOB_STATUSES:
+                return
+            await job_notifier.wait(job_id, JOB_POLL_INTERVAL_SECONDS)
+
+    def format_job(self, job: dict) -> dict:
+        """Client-facing view of a job document."""
+        return {
+            "job_id": job["_id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "attempts": job["attempts"],
+            "max_attempts": job["max_attempts"],
+            "created_at": job["created_at"],
+            "started_at": job.get("started_at"),
+            "finished_at": job.get("finished_at"),
+            "error": job.get("last_error"),
+            "result": job.get("result")
+        }
@@ -0,0 +1,233 @@
+from app.repository.job_repository import AsyncJobRepository, JOB_SUCCEEDED, TERMINAL_JOB_STATUSES
+from app.repository.worker_repository import AsyncWorkerRepository
+from app.services.fact_check_service import FactCheckService
+from app.services.job_service import job_notifier
+from app.core.config import (
+    JOB_WORKER_CONCURRENCY, JOB_VISIBILITY_TIMEOUT_SECONDS, JOB_RETRY_BASE_SECONDS,
+    JOB_DEADLINE_SECONDS, JOB_POLL_INTERVAL_SECONDS, WORKER_HEARTBEAT_INTERVAL_SECONDS
+)
+from app.core.deadline import deadline_scope
+from app.core.metrics import track_request, JOB_OUTCOMES, JOB_QUEUE_WAIT
+from app.core.tracing import start_trace, end_trace
+from app.core.scheduler import user_scope
+from datetime import datetime
+import asyncio
+import os
+import socket
+import time
+import uuid
+
+
+class JobFailed(Exception):
+    """Raised when a job handler returns an error result worth retrying."""
+
+
+class JobWorker:
+    """
+    Claims background jobs from MongoDB and runs them, up to `concurrency`
+    at a time.
+
+    The worker publishes a heartbeat with its capacity and load so the API
+    can refuse new jobs when the queue outgrows the live workers.
+
+    While a job runs, the worker keeps renewing its lease. If the worker
+    dies, the lease expires and another worker picks the job up. Failed
+    attempts are retried with exponential backoff, then dead-lettered.
+    """
+
+    def __init__(self, concurrency: int = JOB_WORKER_CONCURRENCY, worker_id: str = None):
+        self.repo = AsyncJobRepository()
+        self.workers = AsyncWorkerRepository()
+        self.service = FactCheckService()
+        self.concurrency = concurrency
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.visibility_timeout = JOB_VISIBILITY_TIMEOUT_SECONDS
+        self._stopping = False
+        self._wakeup = None
+        self._started_at = None
+        self._drain_heartbeat = None
+        self._active = {}
+        self._handlers = {
+            "text": self._run_text,
+            "multimodal": self._run_multimodal,
+            "url": self._run_url
+        }
+
+    async def run(self):
+        """Claim and run jobs until stop() is called, then finish the running ones."""
+        self._wakeup = asyncio.Event()
+        slots = asyncio.Semaphore(self.concurrency)
+        next_reap = 0.0
+        print(f"[JOBS] Worker {self.worker_id} started (concurrency {self.concurrency})")
+
+        try:
+            await self.repo.ensure_indexes()
+        except Exception as e:
+            print(f"[WARNING] Could not create job indexes: {str(e)}")
+
+        self._started_at = datetime.utcnow()
+        heartbeat = asyncio.create_task(self._heartbeat_loop())
+        try:
+            while not self._stopping:
+                await slots.acquire()
+                if self._stopping:
+                    slots.release()
+                    break
+
+                job = None
+                try:
+                    if time.monotonic() >= next_reap:
+                        next_reap = time.monotonic() + self.visibility_timeout / 2
+                        await self._reap_expired()
+                    job = await self.repo.claim_next(self.worker_id, self.visibility_timeout)
+                except Exception as e:
+                    print(f"[ERROR] Failed to claim job: {str(e)}")
+
+                if job is None:
+                    slots.release()
+                    await self._sleep(JOB_POLL_INTERVAL_SECONDS)
+                    continue
+
+                task = asyncio.create_task(self._process(job))
+                self._active[job["_id"]] = task
+
+                def release(_, job_id=job["_id"]):
+                    self._active.pop(job_id, None)
+                    slots.release()
+
+                task.add_done_callback(release)
+
+            if self._active:
+                print(f"[JOBS] Worker {self.worker_id} draining {len(self._active)} running job(s)")
+                await asyncio.gather(*self._active.values(), return_exceptions=True)
+        finally:
+            heartbeat.cancel()
+            try:
+                await self.workers.remove(self.worker_id)
+            except Exception as e:
+                print(f"[WARNING] Could not deregister worker {self.worker_id}: {str(e)}")
+        print(f"[JOBS] Worker {self.worker_id} stopped")
+
+    def stop(self):
+        """Stop claiming new jobs; run() returns once the running jobs finish."""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+            # Tell the API right away that this worker's slots are going away
+            self._drain_heartbeat = asyncio.get_running_loop().create_task(self._send_heartbeat())
+
+    @property
+    def stopping(self) -> bool:
+        return self._stopping
+
+    @property
+    def active_jobs(self) -> int:
+        return len(self._active)
+
+    async def _heartbeat_loop(self):
+        """Publish liveness and load until cancelled."""
+        while True:
+            await self._send_heartbeat()
+            await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL_SECONDS)
+
+    async def _send_heartbeat(self):
+        try:
+            await self.workers.heartbeat(
+                self.worker_id, self.concurrency, self.active_jobs, self._stopping, self._started_at
+            )
+        except Exception as e:
+            print(f"[WARNING] Worker heartbeat failed: {str(e)}")
+
+    async def _sleep(self, seconds: float):
+        """Idle between polls, waking early on stop()."""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _process(self, job: dict):
+        """Run one claimed job and record its outcome."""
+        job_id, kind = job["_id"], job["kind"]
+        if job.get("available_at") and job.get("started_at"):
+            JOB_QUEUE_WAIT.labels(kind).observe(max(0.0, (job["started_at"] - job["available_at"]).total_seconds()))
+        print(f"[JOBS] Running {kind} job {job_id} (attempt {job['attempts']}/{job['max_attempts']})")
+
+        root, token = start_trace(f"job.{kind}", job_id=job_id, attempt=job["attempts"])
+        lease = asyncio.create_task(self._keep_lease(job_id))
+        result, error = None, None
+        try:
+            handler = self._handlers.get(kind)
+            if handler is None:
+                raise JobFailed(f"Unknown job kind: {kind}")
+            with deadline_scope(JOB_DEADLINE_SECONDS), user_scope(job["user_id"]):
+                async with track_request(kind):
+                    result = await handler(job["payload"])
+            if result.get("error"):
+                raise JobFailed(result["error"])
+        except Exception as e:
+            error = e
+        finally:
+            lease.cancel()
+            end_trace(root, token, error)
+
+        try:
+            if error is None:
+                status = JOB_SUCCEEDED if await self.repo.complete(job_id, self.worker_id, result) else None
+            else:
+                print(f"[WARNING] Job {job_id} attempt {job['attempts']} failed: {str(error)}")
+                retry_delay = JOB_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+                status = await self.repo.fail(job, self.worker_id, str(error), retry_delay)
+        except Exception as e:
+            # The lease will expire and the job will be picked up again
+            print(f"[ERROR] Could not record outcome of job {job_id}: {str(e)}")
+            return
+
+        if status is None:
+            print(f"[WARNING] Job {job_id} was reclaimed by another worker, outcome discarded")
+            return
+
+        JOB_OUTCOMES.labels(kind, "retried" if status not in TERMINAL_JOB_STATUSES else status).inc()
+        if status in TERMINAL_JOB_STATUSES:
+            await self._delete_media(job)
+        job_notifier.notify(job_id)
+
+    async def _keep_lease(self, job_id: str):
+        """Renew the job's lease until cancelled."""
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            try:
+                if not await self.repo.extend_lease(job_id, self.worker_id, self.visibility_timeout):
+                    print(f"[WARNING] Lost lease on job {job_id}")
+                    return
+            except Exception as e:
+                print(f"[WARNING] Failed to renew lease on job {job_id}: {str(e)}")
+
+    async def _reap_expired(self):
+        """Dead-letter jobs whose last attempt was abandoned by its worker."""
+        for job in await self.repo.reap_expired():
+            print(f"[WARNING] Job {job['_id']} dead-lettered after its visibility timeout expired")
+            JOB_OUTCOMES.labels(job["kind"], "dead_letter").inc()
+            await self._delete_media(job)
+            job_notifier.notify(job["_id"])
+
+    async def _delete_media(self, job: dict):
+        file_id = job["payload"].get("file_id")
+        if file_id is not None:
+            await self.repo.delete_media(file_id)
+
+    async def _run_text(self, payload: dict) -> dict:
+        return await self.service.professional_service.check_fact_async(payload["claim_text"])
+
+    async def _run_url(self, payload: dict) -> dict:
+        return await self.service.check_url_fact_async(payload["url"])
+
+    async def _run_multimodal(self, payload: dict) -> dict:
+        if payload.get("file_id") is None:
+            return await self.service.check_fact_async(payload["claim_text"])
+        file_content = await self.repo.load_media(payload["file_id"])
+        return await self.service.check_multimodal_fact_async(
+            payload.get("claim_text") or "",
+            file_content,
+            payload.get("content_type"),
+            payload.get("filename")
+        )
@@ -1,5 +1,6 @@
 from app.core.config import GEMINI_API_KEY, GEMINI_MODEL
-from google import genai
+from app.core.async_utils import run_sync
+from app.core.gemini_gateway import gemini_gateway
 import re
 
 class ModerationService:
@@ -10,7 +11,6 @@ class ModerationService:
     def __init__(self):
         if not GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
-        self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.model = GEMINI_MODEL
 
         # Patterns for basic harmful content detection
@@ -21,6 +21,10 @@ class ModerationService:
         ]
 
     def moderate_input(self, claim_text: str) -> dict:
+        """Synchronous wrapper around moderate_input_async."""
+        return run_sync(self.moderate_input_async(claim_text))
+
+    async def moderate_input_async(self, claim_text: str) -> dict:
         """
         Check if input contains harmful, illegal, or private data.
 
@@ -44,7 +48,6 @@ class ModerationService:
 
         # Use Gemini for more nuanced moderation
         try:
-            chat = self.client.chats.create(model=self.model)
             moderation_prompt = f"""
 You are a content moderator. Analyze the following claim and determine if it contains:
 - Harmful, violent, or illegal content
@@ -55,8 +58,7 @@ Claim: "{claim_text}"
 
 Respond with ONLY "SAFE" or "UNSAFE: [brief reason]"
 """
-            response = chat.send_message(moderation_prompt)
-            result = response.text.strip()
+            result = (await gemini_gateway.generate("moderate_input", moderation_prompt, model=self.model)).strip()
 
             if result.startswith("UNSAFE"):
                 return {
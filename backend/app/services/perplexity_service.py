@@ -1,7 +1,126 @@
-from app.core.config import PERPLEXITY_API_KEY
-import requests
+from app.core.config import PERPLEXITY_API_KEY, PERPLEXITY_STREAMING, PERPLEXITY_EARLY_RETURN
+from app.core.async_utils import run_sync
+from app.core.clients import perplexity_client
+from app.core.deadline import DeadlineExceeded, StageTimeout, budget
+from app.core.upstream_client import call_upstream
+from app.core.circuit_breaker import CircuitOpen
+from app.core.negative_cache import research_failures, research_key, CIRCUIT_OPEN
+from app.core.upstream_errors import classify_error, retry_after_seconds
+from app.core.tracing import set_span_attributes
+from app.core.metrics import RESEARCH_EARLY_RETURNS
+import asyncio
+import httpx
 import json
 
+# How long to keep reading a stream we returned from early, so its connection goes back to the pool
+_DRAIN_TIMEOUT_SECONDS = 10
+_draining = set()
+
+
+def _drain_in_background(response: httpx.Response, lines) -> None:
+    """
+    Read the rest of a stream after an early return, then close it.
+
+    Closing an HTTP/1.1 response before it is fully read discards its
+    connection; draining it first lets the pool reuse it. The caller does
+    not wait for this. A stream that takes longer than
+    _DRAIN_TIMEOUT_SECONDS is closed anyway.
+
+    Args:
+        response (httpx.Response): The streamed response
+        lines: The response's partly consumed aiter_lines() iterator
+    """
+    async def drain():
+        outcome = "dropped"
+        try:
+            await asyncio.wait_for(_consume(lines), _DRAIN_TIMEOUT_SECONDS)
+            outcome = "drained"
+        except Exception:
+            # Timed out or broke off: closing unread drops the connection
+            pass
+        finally:
+            RESEARCH_EARLY_RETURNS.labels(outcome).inc()
+            await response.aclose()
+
+    task = asyncio.create_task(drain())
+    _draining.add(task)
+    task.add_done_callback(_draining.discard)
+
+
+async def _consume(lines) -> None:
+    async for _ in lines:
+        pass
+
+
+class ResearchStreamParser:
+    """
+    Incremental parser for the SUMMARY/FINDINGS/SOURCES research format.
+
+    Text is fed in chunks as it streams in; each complete line is parsed
+    the same way _parse_research_response parses the full text.
+    """
+
+    def __init__(self):
+        self.section = None
+        self.summary = ""
+        self.findings = []
+        self.sources = []
+        self._buffer = ""
+
+    def feed(self, text: str) -> list:
+        """
+        Add streamed text.
+
+        Returns:
+            list: Updates completed by this chunk: "summary" (summary finished),
+                  "finding", "findings" (findings finished) or "source"
+        """
+        self._buffer += text
+        updates = []
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            updates.extend(self._parse_line(line))
+        return updates
+
+    def finish(self) -> list:
+        """Parse whatever is left after the stream ends."""
+        line, self._buffer = self._buffer, ""
+        return self._parse_line(line)
+
+    def _parse_line(self, line: str) -> list:
+        line = line.strip()
+        if line.startswith("SUMMARY:"):
+            self.section = "summary"
+            self.summary = line.replace("SUMMARY:", "").strip()
+        elif line.startswith("FINDINGS:"):
+            previous, self.section = self.section, "findings"
+            return ["summary"] if previous == "summary" else []
+        elif line.startswith("SOURCES:"):
+            previous, self.section = self.section, "sources"
+            return ["findings"] if previous == "findings" else []
+        elif line.startswith("-") or line.startswith("•"):
+            content = line.lstrip("-•").strip()
+            if self.section == "findings" and content:
+                self.findings.append(content)
+                return ["finding"]
+            if self.section == "sources" and content:
+                self.sources.append(content)
+                return ["source"]
+        elif self.section == "summary" and line:
+            self.summary += " " + line
+        return []
+
+    def snapshot(self, citations: list) -> dict:
+        """Research gathered so far, in the same shape as a finished result."""
+        return {
+            "summary": self.summary.strip(),
+            "findings": list(self.findings),
+            "sources": citations[:10] if citations else list(self.sources),
+            "section": self.section,
+            "partial": True
+        }
+
+
 class PerplexityService:
     """
     Integrates with Perplexity AI for deep research and fact verification.
@@ -19,9 +138,19 @@ class PerplexityService:
         self.model = "sonar-pro"  # Perplexity's online research model
         print(f"[INFO] Perplexity model: {self.model}")
 
+        self.timeout = 30
+        self.streaming = PERPLEXITY_STREAMING
+        self.early_return = PERPLEXITY_EARLY_RETURN
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Pooled Perplexity session shared by the whole process."""
+        return perplexity_client()
+
     def deep_research(self, search_query: str, structured_claim: dict) -> dict:
         """
         Perform deep research using Perplexity AI.
+        Synchronous wrapper around deep_research_async.
 
         Args:
             search_query (str): Optimized search query
@@ -30,25 +159,185 @@ class PerplexityService:
         Returns:
             dict: Research results with findings and sources
         """
+        return run_sync(self.deep_research_async(search_query, structured_claim))
+
+    async def deep_research_async(self, search_query: str, structured_claim: dict, on_partial=None) -> dict:
+        """
+        Perform deep research using Perplexity AI.
+
+        Args:
+            search_query (str): Optimized search query
+            structured_claim (dict): Structured claim data
+            on_partial: Optional async callback(research) run with the research
+                gathered so far each time a summary, finding or source completes
+                (streaming mode only)
+
+        Returns:
+            dict: Research results with findings and sources; on failure the
+                fallback research with the failure class in "error_class"
+        """
         if not self.api_key:
             return self._fallback_research(search_query)
 
+        # Don't call Perplexity again for a query that just failed
+        failure_key = research_key(search_query)
+        failure = research_failures.get(failure_key)
+        if failure:
+            print(f"[NEGATIVE_CACHE] Research for this query failed recently ({failure.error_class}), "
+                  f"skipping for {failure.retry_in:.0f}s: {search_query[:50]}...")
+            return self._failed_research(search_query, failure.error_class, failure.retry_in)
+
+        payload = self._build_payload(search_query, structured_claim)
+
+        async def send():
+            timeout = budget(self.timeout)
+            if timeout is not None and timeout <= 0:
+                raise DeadlineExceeded("No time budget left for research")
+            if self.streaming:
+                return await self._stream_completion(payload, timeout, on_partial)
+            response = await self.http_client.post(
+                self.base_url,
+                headers=self._build_headers(),
+                json=payload,
+                timeout=timeout
+            )
+            set_span_attributes(
+                prompt_chars=len(payload["messages"][-1]["content"]),
+                response_bytes=len(response.content),
+                status_code=response.status_code
+            )
+            response.raise_for_status()
+            return response.json()
+
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+            result = await call_upstream("perplexity", "chat_completions", send, model=self.model, timeout=self.timeout)
+            research_failures.recovered("research_succeeded")
+            return self._parse_api_result(result)
+
+        except CircuitOpen as e:
+            print(f"[WARNING] Skipping research: {str(e)}")
+            research_failures.put(failure_key, CIRCUIT_OPEN, retry_after=e.retry_in)
+            return dict(self._fallback_research(search_query), error_class=CIRCUIT_OPEN)
+        except DeadlineExceeded:
+            # Out of this request's budget, which says nothing about Perplexity
+            print("Perplexity API timeout")
+            return self._timeout_research(search_query)
+        except (httpx.TimeoutException, StageTimeout) as e:
+            print("Perplexity API timeout")
+            return dict(self._timeout_research(search_query), error_class=self._record_failure(failure_key, e))
+        except httpx.HTTPStatusError as e:
+            print(f"[ERROR] Perplexity API error: {e.response.status_code} - {e.response.text}")
+            return dict(self._fallback_research(search_query), error_class=self._record_failure(failure_key, e))
+        except Exception as e:
+            print(f"Perplexity research error: {str(e)}")
+            return dict(self._fallback_research(search_query), error_class=self._record_failure(failure_key, e))
+
+    def _record_failure(self, failure_key: str, error: Exception) -> str:
+        """Remember a failed research call in the negative cache and return its failure class."""
+        error_class = classify_error(error)
+        research_failures.put(failure_key, error_class, retry_after=retry_after_seconds(error))
+        return error_class
 
-            # Extract components from new schema
-            claim = structured_claim.get('claim', search_query)
-            entities = structured_claim.get('entities', [])
-            context = structured_claim.get('context', '')
-            time_period = structured_claim.get('time_period', '')
+    async def _stream_completion(self, payload: dict, timeout: float, on_partial=None) -> dict:
+        """
+        Request the completion as server-sent events and parse it as it arrives.
 
-            # Format entities for display
-            entities_text = ', '.join(entities) if entities else 'N/A'
+        Args:
+            payload (dict): Request payload built by _build_payload
+            timeout (float): Request timeout
+            on_partial: Optional async callback(research) for partial research
 
-            research_prompt = f"""
+        Returns:
+            dict: The completion in the non-streaming response shape, for _parse_api_result
+        """
+        parser = ResearchStreamParser()
+        text = ""
+        citations = []
+        search_results = []
+        received_bytes = 0
+        closed_early = False
+
+        request = self.http_client.build_request(
+            "POST", self.base_url,
+            headers=self._build_headers(),
+            json={**payload, "stream": True},
+            timeout=timeout
+        )
+        response = await self.http_client.send(request, stream=True)
+        try:
+            set_span_attributes(prompt_chars=len(payload["messages"][-1]["content"]), status_code=response.status_code)
+            if response.status_code >= 400:
+                await response.aread()
+                response.raise_for_status()
+
+            lines = response.aiter_lines()
+            async for line in lines:
+                received_bytes += len(line)
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                citations = chunk.get("citations") or citations
+                search_results = chunk.get("search_results") or search_results
+                choices = chunk.get("choices") or [{}]
+                delta = (choices[0].get("delta") or choices[0].get("message") or {}).get("content") or ""
+                if not delta:
+                    continue
+
+                text += delta
+                updates = parser.feed(delta)
+                if updates and on_partial:
+                    await on_partial(parser.snapshot(citations))
+                if "findings" in updates and citations and self.early_return:
+                    # The rest is the SOURCES list, which the citations already cover
+                    set_span_attributes(early_return=True)
+                    closed_early = True
+                    text = text[:text.rfind("SOURCES:")].rstrip()
+                    break
+        finally:
+            if closed_early:
+                _drain_in_background(response, lines)
+            else:
+                await response.aclose()
+
+        if not closed_early and parser.finish() and on_partial:
+            await on_partial(parser.snapshot(citations))
+        set_span_attributes(response_bytes=received_bytes)
+        return {
+            "choices": [{"message": {"content": text}}],
+            "citations": citations,
+            "search_results": search_results
+        }
+
+    def _build_headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _build_payload(self, search_query: str, structured_claim: dict) -> dict:
+        """
+        Build the chat completion payload for a research request.
+
+        Args:
+            search_query (str): Optimized search query
+            structured_claim (dict): Structured claim data
+
+        Returns:
+            dict: JSON payload for the Perplexity API
+        """
+        # Extract components from new schema
+        claim = structured_claim.get('claim', search_query)
+        entities = structured_claim.get('entities', [])
+        context = structured_claim.get('context', '')
+        time_period = structured_claim.get('time_period', '')
+
+        # Format entities for display
+        entities_text = ', '.join(entities) if entities else 'N/A'
+
+        research_prompt = f"""
 You are a professional fact-checker. Research the following claim using only credible sources (Reuters, BBC, AP News, official government portals, scientific journals).
 
 Claim: {claim}
@@ -76,66 +365,57 @@ SOURCES:
 - [source 2]
 """
 
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are a professional fact-checking assistant with access to real-time information. Only cite credible sources."
-                    },
-                    {
-                        "role": "user",
-                        "content": research_prompt
-                    }
-                ],
-                "temperature": 0.2,  # Lower temperature for more factual responses
-                "max_tokens": 2000
-            }
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a professional fact-checking assistant with access to real-time information. Only cite credible sources."
+                },
+                {
+                    "role": "user",
+                    "content": research_prompt
+                }
+            ],
+            "temperature": 0.2,  # Lower temperature for more factual responses
+            "max_tokens": 2000
+        }
 
-            response = requests.post(
-                self.base_url,
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
+    def _parse_api_result(self, result: dict) -> dict:
+        """
+        Convert a successful Perplexity API response into research data.
 
-            if response.status_code == 200:
-                result = response.json()
-                print(f"[DEBUG] Perplexity API success. Model: {self.model}")
-
-                # Check if citations are available in the response
-                citations = result.get('citations', [])
-                search_results = result.get('search_results', [])
-                print(f"[DEBUG] Direct citations: {len(citations)}, search_results: {len(search_results)}")
-
-                research_text = result['choices'][0]['message']['content']
-                print(f"[DEBUG] Research text length: {len(research_text)}")
-                print(f"[DEBUG] Research text preview: {research_text[:500]}...")
-
-                # Use direct citations/search_results if available, otherwise parse text
-                if citations or search_results:
-                    print(f"[DEBUG] Using direct citations and search_results from API")
-                    parsed_result = {
-                        "summary": research_text,
-                        "findings": self._extract_findings_from_text(research_text),
-                        "sources": citations[:10]  # Limit to 10 sources
-                    }
-                else:
-                    # Parse the response text
-                    parsed_result = self._parse_research_response(research_text)
-
-                print(f"[DEBUG] Parsed result - Findings: {len(parsed_result.get('findings', []))}, Sources: {len(parsed_result.get('sources', []))}")
-                return parsed_result
-            else:
-                print(f"[ERROR] Perplexity API error: {response.status_code} - {response.text}")
-                return self._fallback_research(search_query)
+        Args:
+            result (dict): Decoded JSON response
 
-        except requests.exceptions.Timeout:
-            print("Perplexity API timeout")
-            return self._fallback_research(search_query)
-        except Exception as e:
-            print(f"Perplexity research error: {str(e)}")
-            return self._fallback_research(search_query)
+        Returns:
+            dict: Research results with summary, findings and sources
+        """
+        print(f"[DEBUG] Perplexity API success. Model: {self.model}")
+
+        # Check if citations are available in the response
+        citations = result.get('citations', [])
+        search_results = result.get('search_results', [])
+        print(f"[DEBUG] Direct citations: {len(citations)}, search_results: {len(search_results)}")
+
+        research_text = result['choices'][0]['message']['content']
+        print(f"[DEBUG] Research text length: {len(research_text)}")
+        print(f"[DEBUG] Research text preview: {research_text[:500]}...")
+
+        # Use direct citations/search_results if available, otherwise parse text
+        if citations or search_results:
+            print(f"[DEBUG] Using direct citations and search_results from API")
+            parsed_result = {
+                "summary": research_text,
+                "findings": self._extract_findings_from_text(research_text),
+                "sources": citations[:10]  # Limit to 10 sources
+            }
+        else:
+            # Parse the response text
+            parsed_result = self._parse_research_response(research_text)
+
+        print(f"[DEBUG] Parsed result - Findings: {len(parsed_result.get('findings', []))}, Sources: {len(parsed_result.get('sources', []))}")
+        return parsed_result
 
     def _parse_research_response(self, research_text: str) -> dict:
         """
@@ -194,6 +474,32 @@ SOURCES:
         sentences = [s.strip() for s in text.split('.') if len(s.strip()) > 20]
         return sentences[:5]  # Return first 5 sentences as findings
 
+    def _timeout_research(self, search_query: str) -> dict:
+        """
+        Research result when Perplexity did not answer within the time budget.
+        Uses the same "Unable to perform deep research" marker as the fallback
+        so the result is never cached.
+        """
+        return {
+            "summary": f"Unable to perform deep research for: {search_query}. Research did not complete within the time budget.",
+            "findings": [],
+            "sources": []
+        }
+
+    def _failed_research(self, search_query: str, error_class: str, retry_in: float) -> dict:
+        """
+        Research result for a query whose research failed moments ago. Uses
+        the "Unable to perform deep research" marker so it is never cached.
+        """
+        return {
+            "summary": f"Unable to perform deep research for: {search_query}. "
+                       f"Research failed recently ({error_class}); it will be retried in {retry_in:.0f}s.",
+            "findings": [],
+            "sources": [],
+            "error_class": error_class,
+            "retry_after": round(retry_in, 1)
+        }
+
     def _fallback_research(self, search_query: str) -> dict:
         """
         Fallback research when Perplexity API is unavailable.
@@ -1,11 +1,179 @@
-from app.repository.claim_repository import ClaimRepository
-from app.core.config import GEMINI_API_KEY, GEMINI_MODEL
+from app.repository.claim_repository import (
+    AsyncClaimRepository, CLAIM_SCHEMA_VERSION, parse_legacy_response, canonical_claim_hash
+)
+from app.core.config import (
+    GEMINI_API_KEY, GEMINI_MODEL,
+    SPECULATIVE_RESEARCH, SPECULATION_DIVERGENCE_THRESHOLD, SINGLE_FLIGHT_TIMEOUT, BATCH_CONCURRENCY,
+    SIMILARITY_CACHE, SIMILARITY_THRESHOLD, CANONICAL_CACHE, DEADLINE_TEXT_SECONDS
+)
+from app.core.deadline import DeadlineExceeded, budget, deadline_scope
+from app.core.async_utils import run_sync
+from app.core.gemini_gateway import gemini_gateway
+from app.core.single_flight import SingleFlight, SingleFlightTimeout
+from app.core.scheduler import pipeline_scheduler, user_scope
+from app.core.admission import admission_controller, Overloaded
+from app.core.circuit_breaker import CircuitOpen
+from app.core.response_cache import response_cache
+from app.core.negative_cache import research_failures, claim_key
+from app.core.metrics import (
+    track_request, track_stage, record_cache_lookup, record_canonical_lookup, SPECULATION_OUTCOMES, CACHE_FRESHNESS, STALE_REFRESHES
+)
+from app.core.freshness import freshness, classify_claim, CATEGORY_TTLS, FRESH, STALE
+from app.core.tracing import set_span_attributes, start_trace, end_trace
 from app.services.claim_structuring_service import ClaimStructuringService
 from app.services.perplexity_service import PerplexityService
-from google import genai
-from datetime import datetime
+from collections import deque
+import asyncio
+import contextvars
 import time
 
+# Below this much remaining budget a verdict call is not attempted; the
+# research gathered so far is returned as an unverified partial result
+VERDICT_MIN_BUDGET_SECONDS = 2
+
+# Fields set on every response served from a cache
+CACHED_MARKER = {"cached": True, "cache_note": "✓ Retrieved from previous research"}
+
+# Scheduler user that background refreshes are attributed to, so together
+# they get one user's fair share of pipeline slots
+REFRESH_USER = "stale-refresh"
+
+
+class SpeculationStats:
+    """
+    Tracks how often speculative research is kept and how much latency it saves.
+    Savings are kept in a rolling window so percentiles reflect recent traffic.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.hits = 0
+        self.misses = 0
+        self.savings = deque(maxlen=window)
+
+    def record(self, hit: bool, divergence: float, saved_seconds: float = 0.0):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        SPECULATION_OUTCOMES.labels("hit" if hit else "miss").inc()
+        self.savings.append(saved_seconds)
+        print(f"[SPECULATION] {'hit' if hit else 'miss'} (divergence {divergence:.2f}, "
+              f"saved {saved_seconds:.2f}s, hit rate {self.hit_rate():.0%})")
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _percentile(self, values: list, percentile: float) -> float:
+        if not values:
+            return 0.0
+        index = min(len(values) - 1, int(round(percentile * (len(values) - 1))))
+        return values[index]
+
+    def snapshot(self) -> dict:
+        """Summary suitable for the stats endpoint."""
+        ordered = sorted(self.savings)
+        return {
+            "enabled": SPECULATIVE_RESEARCH,
+            "divergence_threshold": SPECULATION_DIVERGENCE_THRESHOLD,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate(), 4),
+            "saved_seconds_p50": round(self._percentile(ordered, 0.50), 3),
+            "saved_seconds_p95": round(self._percentile(ordered, 0.95), 3)
+        }
+
+
+class CacheTierStats:
+    """
+    Counts which cache tier answered each lookup, to show what the
+    similarity and canonical tiers add. A canonical hit turns an earlier
+    step-1 miss into a hit.
+    """
+
+    TIERS = ("memory", "database", "similar", "canonical")
+
+    def __init__(self):
+        self.hits = dict.fromkeys(self.TIERS, 0)
+        self.misses = 0
+
+    def record(self, tier: str = None):
+        if tier:
+            self.hits[tier] += 1
+        else:
+            self.misses += 1
+        record_cache_lookup(bool(tier), tier or "")
+
+    def record_canonical(self, hit: bool):
+        if hit:
+            self.hits["canonical"] += 1
+            self.misses -= 1
+        record_canonical_lookup(hit)
+
+    def snapshot(self) -> dict:
+        """Summary suitable for the stats endpoint."""
+        hits = sum(self.hits.values())
+        lookups = hits + self.misses
+        exact_hits = hits - self.hits["similar"] - self.hits["canonical"]
+        return {
+            "similarity_enabled": SIMILARITY_CACHE,
+            "similarity_threshold": SIMILARITY_THRESHOLD,
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "exact_hit_rate": round(exact_hits / lookups, 4) if lookups else 0.0,
+            # Share of all lookups answered only thanks to the similarity tier
+            "similarity_lift": round(self.hits["similar"] / lookups, 4) if lookups else 0.0,
+            "canonical_enabled": CANONICAL_CACHE,
+            # Share of all lookups answered after structuring, skipping research and verdict
+            "canonical_lift": round(self.hits["canonical"] / lookups, 4) if lookups else 0.0
+        }
+
+
+class StaleRefreshes:
+    """
+    Background re-checks of stale verdicts, at most one per claim at a
+    time however many requests are served the stale verdict meanwhile.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self.started = 0
+        self.deduplicated = 0
+
+    def start(self, key: str, fn) -> bool:
+        """
+        Run fn() in the background unless a refresh for `key` is already running.
+
+        The task starts from an empty context rather than a copy of the
+        request's: it must not inherit the request's deadline, scheduler
+        slot, admission or trace.
+        """
+        if key in self._tasks:
+            self.deduplicated += 1
+            STALE_REFRESHES.labels("deduplicated").inc()
+            return False
+        self.started += 1
+        STALE_REFRESHES.labels("started").inc()
+        task = contextvars.Context().run(asyncio.create_task, fn())
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return True
+
+    def snapshot(self) -> dict:
+        """Summary suitable for the stats endpoint."""
+        return {"running": len(self._tasks), "started": self.started, "deduplicated": self.deduplicated}
+
+
+# Shared across service instances so every entry point reports into one place
+speculation_stats = SpeculationStats()
+cache_tier_stats = CacheTierStats()
+stale_refreshes = StaleRefreshes()
+
+# Concurrent identical claims (text, streamed, batch, multimodal or URL) share
+# one pipeline run, keyed on the normalized claim hash
+claim_flights = SingleFlight("claims", timeout=SINGLE_FLIGHT_TIMEOUT)
+
 
 class ProfessionalFactCheckService:
     """
@@ -19,18 +187,20 @@ class ProfessionalFactCheckService:
     """
 
     def __init__(self):
-        self.repo = ClaimRepository()
+        self.repo = AsyncClaimRepository()
         self.structuring = ClaimStructuringService()
         self.perplexity = PerplexityService()
+        self.speculative = SPECULATIVE_RESEARCH
+        self.divergence_threshold = SPECULATION_DIVERGENCE_THRESHOLD
 
         if not GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
-        self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.model = GEMINI_MODEL
 
     def check_fact(self, claim_text: str) -> dict:
         """
         Execute the complete professional fact-checking pipeline.
+        Synchronous wrapper around check_fact_async.
 
         Args:
             claim_text (str): The claim to fact-check
@@ -38,47 +208,542 @@ class ProfessionalFactCheckService:
         Returns:
             dict: Formatted fact-check result
         """
-        # Step 1: Check Database Cache
-        cached_claim = self.repo.find_cached_claim(claim_text)
-        if cached_claim:
-            return self._format_cached_response(cached_claim)
+        return run_sync(self.check_fact_async(claim_text))
 
-        # Step 2: LLM Structuring
-        structured_claim = self.structuring.structure_claim(claim_text)
-        search_query = self.structuring.create_search_query(structured_claim)
+    async def check_fact_async(self, claim_text: str) -> dict:
+        """
+        Execute the complete professional fact-checking pipeline.
+
+        Args:
+            claim_text (str): The claim to fact-check
+
+        Returns:
+            dict: Formatted fact-check result
+        """
+        # Step 1: Check the response cache, then the database
+        cached_response = await self._lookup_cache(claim_text)
+        if cached_response:
+            return cached_response
+        failed_response = self._lookup_failed(claim_text)
+        if failed_response:
+            return failed_response
+
+        # Shed load before any LLM work if the pipeline is saturated
+        admission_controller.admit()
+        return await self._check_uncached(claim_text)
+
+    async def _check_uncached(self, claim_text: str, emit=None) -> dict:
+        """
+        Steps 2-6 for a cache miss, coalesced with identical in-flight claims.
+
+        Args:
+            claim_text (str): The claim to fact-check
+            emit: Optional async callback(event, data) for progress events. Only
+                the run that starts the pipeline emits them; a caller that joins
+                an in-flight run just gets its result.
+        """
+        # Steps 2-6 run once per claim no matter how many users submit it at the same time
+        claim_hash = self.repo._hash_claim(claim_text)
+        try:
+            return await claim_flights.do(
+                claim_hash,
+                lambda: self._run_scheduled(claim_text, emit=emit),
+                timeout=budget(SINGLE_FLIGHT_TIMEOUT)
+            )
+        except SingleFlightTimeout:
+            print(f"[WARNING] Running pipeline without coalescing: {claim_text[:50]}...")
+            return await self._run_scheduled(claim_text, emit=emit)
+
+    async def check_batch(self, claims: list, concurrency: int = BATCH_CONCURRENCY, item_budget: float = None):
+        """
+        Fact-check a list of claims, yielding one result per distinct claim
+        as soon as it is ready (completion order, cache hits first).
+
+        Claims are deduplicated by normalized hash, cache hits are resolved
+        with a single query, and at most `concurrency` misses run through
+        the pipeline at a time.
+
+        Args:
+            claims (list): Claim texts
+            concurrency (int): Maximum number of pipelines running at once
+            item_budget (float): Latency budget for each claim, started when
+                its pipeline begins (None for no deadline)
+
+        Yields:
+            dict: {"indices", "claim_text", "status", "result" or "error"};
+                status is "cached", "checked", "partial", "rejected" (shed by
+                admission control, with "retry_after") or "error" and
+                indices are the positions of the claim in the input list
+        """
+        groups = {}
+        for index, claim_text in enumerate(claims):
+            if not claim_text or not claim_text.strip():
+                yield {"indices": [index], "claim_text": claim_text, "status": "error", "error": "Empty claim"}
+                continue
+            claim_hash = self.repo._hash_claim(claim_text)
+            groups.setdefault(claim_hash, {"claim_text": claim_text, "indices": []})["indices"].append(index)
+
+        # Step 1 for the whole batch: memory first, then one round trip for
+        # the rest, then near-duplicates of what is still missing
+        async with track_stage("cache_lookup"):
+            cached_responses = {}
+            tiers = {}
+            for claim_hash in groups:
+                cached_response = response_cache.get(claim_hash)
+                if cached_response:
+                    cached_responses[claim_hash] = cached_response
+                    tiers[claim_hash] = "memory"
+            misses = [claim_hash for claim_hash in groups if claim_hash not in cached_responses]
+            for claim_hash, cached_claim in (await self.repo.find_cached_claims(misses)).items():
+                cached_response = self._remember_cached(claim_hash, groups[claim_hash]["claim_text"], cached_claim)
+                if cached_response:
+                    cached_responses[claim_hash] = cached_response
+                    tiers[claim_hash] = "database"
+            if SIMILARITY_CACHE:
+                misses = [claim_hash for claim_hash in groups if claim_hash not in cached_responses]
+                similar = await asyncio.gather(*[self._lookup_similar(groups[claim_hash]["claim_text"]) for claim_hash in misses])
+                for claim_hash, cached_response in zip(misses, similar):
+                    if cached_response:
+                        cached_responses[claim_hash] = cached_response
+                        tiers[claim_hash] = "similar"
+            for claim_hash in groups:
+                cache_tier_stats.record(tiers.get(claim_hash))
+
+        for claim_hash, cached_response in cached_responses.items():
+            group = groups[claim_hash]
+            yield {
+                "indices": group["indices"],
+                "claim_text": group["claim_text"],
+                "status": "cached",
+                "result": cached_response
+            }
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def check(group: dict) -> dict:
+            item = {"indices": group["indices"], "claim_text": group["claim_text"]}
+            failed_response = self._lookup_failed(group["claim_text"])
+            if failed_response:
+                return dict(item, status="checked", result=failed_response)
+            async with semaphore:
+                try:
+                    admission_controller.admit()
+                    if item_budget is None:
+                        result = await self._check_uncached(group["claim_text"])
+                    else:
+                        with deadline_scope(item_budget):
+                            result = await self._check_uncached(group["claim_text"])
+                except Overloaded as e:
+                    return dict(item, status="rejected", error=str(e), retry_after=e.retry_after)
+                except Exception as e:
+                    print(f"[ERROR] Batch fact-check failed for {group['claim_text'][:50]}...: {str(e)}")
+                    return dict(item, status="error", error=str(e))
+            return dict(item, status="partial" if result.get("partial") else "checked", result=result)
+
+        tasks = [
+            asyncio.create_task(check(group))
+            for claim_hash, group in groups.items()
+            if claim_hash not in cached_responses
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away before the batch finished
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def check_fact_stream(self, claim_text: str):
+        """
+        Execute the pipeline, yielding progress events as each stage completes.
+
+        Events (name, data) in order: "cache" ({"hit": bool}), then on a miss
+        "structured_claim", "search_query", "research_partial" (research so far,
+        each replacing the previous) as Perplexity streams, "research" and one
+        "verdict_token" per streamed chunk; finally "result" with the formatted response, or
+        "error" if the pipeline raised or the request was shed (with "retry_after").
+
+        Args:
+            claim_text (str): The claim to fact-check
+
+        Yields:
+            tuple: (event_name, data)
+        """
+        queue = asyncio.Queue()
+
+        async def emit(event: str, data):
+            await queue.put((event, data))
+
+        async def produce():
+            try:
+                cached_response = await self._lookup_cache(claim_text)
+                await emit("cache", {"hit": bool(cached_response)})
+                if cached_response:
+                    result = cached_response
+                else:
+                    result = self._lookup_failed(claim_text)
+                    if not result:
+                        admission_controller.admit()
+                        result = await self._check_uncached(claim_text, emit=emit)
+                await emit("result", result)
+            except Overloaded as e:
+                await emit("error", {"message": str(e), "retry_after": e.retry_after})
+            except Exception as e:
+                print(f"[ERROR] Streaming fact-check failed: {str(e)}")
+                await emit("error", {"message": str(e)})
+            finally:
+                await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            # Client went away before the pipeline finished
+            if not producer.done():
+                producer.cancel()
+
+    async def _lookup_cache(self, claim_text: str):
+        """
+        Step 1: look the claim up in the in-process response cache, then in
+        the database cache, then for a near-duplicate stored claim. Expired
+        verdicts count as misses; stale ones are served and refreshed.
+
+        Returns:
+            dict or None: Formatted cached response
+        """
+        async with track_stage("cache_lookup"):
+            claim_hash = self.repo._hash_claim(claim_text)
+            tier = "memory"
+            cached_response = response_cache.get(claim_hash)
+            if cached_response is None:
+                tier = "database"
+                cached_claim = await self.repo.find_cached_claim(claim_text)
+                if cached_claim:
+                    cached_response = self._remember_cached(claim_hash, claim_text, cached_claim)
+            if cached_response is None and SIMILARITY_CACHE:
+                tier = "similar"
+                cached_response = await self._lookup_similar(claim_text)
+            cache_tier_stats.record(tier if cached_response else None)
+        return cached_response
+
+    def _lookup_failed(self, claim_text: str):
+        """
+        The degraded result of a recent research failure for this claim,
+        served until the negative cache entry expires or the upstream
+        recovers. Checked before admission, coalescing and scheduling, so
+        failing fast never waits for (or is shed by) a pipeline slot.
+
+        Returns:
+            dict or None: Formatted degraded response with `retry_after`
+        """
+        failure = research_failures.get(claim_key(self.repo._hash_claim(claim_text)))
+        if not failure:
+            return None
+        print(f"[NEGATIVE_CACHE] Research failed recently ({failure.error_class}), "
+              f"returning degraded result: {claim_text[:50]}...")
+        return dict(failure.value, retry_after=round(failure.retry_in, 1), cached=False)
+
+    async def _lookup_similar(self, claim_text: str):
+        """
+        The verdict of a stored claim that says the same thing in other
+        words, with the matched claim and its similarity attached.
+        Not kept in the response cache: it would outlive the matched
+        claim's invalidation.
+        """
+        cached_claim, similarity = await self.repo.find_similar_claim(claim_text)
+        if not cached_claim:
+            return None
+        cached_response = self._serve_cached(cached_claim)
+        if cached_response is None:
+            return None
+        cached_response = self._as_match(cached_response, claim_text, cached_claim)
+        cached_response["similarity"] = round(similarity, 3)
+        return cached_response
+
+    async def _lookup_canonical(self, claim_text: str, structured_claim: dict):
+        """
+        Post-structuring lookup: the verdict of a stored claim that
+        structured to the same canonical claim, entities and time period.
+        On a hit this phrasing is recorded as an alias of the stored claim,
+        so the next identical submission hits the step-1 cache. Only fresh
+        verdicts count: research is about to run anyway.
+
+        Returns:
+            dict or None: Formatted cached response
+        """
+        if not CANONICAL_CACHE:
+            return None
+        async with track_stage("canonical_lookup"):
+            cached_claim = await self.repo.find_by_canonical_hash(canonical_claim_hash(structured_claim))
+            if cached_claim and freshness(cached_claim).state != FRESH:
+                cached_claim = None
+            cache_tier_stats.record_canonical(bool(cached_claim))
+            if not cached_claim:
+                return None
+            claim_hash = self.repo._hash_claim(claim_text)
+            if claim_hash not in cached_claim.get("alias_hashes", []) and claim_hash != cached_claim["claim_hash"]:
+                await self.repo.add_alias(cached_claim["_id"], claim_text)
+        print(f"[CACHE] Canonical hit: {claim_text[:50]}... ~ {cached_claim.get('prompt', '')[:50]}...")
+        return self._remember_cached(claim_hash, claim_text, cached_claim)
+
+    def _remember_cached(self, claim_hash: str, claim_text: str, cached_claim: dict):
+        """
+        Format a claim read from the database and, while its verdict is
+        fresh, keep it in the response cache.
+
+        Returns:
+            dict or None: Formatted cached response, None if the verdict expired
+        """
+        cached_response = self._serve_cached(cached_claim)
+        if cached_response is None:
+            return None
+        if cached_claim.get("claim_hash") != claim_hash:
+            # Found through an alias: the stored claim was worded differently
+            cached_response = self._as_match(cached_response, claim_text, cached_claim)
+        if not cached_response.get("stale"):
+            response_cache.put(claim_hash, cached_response, ttl_seconds=freshness(cached_claim).fresh_for)
+        return cached_response
+
+    def _serve_cached(self, cached_claim: dict):
+        """
+        Apply the freshness policy to a stored verdict: fresh ones are
+        served as they are, stale ones flagged `stale` while a background
+        refresh re-checks the claim, expired ones not at all.
+
+        Returns:
+            dict or None: Formatted cached response, None if the verdict expired
+        """
+        state = freshness(cached_claim)
+        CACHE_FRESHNESS.labels(state.state, state.category).inc()
+        if state.state not in (FRESH, STALE):
+            print(f"[CACHE] Expired {state.category} verdict ({state.age_seconds / 86400:.1f} days old), re-checking: "
+                  f"{cached_claim.get('prompt', '')[:50]}...")
+            return None
+        cached_response = self._format_cached_response(cached_claim)
+        if state.state == STALE:
+            cached_response["stale"] = True
+            claim_text = cached_claim.get("prompt", "")
+            if claim_text and stale_refreshes.start(cached_claim["claim_hash"], lambda: self._refresh(claim_text)):
+                print(f"[CACHE] Serving stale {state.category} verdict, refreshing in background: {claim_text[:50]}...")
+        return cached_response
+
+    async def _refresh(self, claim_text: str):
+        """
+        Re-check a claim with a stale verdict. Runs the full pipeline without
+        the canonical tier, which could answer with another claim's verdict
+        and leave this one stale, so the new verdict is saved under the
+        claim's own hash. Already deduplicated by stale_refreshes, so it
+        doesn't go through claim_flights.
+        """
+        root, token = start_trace("refresh", claim_hash=self.repo._hash_claim(claim_text))
+        error = None
+        with deadline_scope(DEADLINE_TEXT_SECONDS), user_scope(REFRESH_USER):
+            async with track_request("refresh"):
+                try:
+                    admission_controller.admit()
+                    await self._run_scheduled(claim_text, refresh=True)
+                    STALE_REFRESHES.labels("completed").inc()
+                except Overloaded as e:
+                    error = e
+                    STALE_REFRESHES.labels("shed").inc()
+                    print(f"[CACHE] Skipping refresh while overloaded: {claim_text[:50]}...")
+                except Exception as e:
+                    error = e
+                    STALE_REFRESHES.labels("failed").inc()
+                    print(f"[CACHE] Refresh failed for {claim_text[:50]}...: {str(e)}")
+        end_trace(root, token, error)
+
+    def _as_match(self, cached_response: dict, claim_text: str, cached_claim: dict) -> dict:
+        """Present another claim's cached verdict as the answer to `claim_text`."""
+        cached_response["matched_claim"] = cached_claim.get("prompt", "")
+        cached_response["claim_text"] = claim_text
+        return cached_response
+
+    async def _emit(self, emit, event: str, data):
+        """Forward a progress event when running in streaming mode."""
+        if emit:
+            await emit(event, data)
+
+    async def _run_scheduled(self, claim_text: str, emit=None, refresh: bool = False) -> dict:
+        """
+        Run the pipeline once the fair scheduler grants a text-lane slot.
+        If the request budget runs out while queued, returns a partial result.
+        """
+        try:
+            async with pipeline_scheduler.slot("text"):
+                return await self._run_pipeline(claim_text, emit, refresh=refresh)
+        except DeadlineExceeded as e:
+            print(f"[WARNING] {str(e)}")
+            research_data = self.perplexity._timeout_research(claim_text)
+            formatted_response = self._format_response(claim_text, self._partial_verdict(research_data), research_data)
+            formatted_response["cached"] = False
+            return formatted_response
+
+    async def _run_pipeline(self, claim_text: str, emit=None, refresh: bool = False) -> dict:
+        """
+        Run steps 2-6 of the pipeline for a claim that missed the cache.
+
+        Args:
+            claim_text (str): The claim to fact-check
+            emit: Optional async callback(event, data) for progress events
+            refresh (bool): Re-checking a stale verdict: skip the canonical
+                tier so the result is always researched and saved
 
-        # Step 3: Perplexity Deep Research
-        research_data = self.perplexity.deep_research(search_query, structured_claim)
+        Returns:
+            dict: Formatted fact-check result
+        """
+        on_partial = (lambda research: emit("research_partial", research)) if emit else None
+
+        if self.speculative:
+            # Steps 2 + 3 overlapped: research starts before structuring finishes
+            structured_claim, research_data, cached_response = await self._structure_and_research_speculatively(
+                claim_text, emit, on_partial, use_canonical=not refresh
+            )
+            if cached_response:
+                return cached_response
+        else:
+            # Step 2: LLM Structuring
+            async with track_stage("structure_claim"):
+                structured_claim = await self.structuring.structure_claim_async(claim_text)
+            search_query = self.structuring.create_search_query(structured_claim)
+            await self._emit(emit, "structured_claim", structured_claim)
+            await self._emit(emit, "search_query", {"search_query": search_query})
+
+            # A differently worded claim may have structured to the same one
+            if not refresh:
+                cached_response = await self._lookup_canonical(claim_text, structured_claim)
+                if cached_response:
+                    return cached_response
+
+            # Step 3: Perplexity Deep Research
+            async with track_stage("deep_research"):
+                research_data = await self.perplexity.deep_research_async(search_query, structured_claim, on_partial)
+
+        await self._emit(emit, "research", research_data)
 
         # Step 4: Generate Final Result
-        final_result = self._generate_verdict(claim_text, structured_claim, research_data)
+        async with track_stage("generate_verdict"):
+            final_result = await self._generate_verdict(claim_text, structured_claim, research_data, emit=emit)
 
         # Step 5: Database Storage
         formatted_response = self._format_response(claim_text, final_result, research_data, structured_claim)
 
-        # Only cache if research was successful (don't cache API failures)
-        research_summary = research_data.get("summary", "")
-        is_successful_research = (
-            research_summary and
-            "Unable to perform deep research" not in research_summary and
-            "requires Perplexity API key" not in research_summary
-        )
-
-        if is_successful_research:
-            self.repo.save(
-                claim_text=claim_text,
-                response_text=str(formatted_response),
-                structured_data=structured_claim,
-                research_data=research_data
-            )
+        # Only cache complete results backed by successful research
+        # (don't cache API failures or answers cut short by the deadline)
+        if self._is_successful_research(research_data) and not final_result.get("partial"):
+            async with track_stage("save"):
+                claim_id = await self.repo.save(
+                    claim_text=claim_text,
+                    response=formatted_response,
+                    structured_data=structured_claim,
+                    research_data=research_data
+                )
+            if claim_id:
+                response_cache.put(
+                    self.repo._hash_claim(claim_text), {**formatted_response, **CACHED_MARKER},
+                    ttl_seconds=CATEGORY_TTLS[classify_claim(claim_text, structured_claim)]
+                )
+        elif final_result.get("partial"):
+            print(f"[WARNING] Skipping cache for partial result: {claim_text[:50]}...")
         else:
             print(f"[WARNING] Skipping cache for failed research: {claim_text[:50]}...")
+            if research_data.get("error_class"):
+                research_failures.put(
+                    claim_key(self.repo._hash_claim(claim_text)), research_data["error_class"], value=dict(formatted_response)
+                )
 
         # Step 6: Return Response
         formatted_response["cached"] = False
         return formatted_response
 
-    def _generate_verdict(self, claim_text: str, structured_claim: dict, research_data: dict, max_retries: int = 3) -> dict:
+    async def _structure_and_research_speculatively(self, claim_text: str, emit=None, on_partial=None,
+                                                    use_canonical: bool = True) -> tuple:
+        """
+        Run structuring and research concurrently.
+
+        Research starts on a locally built query at the same moment structuring
+        starts. Once the structured claim is known, the speculative research is
+        kept if the refined query has not diverged past the threshold; otherwise
+        it is discarded and research is re-run on the refined query.
+
+        Args:
+            claim_text (str): The claim to fact-check
+            emit: Optional async callback(event, data) for progress events
+            on_partial: Optional async callback(research) for streamed partial research
+            use_canonical (bool): Look the structured claim up in the canonical cache
+
+        Returns:
+            tuple: (structured_claim, research_data, cached_response); if the
+                structured claim hit the canonical cache, research is cancelled
+                and research_data is None
+        """
+        started = time.monotonic()
+        speculative_query = self.structuring.create_local_query(claim_text)
+        local_structure = self.structuring._create_fallback_structure(claim_text)
+
+        research_task = asyncio.create_task(
+            self._timed_research(speculative_query, local_structure, on_partial)
+        )
+        try:
+            async with track_stage("structure_claim"):
+                structured_claim = await self.structuring.structure_claim_async(claim_text)
+        except BaseException:
+            research_task.cancel()
+            raise
+        structuring_seconds = time.monotonic() - started
+
+        search_query = self.structuring.create_search_query(structured_claim)
+        await self._emit(emit, "structured_claim", structured_claim)
+        await self._emit(emit, "search_query", {"search_query": search_query})
+
+        try:
+            cached_response = await self._lookup_canonical(claim_text, structured_claim) if use_canonical else None
+        except BaseException:
+            research_task.cancel()
+            raise
+        if cached_response:
+            research_task.cancel()
+            return structured_claim, None, cached_response
+
+        divergence = self.structuring.query_divergence(speculative_query, structured_claim, search_query)
+
+        set_span_attributes(speculation_divergence=round(divergence, 3))
+        if divergence <= self.divergence_threshold:
+            research_data, research_seconds = await research_task
+            if self._is_successful_research(research_data):
+                # The overlap between the two stages is the time we saved
+                speculation_stats.record(True, divergence, min(structuring_seconds, research_seconds))
+                return structured_claim, research_data, None
+        else:
+            research_task.cancel()
+
+        speculation_stats.record(False, divergence)
+        async with track_stage("deep_research"):
+            research_data = await self.perplexity.deep_research_async(search_query, structured_claim, on_partial)
+        return structured_claim, research_data, None
+
+    async def _timed_research(self, search_query: str, structured_claim: dict, on_partial=None) -> tuple:
+        """Run research and report how long it took."""
+        started = time.monotonic()
+        async with track_stage("deep_research"):
+            research_data = await self.perplexity.deep_research_async(search_query, structured_claim, on_partial)
+        return research_data, time.monotonic() - started
+
+    def _is_successful_research(self, research_data: dict) -> bool:
+        """Check whether research data came from Perplexity rather than the fallback."""
+        research_summary = research_data.get("summary", "")
+        return bool(
+            research_summary and
+            "Unable to perform deep research" not in research_summary and
+            "requires Perplexity API key" not in research_summary
+        )
+
+    async def _generate_verdict(self, claim_text: str, structured_claim: dict, research_data: dict, max_retries: int = 3, emit=None) -> dict:
         """
         Generate the final verdict based on research data.
 
@@ -86,34 +751,94 @@ class ProfessionalFactCheckService:
             claim_text (str): Original claim
             structured_claim (dict): Structured claim data with new schema
             research_data (dict): Perplexity research results
-            max_retries (int): Maximum retry attempts for API overload
+            max_retries (int): Maximum attempts when Gemini is overloaded or unreachable
+            emit: Optional async callback; when set the verdict is streamed as "verdict_token" events
 
         Returns:
             dict: Verdict with status and explanation
         """
-        last_error = None
+        verdict_prompt = self._build_verdict_prompt(claim_text, structured_claim, research_data)
+
+        try:
+            if emit:
+                result_text = await gemini_gateway.generate_stream(
+                    "generate_verdict", verdict_prompt,
+                    on_text=lambda text: emit("verdict_token", {"text": text}),
+                    # Tell the client to discard partial tokens before a retry
+                    on_reset=lambda: emit("verdict_reset", {}),
+                    model=self.model, max_attempts=max_retries, min_budget=VERDICT_MIN_BUDGET_SECONDS
+                )
+            else:
+                result_text = await gemini_gateway.generate(
+                    "generate_verdict", verdict_prompt,
+                    model=self.model, max_attempts=max_retries, min_budget=VERDICT_MIN_BUDGET_SECONDS
+                )
+            return self._parse_verdict(result_text.strip(), research_data)
+
+        except DeadlineExceeded as e:
+            print(f"Verdict generation stopped: {str(e)}")
+            return self._partial_verdict(research_data)
+
+        except CircuitOpen as e:
+            print(f"[WARNING] Skipping verdict generation: {str(e)}")
+            return {
+                "status": "⚠️ Unverified",
+                "explanation": "Gemini is temporarily unavailable, so no verdict could be reached. "
+                               "The research gathered so far is included below.",
+                "sources": research_data.get("sources", [])
+            }
 
-        for attempt in range(max_retries):
-            try:
-                chat = self.client.chats.create(model=self.model)
+        except Exception as e:
+            print(f"Verdict generation error: {str(e)}")
+            return {
+                "status": "⚠️ Unverified",
+                "explanation": f"Unable to generate verdict. {str(e)}",
+                "sources": research_data.get("sources", [])
+            }
 
-                # Extract structured components
-                structured_statement = structured_claim.get("claim", claim_text)
-                entities = structured_claim.get("entities", [])
-                time_period = structured_claim.get("time_period", "")
-                context = structured_claim.get("context", "")
+    def _partial_verdict(self, research_data: dict) -> dict:
+        """
+        Best-effort result when the request budget runs out before a verdict:
+        unverified, with whatever research was gathered.
+        """
+        print("[WARNING] Request budget exhausted, returning partial result")
+        return {
+            "status": "⚠️ Unverified",
+            "explanation": "The fact-check ran out of time before a verdict could be reached. "
+                           "The research gathered so far is included below.",
+            "sources": research_data.get("sources", []),
+            "partial": True
+        }
 
-                # Build context from research
-                research_summary = research_data.get("summary", "No research data available")
-                findings = research_data.get("findings", [])
-                sources = research_data.get("sources", [])
+    def _build_verdict_prompt(self, claim_text: str, structured_claim: dict, research_data: dict) -> str:
+        """
+        Build the verdict prompt from the structured claim and research data.
 
-                findings_text = "\n".join([f"- {f}" for f in findings]) if findings else "No specific findings"
-                sources_text = "\n".join([f"- {s}" for s in sources]) if sources else "No sources available"
-                entities_text = ", ".join(entities) if entities else "N/A"
+        Args:
+            claim_text (str): Original claim
+            structured_claim (dict): Structured claim data with new schema
+            research_data (dict): Perplexity research results
 
-                # Build structured context section
-                structured_context = f"""
+        Returns:
+            str: Prompt for Gemini
+        """
+        # Extract structured components
+        structured_statement = structured_claim.get("claim", claim_text)
+        entities = structured_claim.get("entities", [])
+        time_period = structured_claim.get("time_period", "")
+        context = structured_claim.get("context", "")
+
+        # Build context from research
+        research_summary = research_data.get("summary", "No research data available")
+        findings = research_data.get("findings", [])
+        sources = research_data.get("sources", [])
+
+        findings_text = "\n".join([f"- {f}" for f in findings]) if findings else "No specific findings"
+        sources_text = "\n".join([f"- {s}" for s in sources]) if sources else "No sources available"
+        entities_text = ", ".join(entities) if entities else "N/A"
+
+        # Build structured context section
+        structured_context = f"""
 STRUCTURED CLAIM ANALYSIS:
 - Main Claim: {structured_statement}
 - Key Entities: {entities_text}
@@ -121,7 +846,7 @@ STRUCTURED CLAIM ANALYSIS:
 - Context: {context if context else "None provided"}
 """
 
-                verdict_prompt = f"""
+        verdict_prompt = f"""
 You are a professional fact-checker. Based on the research data below, evaluate the truthfulness of this claim.
 
 ORIGINAL INPUT: "{claim_text}"
@@ -150,63 +875,40 @@ Format your response EXACTLY as:
 STATUS: [status]
 EXPLANATION: [explanation]
 """
+        return verdict_prompt
 
-                response = chat.send_message(verdict_prompt)
-                result_text = response.text.strip()
-
-                # Parse the response
-                status = "⚠️ Unverified"
-                explanation = "Unable to verify this claim based on available information."
-
-                lines = result_text.split('\n')
-                for i, line in enumerate(lines):
-                    if line.startswith("STATUS:"):
-                        status = line.replace("STATUS:", "").strip()
-                    elif line.startswith("EXPLANATION:"):
-                        # Get explanation (might span multiple lines)
-                        explanation = line.replace("EXPLANATION:", "").strip()
-                        # Check if explanation continues on next lines
-                        for j in range(i + 1, len(lines)):
-                            if not lines[j].startswith("STATUS:") and lines[j].strip():
-                                explanation += " " + lines[j].strip()
-                            else:
-                                break
-
-                return {
-                    "status": status,
-                    "explanation": explanation.strip(),
-                    "sources": sources
-                }
+    def _parse_verdict(self, result_text: str, research_data: dict) -> dict:
+        """
+        Parse the STATUS/EXPLANATION lines returned by Gemini.
 
-            except Exception as e:
-                last_error = e
-                error_msg = str(e)
-
-                # Check if it's a 503 (overload) error
-                if "503" in error_msg or "UNAVAILABLE" in error_msg or "overload" in error_msg.lower():
-                    if attempt < max_retries - 1:
-                        # Exponential backoff: wait 2^attempt seconds
-                        wait_time = 2 ** attempt
-                        print(f"Gemini API overloaded during verdict generation (attempt {attempt + 1}/{max_retries}). Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        print(f"Gemini API overloaded after {max_retries} attempts.")
-                else:
-                    print(f"Verdict generation error: {error_msg}")
+        Args:
+            result_text (str): Raw model output
+            research_data (dict): Research results (sources are passed through)
 
-                # If last attempt, return error result
-                if attempt == max_retries - 1:
-                    return {
-                        "status": "⚠️ Unverified",
-                        "explanation": f"Unable to generate verdict. {error_msg}",
-                        "sources": research_data.get("sources", [])
-                    }
+        Returns:
+            dict: Verdict with status, explanation and sources
+        """
+        # Parse the response
+        status = "⚠️ Unverified"
+        explanation = "Unable to verify this claim based on available information."
+
+        lines = result_text.split('\n')
+        for i, line in enumerate(lines):
+            if line.startswith("STATUS:"):
+                status = line.replace("STATUS:", "").strip()
+            elif line.startswith("EXPLANATION:"):
+                # Get explanation (might span multiple lines)
+                explanation = line.replace("EXPLANATION:", "").strip()
+                # Check if explanation continues on next lines
+                for j in range(i + 1, len(lines)):
+                    if not lines[j].startswith("STATUS:") and lines[j].strip():
+                        explanation += " " + lines[j].strip()
+                    else:
+                        break
 
-        # Fallback if all retries failed
         return {
-            "status": "⚠️ Unverified",
-            "explanation": f"Unable to generate verdict after {max_retries} attempts. Please try again later.",
+            "status": status,
+            "explanation": explanation.strip(),
             "sources": research_data.get("sources", [])
         }
 
@@ -232,6 +934,15 @@ EXPLANATION: [explanation]
             "findings": research_data.get("findings", [])
         }
 
+        if verdict.get("partial"):
+            response["partial"] = True
+
+        # Research failed upstream: say how, and when it is worth retrying
+        if research_data.get("error_class"):
+            response["research_error"] = research_data["error_class"]
+            if research_data.get("retry_after") is not None:
+                response["retry_after"] = research_data["retry_after"]
+
         # Include structured claim data if available
         if structured_claim:
             response["structured_claim"] = {
@@ -253,19 +964,14 @@ EXPLANATION: [explanation]
         Returns:
             dict: Formatted cached response
         """
-        # Try to parse structured response if available
         response = cached_claim.get("response", "")
 
-        # If response is already structured (dict stored as string), parse it
-        if isinstance(response, str) and response.startswith("{"):
-            try:
-                import json
-                response_dict = json.loads(response.replace("'", '"'))
-                response_dict["cached"] = True
-                response_dict["cache_note"] = "✓ Retrieved from previous research"
-                return response_dict
-            except:
-                pass
+        # Stored as a subdocument (schema version 2); older documents hold
+        # a repr until `python -m app.migrate_claims` has converted them
+        if not isinstance(response, dict) and cached_claim.get("schema_version", 1) < CLAIM_SCHEMA_VERSION:
+            response = parse_legacy_response(response) or response
+        if isinstance(response, dict):
+            return {**response, **CACHED_MARKER}
 
         # Fallback: return basic structure
         return {
@@ -273,6 +979,5 @@ EXPLANATION: [explanation]
             "status": "⚠️ Cached Result",
             "explanation": str(response),
             "sources": cached_claim.get("research_data", {}).get("sources", []),
-            "cached": True,
-            "cache_note": "✓ Retrieved from previous research"
+            **CACHED_MARKER
         }
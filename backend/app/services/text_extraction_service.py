@@ -1,10 +1,16 @@
-from google import genai
 from google.genai import types
 from PIL import Image
 from app.core.config import GEMINI_API_KEY, GEMINI_MODEL
+from app.core.deadline import budget
+from app.core.async_utils import run_sync
+from app.core.clients import gemini_client
+from app.core.metrics import track_stage
+from app.core.upstream_client import call_upstream
+from app.core.gemini_gateway import gemini_gateway
+from app.core.tracing import set_span_attributes
+import asyncio
 import tempfile
 import os
-import time
 from pydub import AudioSegment
 
 
@@ -18,10 +24,60 @@ class TextExtractionService:
     def __init__(self):
         if not GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
-        self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.model = GEMINI_MODEL
 
+    @property
+    def aio_client(self):
+        """Async Gemini client shared by the whole process."""
+        return gemini_client()
+
     def extract_text_from_image(self, file_content: bytes, filename: str) -> dict:
+        """Synchronous wrapper around extract_text_from_image_async."""
+        return run_sync(self.extract_text_from_image_async(file_content, filename))
+
+    def extract_text_from_video(self, file_content: bytes, filename: str) -> dict:
+        """Synchronous wrapper around extract_text_from_video_async."""
+        return run_sync(self.extract_text_from_video_async(file_content, filename))
+
+    def extract_text_from_audio(self, file_content: bytes, filename: str, content_type: str) -> dict:
+        """Synchronous wrapper around extract_text_from_audio_async."""
+        return run_sync(self.extract_text_from_audio_async(file_content, filename, content_type))
+
+    async def _wait_until_active(self, uploaded_file, label: str, max_wait: int = 300):
+        """
+        Poll the Gemini Files API until an upload leaves the PROCESSING state.
+
+        Args:
+            uploaded_file: File handle returned by files.upload
+            label (str): "Video" or "Audio", used in log and error messages
+            max_wait (int): Maximum seconds to wait, shortened to the request budget
+
+        Returns:
+            The ACTIVE file handle
+
+        Raises:
+            ValueError: If processing failed, timed out or ended in an unexpected state
+        """
+        max_wait = int(budget(max_wait))
+        waited = 0
+        while uploaded_file.state.name == "PROCESSING" and waited < max_wait:
+            await asyncio.sleep(2)
+            waited += 2
+            uploaded_file = await call_upstream(
+                "gemini", "files_get", lambda: self.aio_client.files.get(name=uploaded_file.name)
+            )
+            print(f"{label} processing state: {uploaded_file.state.name} (waited {waited}s)")
+
+        if uploaded_file.state.name == "FAILED":
+            raise ValueError(f"{label} processing failed. Check if format is supported.")
+        elif uploaded_file.state.name == "PROCESSING":
+            raise ValueError(f"{label} processing timeout after {max_wait} seconds")
+        elif uploaded_file.state.name != "ACTIVE":
+            raise ValueError(f"File is in {uploaded_file.state.name} state, expected ACTIVE")
+
+        return uploaded_file
+
+    async def extract_text_from_image_async(self, file_content: bytes, filename: str) -> dict:
         """
         Extract text from image using OCR (Gemini Vision).
 
@@ -43,7 +99,6 @@ class TextExtractionService:
             # Use Gemini Vision for OCR
             print(f"Extracting text from image: {filename}")
             image = Image.open(temp_file_path)
-            chat = self.client.chats.create(model=self.model)
 
             ocr_prompt = """
 Extract all visible text from this image. Include:
@@ -58,8 +113,8 @@ TEXT CONTENT: [extracted text or "No text found"]
 VISUAL CONTEXT: [brief description of relevant visual elements]
 """
 
-            response = chat.send_message([ocr_prompt, image])
-            extracted_text = response.text.strip()
+            set_span_attributes(media_bytes=len(file_content))
+            extracted_text = (await gemini_gateway.generate("extract_image", [ocr_prompt, image], model=self.model)).strip()
 
             print(f"Text extracted successfully from image")
             return {"text": extracted_text, "error": None}
@@ -77,7 +132,7 @@ VISUAL CONTEXT: [brief description of relevant visual elements]
                 except:
                     pass
 
-    def extract_text_from_video(self, file_content: bytes, filename: str) -> dict:
+    async def extract_text_from_video_async(self, file_content: bytes, filename: str) -> dict:
         """
         Extract text from video (transcribe audio + OCR any visible text).
 
@@ -100,29 +155,18 @@ VISUAL CONTEXT: [brief description of relevant visual elements]
             print(f"Uploading video to Gemini Files API...")
 
             # Upload video to Gemini Files API
-            uploaded_file = self.client.files.upload(file=temp_file_path)
+            uploaded_file = await call_upstream(
+                "gemini", "files_upload", lambda: self.aio_client.files.upload(file=temp_file_path)
+            )
             print(f"Video uploaded successfully: {uploaded_file.name}")
 
-            # Wait for processing
-            max_wait = 300  # 5 minutes
-            waited = 0
-            while uploaded_file.state.name == "PROCESSING" and waited < max_wait:
-                time.sleep(2)
-                waited += 2
-                uploaded_file = self.client.files.get(name=uploaded_file.name)
-                print(f"Video processing state: {uploaded_file.state.name} (waited {waited}s)")
-
-            if uploaded_file.state.name == "FAILED":
-                raise ValueError("Video processing failed. Check if format is supported.")
-            elif uploaded_file.state.name == "PROCESSING":
-                raise ValueError(f"Video processing timeout after {max_wait} seconds")
-            elif uploaded_file.state.name != "ACTIVE":
-                raise ValueError(f"File is in {uploaded_file.state.name} state, expected ACTIVE")
+            # Wait for processing (up to 5 minutes)
+            async with track_stage("media_upload_polling"):
+                uploaded_file = await self._wait_until_active(uploaded_file, "Video")
 
             print("Video is now ACTIVE. Extracting text...")
 
             # Extract text using Gemini
-            chat = self.client.chats.create(model=self.model)
             extraction_prompt = """
 Analyze this video and extract:
 1. TRANSCRIPT: All spoken words and dialogue
@@ -135,8 +179,8 @@ VISUAL TEXT: [visible text or "No text visible"]
 KEY CLAIMS: [main claims to fact-check]
 """
 
-            response = chat.send_message([extraction_prompt, uploaded_file])
-            extracted_text = response.text.strip()
+            set_span_attributes(media_bytes=len(file_content))
+            extracted_text = (await gemini_gateway.generate("extract_video", [extraction_prompt, uploaded_file], model=self.model)).strip()
 
             print("Text extracted successfully from video")
             return {"text": extracted_text, "error": None}
@@ -163,7 +207,7 @@ KEY CLAIMS: [main claims to fact-check]
                 except:
                     pass
 
-    def extract_text_from_audio(self, file_content: bytes, filename: str, content_type: str) -> dict:
+    async def extract_text_from_audio_async(self, file_content: bytes, filename: str, content_type: str) -> dict:
         """
         Extract text from audio using speech-to-text.
 
@@ -189,9 +233,9 @@ KEY CLAIMS: [main claims to fact-check]
             # Convert to WAV for better compatibility
             try:
                 print("Converting audio to WAV format...")
-                audio = AudioSegment.from_file(temp_file_path)
                 wav_path = temp_file_path.replace(os.path.splitext(temp_file_path)[1], '.wav')
-                audio.export(wav_path, format="wav")
+                # FFmpeg transcoding is blocking, keep it off the event loop
+                await asyncio.to_thread(self._convert_to_wav, temp_file_path, wav_path)
                 final_file_path = wav_path
                 print("Audio converted successfully to WAV")
             except FileNotFoundError as fnf_error:
@@ -212,29 +256,18 @@ KEY CLAIMS: [main claims to fact-check]
 
             # Upload to Gemini Files API
             print("Uploading audio to Gemini Files API...")
-            uploaded_file = self.client.files.upload(file=final_file_path)
+            uploaded_file = await call_upstream(
+                "gemini", "files_upload", lambda: self.aio_client.files.upload(file=final_file_path)
+            )
             print(f"Audio uploaded successfully: {uploaded_file.name}")
 
-            # Wait for processing
-            max_wait = 300  # 5 minutes
-            waited = 0
-            while uploaded_file.state.name == "PROCESSING" and waited < max_wait:
-                time.sleep(2)
-                waited += 2
-                uploaded_file = self.client.files.get(name=uploaded_file.name)
-                print(f"Audio processing state: {uploaded_file.state.name} (waited {waited}s)")
-
-            if uploaded_file.state.name == "FAILED":
-                raise ValueError("Audio processing failed. Check if format is supported.")
-            elif uploaded_file.state.name == "PROCESSING":
-                raise ValueError(f"Audio processing timeout after {max_wait} seconds")
-            elif uploaded_file.state.name != "ACTIVE":
-                raise ValueError(f"File is in {uploaded_file.state.name} state, expected ACTIVE")
+            # Wait for processing (up to 5 minutes)
+            async with track_stage("media_upload_polling"):
+                uploaded_file = await self._wait_until_active(uploaded_file, "Audio")
 
             print("Audio is now ACTIVE. Transcribing...")
 
             # Transcribe using Gemini
-            chat = self.client.chats.create(model=self.model)
             transcription_prompt = """
 Transcribe this audio and extract:
 1. FULL TRANSCRIPT: Complete transcription of all spoken words
@@ -247,8 +280,8 @@ KEY CLAIMS: [main claims to fact-check]
 CONTEXT: [relevant context]
 """
 
-            response = chat.send_message([transcription_prompt, uploaded_file])
-            extracted_text = response.text.strip()
+            set_span_attributes(media_bytes=len(file_content))
+            extracted_text = (await gemini_gateway.generate("extract_audio", [transcription_prompt, uploaded_file], model=self.model)).strip()
 
             print("Text extracted successfully from audio")
             return {"text": extracted_text, "error": None}
@@ -270,3 +303,8 @@ CONTEXT: [relevant context]
                     os.unlink(wav_path)
                 except:
                     pass
+
+    def _convert_to_wav(self, source_path: str, wav_path: str):
+        """Convert an audio file to WAV using pydub/FFmpeg."""
+        audio = AudioSegment.from_file(source_path)
+        audio.export(wav_path, format="wav")
@@ -1,14 +1,15 @@
-from google import genai
 from app.core.config import GEMINI_API_KEY, GEMINI_MODEL
-import requests
+from app.core.async_utils import LoopLocal, run_sync
+from app.core.gemini_gateway import gemini_gateway
+from app.core.deadline import budget
+from app.core.metrics import track_stage, track_upstream
+from app.core.tracing import set_span_attributes
+import asyncio
+import httpx
+import ssl
 from bs4 import BeautifulSoup
 import re
 from urllib.parse import urlparse
-import urllib3
-import sys
-
-# Disable SSL warnings when we need to bypass SSL verification
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Helper function for safe console output on Windows
 def safe_print(text):
@@ -29,10 +30,51 @@ class URLExtractionService:
     def __init__(self):
         if not GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
-        self.client = genai.Client(api_key=GEMINI_API_KEY)
+        self.fetch_timeout = 20
+        self._http_clients = LoopLocal(lambda: httpx.AsyncClient(timeout=self.fetch_timeout, follow_redirects=True))
+        # Fallback client for sites with broken certificates
+        self._insecure_http_clients = LoopLocal(
+            lambda: httpx.AsyncClient(timeout=self.fetch_timeout, follow_redirects=True, verify=False)
+        )
         self.model = GEMINI_MODEL
 
     def extract_from_url(self, url: str) -> dict:
+        """Synchronous wrapper around extract_from_url_async."""
+        return run_sync(self.extract_from_url_async(url))
+
+    async def _fetch(self, url: str, headers: dict) -> httpx.Response:
+        """
+        Fetch a webpage, retrying without SSL verification if the certificate is rejected.
+
+        Args:
+            url (str): URL to fetch
+            headers (dict): Request headers
+
+        Returns:
+            httpx.Response: Successful response
+
+        Raises:
+            httpx.HTTPError: On timeouts, connection failures or error status codes
+        """
+        try:
+            async with track_upstream("http_fetch", "get"):
+                response = await self._http_clients.get().get(url, headers=headers, timeout=budget(self.fetch_timeout))
+                set_span_attributes(status_code=response.status_code, response_bytes=len(response.content))
+                response.raise_for_status()
+        except httpx.ConnectError as e:
+            if not self._is_ssl_error(e):
+                raise
+            safe_print("[WARNING] SSL verification failed, retrying without SSL verification...")
+            async with track_upstream("http_fetch", "get_insecure"):
+                response = await self._insecure_http_clients.get().get(url, headers=headers, timeout=budget(self.fetch_timeout))
+                response.raise_for_status()
+        return response
+
+    def _is_ssl_error(self, error: Exception) -> bool:
+        """httpx wraps certificate failures in ConnectError; look at the cause."""
+        return isinstance(error.__cause__, ssl.SSLError) or "SSL" in str(error) or "CERTIFICATE" in str(error)
+
+    async def extract_from_url_async(self, url: str) -> dict:
         """
         Extract article content and identify main claims from a URL.
 
@@ -66,7 +108,7 @@ class URLExtractionService:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
                 'Accept-Language': 'en-US,en;q=0.9',
-                # Note: Don't request gzip encoding - let requests handle it automatically
+                # Note: Don't request gzip encoding - let httpx handle it automatically
                 'Connection': 'keep-alive',
                 'Upgrade-Insecure-Requests': '1',
                 'Sec-Fetch-Dest': 'document',
@@ -76,73 +118,14 @@ class URLExtractionService:
             }
 
             # Try with SSL verification first, then without if it fails
-            try:
-                response = requests.get(url, headers=headers, timeout=20, verify=True)
-                response.raise_for_status()
-            except requests.exceptions.SSLError:
-                safe_print("[WARNING] SSL verification failed, retrying without SSL verification...")
-                response = requests.get(url, headers=headers, timeout=20, verify=False)
-                response.raise_for_status()
+            async with track_stage("url_fetch"):
+                response = await self._fetch(url, headers)
 
             safe_print(f"[SUCCESS] Webpage fetched successfully (Status: {response.status_code})")
 
-            # Step 2: Parse HTML and extract text
+            # Step 2: Parse HTML and extract text (CPU-bound, keep it off the event loop)
             safe_print("[2/3] Parsing HTML content...")
-            # Use response.content (raw bytes) - BeautifulSoup handles encoding
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Extract title
-            title = ""
-            if soup.title:
-                title = soup.title.string.strip() if soup.title.string else ""
-            elif soup.find('h1'):
-                title = soup.find('h1').get_text().strip()
-
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe', 'noscript']):
-                element.decompose()
-
-            # Try to find the main article content
-            article_text = ""
-
-            # Look for common article containers (prioritize main and specific classes)
-            article_selectors = [
-                'main',  # Try main first (most semantic)
-                '.article-content',
-                '.post-content',
-                '.entry-content',
-                '.story-body',
-                '.article-body',
-                '[role="article"]',
-                'article'  # Try generic article last (might match navigation/sidebars)
-            ]
-
-            for selector in article_selectors:
-                article_element = soup.select_one(selector)
-                if article_element:
-                    # Extract text from paragraphs
-                    paragraphs = article_element.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-                    extracted_text = '\n\n'.join([p.get_text().strip() for p in paragraphs if p.get_text().strip()])
-
-                    # If we found substantial content, use it
-                    if len(extracted_text) > 200:
-                        article_text = extracted_text
-                        break
-                    # Keep the best result so far even if < 200 chars
-                    elif len(extracted_text) > len(article_text):
-                        article_text = extracted_text
-
-            # Fallback: extract all paragraphs if no article container found
-            if not article_text or len(article_text) < 200:
-                paragraphs = soup.find_all('p')
-                article_text = '\n\n'.join([p.get_text().strip() for p in paragraphs if p.get_text().strip()])
-
-            # Clean up the text
-            article_text = self._clean_text(article_text)
-
-            # Accept even minimal content - no rejection
-            if not article_text:
-                article_text = ""
+            title, article_text = await asyncio.to_thread(self._parse_html, response.content)
 
             safe_print(f"[SUCCESS] Article text extracted ({len(article_text)} characters)")
             if title:
@@ -152,7 +135,7 @@ class URLExtractionService:
             # Step 3: Use Gemini to identify main claims
             # Even if article_text is minimal, attempt to extract claim from title or URL
             safe_print("\n[3/3] Analyzing content to identify main factual claims...")
-            main_claim = self._extract_main_claim(article_text, title, url)
+            main_claim = await self._extract_main_claim(article_text, title, url)
 
             safe_print(f"[SUCCESS] Main claim identified ({len(main_claim)} chars)")
 
@@ -164,7 +147,7 @@ class URLExtractionService:
                 "error": None
             }
 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             # No rejection - create a claim from the URL itself
             safe_print(f"[NOTICE] Request timeout, proceeding with URL as claim")
             parsed_url = urlparse(url)
@@ -176,7 +159,7 @@ class URLExtractionService:
                 "error": None
             }
 
-        except requests.exceptions.ConnectionError as e:
+        except httpx.ConnectError as e:
             # No rejection - create a claim from the URL itself
             safe_print(f"[NOTICE] Connection error, proceeding with URL as claim")
             parsed_url = urlparse(url)
@@ -188,21 +171,9 @@ class URLExtractionService:
                 "error": None
             }
 
-        except requests.exceptions.SSLError as e:
-            # No rejection - create a claim from the URL itself
-            safe_print(f"[NOTICE] SSL error, proceeding with URL as claim")
-            parsed_url = urlparse(url)
-            return {
-                "text": f"SSL certificate issue with this URL: {url}",
-                "main_claim": f"Content related to the URL: {url}",
-                "title": parsed_url.netloc or url,
-                "source": parsed_url.netloc if parsed_url else url,
-                "error": None
-            }
-
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             # No rejection - create a claim from the URL itself
-            safe_print(f"[NOTICE] HTTP error {e.response.status_code if hasattr(e, 'response') else 'unknown'}, proceeding with URL as claim")
+            safe_print(f"[NOTICE] HTTP error {e.response.status_code}, proceeding with URL as claim")
             parsed_url = urlparse(url)
             return {
                 "text": f"HTTP error when accessing this URL: {url}",
@@ -227,6 +198,74 @@ class URLExtractionService:
                 "error": None
             }
 
+    def _parse_html(self, content: bytes) -> tuple:
+        """
+        Parse raw HTML and extract the title and main article text.
+
+        Args:
+            content (bytes): Raw response body
+
+        Returns:
+            tuple: (title, article_text)
+        """
+        # Use response.content (raw bytes) - BeautifulSoup handles encoding
+        soup = BeautifulSoup(content, 'html.parser')
+
+        # Extract title
+        title = ""
+        if soup.title:
+            title = soup.title.string.strip() if soup.title.string else ""
+        elif soup.find('h1'):
+            title = soup.find('h1').get_text().strip()
+
+        # Remove unwanted elements
+        for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe', 'noscript']):
+            element.decompose()
+
+        # Try to find the main article content
+        article_text = ""
+
+        # Look for common article containers (prioritize main and specific classes)
+        article_selectors = [
+            'main',  # Try main first (most semantic)
+            '.article-content',
+            '.post-content',
+            '.entry-content',
+            '.story-body',
+            '.article-body',
+            '[role="article"]',
+            'article'  # Try generic article last (might match navigation/sidebars)
+        ]
+
+        for selector in article_selectors:
+            article_element = soup.select_one(selector)
+            if article_element:
+                # Extract text from paragraphs
+                paragraphs = article_element.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+                extracted_text = '\n\n'.join([p.get_text().strip() for p in paragraphs if p.get_text().strip()])
+
+                # If we found substantial content, use it
+                if len(extracted_text) > 200:
+                    article_text = extracted_text
+                    break
+                # Keep the best result so far even if < 200 chars
+                elif len(extracted_text) > len(article_text):
+                    article_text = extracted_text
+
+        # Fallback: extract all paragraphs if no article container found
+        if not article_text or len(article_text) < 200:
+            paragraphs = soup.find_all('p')
+            article_text = '\n\n'.join([p.get_text().strip() for p in paragraphs if p.get_text().strip()])
+
+        # Clean up the text
+        article_text = self._clean_text(article_text)
+
+        # Accept even minimal content - no rejection
+        if not article_text:
+            article_text = ""
+
+        return title, article_text
+
     def _clean_text(self, text: str) -> str:
         """Clean extracted text by removing extra whitespace and noise."""
         # Remove multiple newlines
@@ -238,7 +277,7 @@ class URLExtractionService:
         text = '\n'.join(lines)
         return text.strip()
 
-    def _extract_main_claim(self, article_text: str, title: str, url: str = "") -> str:
+    async def _extract_main_claim(self, article_text: str, title: str, url: str = "") -> str:
         """
         Use Gemini to identify the main factual claim(s) from the article.
 
@@ -261,8 +300,6 @@ class URLExtractionService:
             # Truncate article if too long (keep first 5000 chars for analysis)
             truncated_text = article_text[:5000] if len(article_text) > 5000 else article_text
 
-            chat = self.client.chats.create(model=self.model)
-
             claim_extraction_prompt = f"""
 You are analyzing a news article or web content to identify the main factual claim(s) that should be fact-checked.
 
@@ -287,8 +324,7 @@ Format your response as:
 MAIN CLAIM: [the primary factual claim(s) to fact-check]
 """
 
-            response = chat.send_message(claim_extraction_prompt)
-            result = response.text.strip()
+            result = (await gemini_gateway.generate("extract_main_claim", claim_extraction_prompt, model=self.model)).strip()
 
             # Extract the claim from the response
             if "MAIN CLAIM:" in result:
@@ -0,0 +1,61 @@
+"""
+Standalone background job worker.
+
+Runs fact-check jobs from the shared MongoDB queue, so pipeline capacity
+can be scaled separately from the API nodes:
+
+    python -m app.worker --concurrency 8
+
+SIGTERM (or Ctrl+C) drains the worker: it stops claiming jobs and exits
+once the running ones finish. A second signal stops immediately; the
+interrupted jobs are retried elsewhere after their visibility timeout.
+"""
+from app.services.job_worker import JobWorker
+from app.core.config import JOB_WORKER_CONCURRENCY, WORKER_METRICS_PORT
+from app.core.clients import warm_up, close_clients
+from prometheus_client import start_http_server
+import argparse
+import asyncio
+import signal
+
+
+async def run_worker(concurrency: int, worker_id: str = None):
+    await warm_up()
+    worker = JobWorker(concurrency=concurrency, worker_id=worker_id)
+    run_task = asyncio.create_task(worker.run())
+    loop = asyncio.get_running_loop()
+
+    def on_signal():
+        if worker.stopping:
+            print("[JOBS] Second signal received, stopping immediately")
+            run_task.cancel()
+        else:
+            print("[JOBS] Shutdown requested, draining running jobs (signal again to force)")
+            worker.stop()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, on_signal)
+
+    try:
+        await run_task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await close_clients()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the fact-check background job worker")
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY, help="Jobs to run at the same time")
+    parser.add_argument("--worker-id", default=None, help="Worker name reported in heartbeats (default: host:pid:random)")
+    args = parser.parse_args()
+
+    if WORKER_METRICS_PORT:
+        start_http_server(WORKER_METRICS_PORT)
+        print(f"[JOBS] Prometheus metrics on port {WORKER_METRICS_PORT}")
+
+    asyncio.run(run_worker(args.concurrency, args.worker_id))
+
+
+if __name__ == "__main__":
+    main()
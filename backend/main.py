@@ -1,8 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.claim_api import router as claim_router
 from app.api.auth_api import router as auth_router
-from app.core.config import FRONTEND_URL
+from app.api.job_api import router as job_router
+from app.core.config import FRONTEND_URL, JOB_WORKERS_IN_API, SCHEMA_MIGRATE_ON_STARTUP
+from app.core.metrics import render_metrics
+from app.core.admission import Overloaded, admission_controller
+from app.core.circuit_breaker import circuit_breakers, CLOSED
+from app.core.clients import warm_up, close_clients
+from app.core.tracing import TracingMiddleware, TRACE_ID_HEADER
+from app.services.job_worker import JobWorker
+from app.schema import ensure_schema
+import asyncio
 import os
 
 app = FastAPI()
@@ -23,11 +33,76 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TRACE_ID_HEADER],
 )
 
+# Added last so it wraps CORS and sees every API request first
+app.add_middleware(TracingMiddleware)
+
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(claim_router, prefix="/api/claims", tags=["Fact Checking"])
+app.include_router(job_router, prefix="/api/jobs", tags=["Background Jobs"])
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    # Shed non-cached work quickly so clients back off instead of timing out
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.on_event("startup")
+async def warm_up_clients():
+    # Open upstream connections now so the first requests skip the TLS handshakes
+    await warm_up()
+
+@app.on_event("startup")
+async def start_schema_migrations():
+    # Idempotent; runs in the background so requests are served while indexes build
+    if SCHEMA_MIGRATE_ON_STARTUP:
+        async def migrate():
+            try:
+                await ensure_schema()
+            except Exception as e:
+                print(f"[WARNING] Schema migrations failed: {str(e)}")
+        app.state.schema_task = asyncio.create_task(migrate())
+
+@app.on_event("startup")
+async def start_job_worker():
+    # Run background jobs inside the API process unless dedicated workers handle them
+    if JOB_WORKERS_IN_API:
+        app.state.job_worker = JobWorker()
+        app.state.job_worker_task = asyncio.create_task(app.state.job_worker.run())
+
+@app.on_event("shutdown")
+async def stop_job_worker():
+    worker = getattr(app.state, "job_worker", None)
+    if worker is not None:
+        worker.stop()
+        await app.state.job_worker_task
+
+@app.on_event("shutdown")
+async def close_upstream_clients():
+    await close_clients()
 
 @app.get("/")
 async def root():
     return {"message": "Fact Checker API is running. Use /api/claims endpoint."}
+
+@app.get("/health")
+async def health():
+    """Liveness plus upstream circuit breaker state; degraded while any circuit is not closed."""
+    circuits = {name: breaker.snapshot() for name, breaker in circuit_breakers.items()}
+    degraded = any(circuit["state"] != CLOSED for circuit in circuits.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "circuits": circuits,
+        "overloaded": admission_controller.overloaded
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
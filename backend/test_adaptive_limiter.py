@@ -0,0 +1,62 @@
+"""
+Test that one adaptive limiter can be shared by two event loops, as it is
+by uvicorn's loop and the sync bridge loop.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.adaptive_limiter import AdaptiveLimiter, SUCCESS, IGNORE
+from app.core.deadline import DeadlineExceeded, deadline_scope
+
+
+def test_waiter_on_other_loop_is_woken():
+    """A permit released on one loop wakes a waiter on another."""
+    limiter = AdaptiveLimiter("test/model", initial=1, min_limit=1)
+    waiting = threading.Event()
+    granted = []
+
+    def other_loop():
+        async def wait():
+            task = asyncio.create_task(limiter.acquire())
+            while not limiter.waiting:
+                await asyncio.sleep(0.001)
+            waiting.set()
+            started = time.monotonic()
+            await asyncio.wait_for(task, timeout=5)
+            granted.append(time.monotonic() - started)
+            limiter.release(0.1, IGNORE)
+        asyncio.run(wait())
+
+    async def hold_then_release():
+        await limiter.acquire()
+        thread = threading.Thread(target=other_loop)
+        thread.start()
+        await asyncio.to_thread(waiting.wait, 5)
+        limiter.release(0.1, SUCCESS)
+        await asyncio.to_thread(thread.join, 5)
+
+    asyncio.run(hold_then_release())
+    # Woken as soon as the permit is free, not on the loop's next unrelated wakeup
+    assert len(granted) == 1 and granted[0] < 1
+    assert limiter.in_flight == 0
+    assert limiter.waiting == 0
+
+
+def test_waiter_gives_up_at_deadline():
+    """A waiter out of request budget leaves the queue without taking a permit."""
+    limiter = AdaptiveLimiter("test/model", initial=1, min_limit=1)
+
+    async def wait_past_deadline():
+        await limiter.acquire()
+        with deadline_scope(0.05):
+            with pytest.raises(DeadlineExceeded):
+                await limiter.acquire()
+        limiter.release(0.1, IGNORE)
+
+    asyncio.run(wait_past_deadline())
+    assert limiter.in_flight == 0
+    assert limiter.waiting == 0
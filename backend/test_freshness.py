@@ -0,0 +1,55 @@
+"""
+Test which cache TTL category claims get: only claims about the present or
+about fast-moving figures are volatile.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.freshness import classify_claim, freshness, VOLATILE, RECENT, GENERAL, HISTORICAL, FRESH, STALE, EXPIRED, CATEGORY_TTLS
+
+NOW = datetime(2026, 6, 1)
+
+CLAIMS = [
+    # Stable claims that merely contain a time-sensitive word
+    ("Humans live on Earth", GENERAL),
+    ("Water is a current conductor", GENERAL),
+    ("Pluto is now classified as a dwarf planet", GENERAL),
+    ("Mount Everest is ranked as the highest mountain", GENERAL),
+    ("The score of a symphony is written for an orchestra", GENERAL),
+    ("The Great Wall of China is visible from space", GENERAL),
+    # About the present or a moving figure
+    ("Joe Smith is currently the mayor of Springfield", VOLATILE),
+    ("The current president of France is Emmanuel Macron", VOLATILE),
+    ("Inflation rates are above 5 percent", VOLATILE),
+    ("Bitcoin price is over $100,000", VOLATILE),
+    ("Unemployment is now at 4%", VOLATILE),
+    ("Apple's share price doubled", VOLATILE),
+    ("The latest polls show Labour ahead", VOLATILE),
+    # Dated claims
+    ("Stock prices fell 50% in 2008", HISTORICAL),
+    ("The Berlin Wall fell in 1989", HISTORICAL),
+    ("The Olympics were held in Paris in 2025", RECENT),
+    ("The company plans to launch a rocket", RECENT)
+]
+
+
+@pytest.mark.parametrize("claim,category", CLAIMS)
+def test_classify_claim(claim, category):
+    assert classify_claim(claim, now=NOW) == category
+
+
+def test_present_time_period_is_volatile():
+    """The structuring step marks claims about the present with time_period "current"."""
+    structured = {"claim": "Emmanuel Macron is president of France", "time_period": "current"}
+    assert classify_claim("Macron is president of France", structured, now=NOW) == VOLATILE
+
+
+def test_freshness_states():
+    """Fresh within the TTL, stale up to CACHE_MAX_STALE_FACTOR TTLs, expired after."""
+    ttl = timedelta(seconds=CATEGORY_TTLS[GENERAL])
+    doc = {"prompt": "Humans live on Earth", "structured_data": {}}
+    assert freshness(dict(doc, updated_at=NOW - ttl / 2), now=NOW).state == FRESH
+    assert freshness(dict(doc, updated_at=NOW - ttl * 1.01), now=NOW).state == STALE
+    assert freshness(dict(doc, updated_at=NOW - ttl * 1000), now=NOW).state == EXPIRED
@@ -0,0 +1,63 @@
+"""
+Test the fair scheduler's lane order: text is never overtaken, and a heavy
+lane that has waited too long is promoted over the other heavy lanes.
+"""
+
+import asyncio
+
+from app.core.scheduler import FairScheduler
+
+LANES = [("text", 1), ("url", 1), ("multimodal", 1)]
+
+
+async def _start_order(scheduler: FairScheduler, queued: list) -> list:
+    """
+    Queue runs behind a held slot, in the given order, then free the slot.
+
+    Returns:
+        list: Lanes in the order their runs started
+    """
+    order = []
+    held = asyncio.Event()
+    release = asyncio.Event()
+
+    async def hold():
+        async with scheduler.slot("text", user_id="holder"):
+            held.set()
+            await release.wait()
+
+    async def run(lane_name: str):
+        async with scheduler.slot(lane_name, user_id=lane_name):
+            order.append(lane_name)
+
+    holder = asyncio.create_task(hold())
+    await held.wait()
+    runs = []
+    for lane_name in queued:
+        runs.append(asyncio.create_task(run(lane_name)))
+        await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(holder, *runs)
+    return order
+
+
+def test_text_goes_first_without_promotion():
+    """Lanes are served in priority order while nothing has waited too long."""
+    scheduler = FairScheduler("test", 1, LANES, max_lane_wait=60)
+    order = asyncio.run(_start_order(scheduler, ["multimodal", "url", "text"]))
+    assert order == ["text", "url", "multimodal"]
+
+
+def test_promoted_heavy_lane_never_overtakes_text():
+    """A heavy run past max_lane_wait still starts after queued text runs."""
+    scheduler = FairScheduler("test", 1, LANES, max_lane_wait=0)
+    order = asyncio.run(_start_order(scheduler, ["multimodal", "text", "text"]))
+    assert order == ["text", "text", "multimodal"]
+
+
+def test_starved_heavy_lane_is_promoted_over_url():
+    """Multimodal waiting past max_lane_wait goes before newer URL runs."""
+    scheduler = FairScheduler("test", 1, LANES, max_lane_wait=0)
+    order = asyncio.run(_start_order(scheduler, ["multimodal", "url", "url"]))
+    assert order == ["multimodal", "url", "url"]
+    assert scheduler.snapshot()["lanes"]["multimodal"]["promoted"] == 1
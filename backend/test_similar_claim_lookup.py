@@ -0,0 +1,71 @@
+"""
+Test that the near-duplicate lookup ranks LSH candidates by shared bands,
+so claims colliding on one popular band can't crowd out the real match.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from app.repository import claim_repository
+from app.repository.claim_repository import AsyncClaimRepository, build_claim_doc, SIMILARITY_MAX_CANDIDATES
+from app.core.claim_similarity import tokens, shingles, lsh_bands
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs[:length]
+
+
+class FakeClaims:
+    """Just enough of an async collection to run the similarity pipeline."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def aggregate(self, pipeline):
+        docs = [dict(doc) for doc in self.docs]
+        for stage in pipeline:
+            (operator, argument), = stage.items()
+            if operator == "$match":
+                wanted = set(argument["lsh_bands"]["$in"])
+                docs = [doc for doc in docs if wanted & set(doc["lsh_bands"])]
+            elif operator == "$addFields":
+                (field, expression), = argument.items()
+                _, bands = expression["$size"]["$setIntersection"]
+                for doc in docs:
+                    doc[field] = len(set(doc["lsh_bands"]) & set(bands))
+            elif operator == "$sort":
+                for key, direction in reversed(list(argument.items())):
+                    docs.sort(key=lambda doc: doc[key], reverse=direction < 0)
+            elif operator == "$limit":
+                docs = docs[:argument]
+            elif operator == "$project":
+                for doc in docs:
+                    for field in argument:
+                        doc.pop(field, None)
+        return FakeCursor(docs)
+
+
+def test_near_duplicate_found_among_many_collisions(monkeypatch):
+    """The real match wins over more than SIMILARITY_MAX_CANDIDATES newer one-band collisions."""
+    claim = "Mt. Everest is the world's tallest mountain"
+    popular_band = lsh_bands(shingles(tokens(claim)))[0]
+
+    match = build_claim_doc("Mount Everest is the tallest mountain", {"status": "True"})
+    match["updated_at"] = datetime.utcnow() - timedelta(days=30)
+    collisions = []
+    for index in range(SIMILARITY_MAX_CANDIDATES + 10):
+        doc = build_claim_doc(f"The river number {index} floods every spring", {"status": "True"})
+        doc["lsh_bands"] = [popular_band] + doc["lsh_bands"][1:]
+        collisions.append(doc)
+
+    monkeypatch.setattr(claim_repository, "get_async_claims_collection", lambda: FakeClaims(collisions + [match]))
+    found, score = asyncio.run(AsyncClaimRepository().find_similar_claim(claim))
+
+    assert found is not None
+    assert found["_id"] == match["_id"]
+    assert "shared_bands" not in found
+    assert score > 0
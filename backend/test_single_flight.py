@@ -0,0 +1,123 @@
+"""
+Test SingleFlight: concurrent calls with the same key share one execution,
+and a follower that waits too long falls back to doing the work itself.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight, SingleFlightTimeout
+
+
+def test_concurrent_calls_share_one_execution():
+    """Five callers with one key run fn once and each get their own copy."""
+    flights = SingleFlight("test", timeout=5)
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"verdict": "True", "sources": []}
+
+    async def run():
+        return await asyncio.gather(*[flights.do("claim", work) for _ in range(5)])
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result == {"verdict": "True", "sources": []} for result in results)
+    results[0]["sources"].append("annotated by one caller")
+    assert results[1]["sources"] == []
+    assert flights.snapshot()["leaders"] == 1
+    assert flights.snapshot()["coalesced_waiters"] == 4
+    assert flights.in_flight() == 0
+
+
+def test_different_keys_are_not_coalesced():
+    flights = SingleFlight("test", timeout=5)
+    calls = []
+
+    async def work(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    async def run():
+        return await asyncio.gather(*[flights.do(key, lambda key=key: work(key)) for key in ("a", "b")])
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_follower_timeout_falls_back_to_own_call():
+    """A follower that gives up runs the work itself; the leader still finishes."""
+    flights = SingleFlight("test", timeout=0.01)
+    calls = []
+
+    async def work(name, delay):
+        calls.append(name)
+        await asyncio.sleep(delay)
+        return name
+
+    async def follower():
+        # The pattern the services use around SingleFlight.do
+        try:
+            return await flights.do("claim", lambda: work("follower", 0))
+        except SingleFlightTimeout:
+            return await work("fallback", 0)
+
+    async def run():
+        leader = asyncio.create_task(flights.do("claim", lambda: work("leader", 0.1)))
+        await asyncio.sleep(0)
+        return await follower(), await leader
+
+    assert asyncio.run(run()) == ("fallback", "leader")
+    assert calls == ["leader", "fallback"]
+    assert flights.snapshot()["timeouts"] == 1
+
+
+def test_follower_timeout_raises():
+    flights = SingleFlight("test", timeout=5)
+
+    async def run():
+        leader = asyncio.create_task(flights.do("claim", lambda: asyncio.sleep(0.1)))
+        await asyncio.sleep(0)
+        with pytest.raises(SingleFlightTimeout):
+            await flights.do("claim", lambda: asyncio.sleep(0), timeout=0.01)
+        await leader
+
+    asyncio.run(run())
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    """The shared task is shielded: followers still get the result."""
+    flights = SingleFlight("test", timeout=5)
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        leader = asyncio.create_task(flights.do("claim", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("claim", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_error_reaches_every_caller_and_frees_the_key():
+    flights = SingleFlight("test", timeout=5)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def run():
+        return await asyncio.gather(*[flights.do("claim", fail) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.in_flight() == 0
@@ -0,0 +1,103 @@
+"""
+Test what track_upstream reports to the adaptive concurrency limiter and the
+circuit breaker for each way an upstream call can end.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import metrics
+from app.core.circuit_breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+from app.core.adaptive_limiter import AdaptiveLimiter, TIMEOUT, IGNORE
+from app.core.deadline import DeadlineExceeded, StageTimeout, run_within_deadline
+
+
+class RecordingLimiter(AdaptiveLimiter):
+    """Limiter that remembers the outcome of each released call."""
+
+    def __init__(self):
+        super().__init__("test/model", initial=4)
+        self.outcomes = []
+
+    def release(self, latency: float, outcome: str):
+        self.outcomes.append(outcome)
+        super().release(latency, outcome)
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RecordingLimiter()
+    monkeypatch.setattr(metrics, "get_limiter", lambda upstream, model=None: limiter)
+    return limiter
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0)
+    monkeypatch.setattr(metrics, "get_circuit_breaker", lambda upstream: breaker)
+    return breaker
+
+
+def _client_error() -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://upstream.test")
+    return httpx.HTTPStatusError("Bad Request", request=request, response=httpx.Response(400, request=request))
+
+
+def _server_error() -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://upstream.test")
+    return httpx.HTTPStatusError("Service Unavailable", request=request, response=httpx.Response(503, request=request))
+
+
+async def _call(upstream: str, error: Exception):
+    async with metrics.track_upstream(upstream, "test"):
+        raise error
+
+
+def test_hung_call_reports_timeout(limiter):
+    """A call cut off by its own cap tells the limiter the upstream is slow."""
+
+    async def hang():
+        async with metrics.track_upstream("perplexity", "test"):
+            await run_within_deadline(asyncio.sleep(5), cap=0.01)
+
+    with pytest.raises(StageTimeout):
+        asyncio.run(hang())
+    assert limiter.outcomes == [TIMEOUT]
+
+
+def test_exhausted_budget_is_ignored(limiter):
+    """Running out of request budget says nothing about the upstream."""
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(_call("perplexity", DeadlineExceeded("No time budget left for this stage")))
+    assert limiter.outcomes == [IGNORE]
+
+
+def test_client_error_does_not_close_half_open_circuit(breaker):
+    """A bad request sent as a half-open probe doesn't prove the upstream recovered."""
+    breaker._transition(OPEN)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(_call("test_upstream", _client_error()))
+    assert breaker.state == HALF_OPEN
+    assert breaker.probes_in_flight == 0
+
+
+def test_client_error_keeps_failure_streak(breaker):
+    """A 4xx in the middle of an outage doesn't reset the consecutive failures."""
+    for error in (_server_error(), _server_error(), _client_error(), _server_error()):
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(_call("test_upstream", error))
+    assert breaker.state == OPEN
+
+
+def test_client_error_not_counted_in_error_rate(breaker):
+    """Only errors that say the upstream is unhealthy feed admission control."""
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(_call("test_client_errors", _client_error()))
+    assert metrics.upstream_health.error_rate("test_client_errors") == (0.0, 1)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(_call("test_client_errors", _server_error()))
+    assert metrics.upstream_health.error_rate("test_client_errors") == (0.5, 2)
+    assert breaker.state == CLOSED